@@ -0,0 +1,241 @@
+# benchmark.py
+# Mede os caminhos críticos do sistema em bancos sintéticos de vários tamanhos
+# e compara com uma linha de base gravada em JSON. Roda sem interface gráfica.
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from database import Database
+import exportacao
+import gerador_dados
+
+try:
+    import bordero
+except ImportError as e:  # PyMuPDF ausente
+    print(f"Aviso: casos do borderô foram ignorados ({e}).")
+    bordero = None
+
+TAMANHOS_PADRAO = (1_000, 100_000, 1_000_000)
+ARQUIVO_BASELINE_PADRAO = "benchmark_baseline.json"
+TOLERANCIA_PADRAO = 0.25      # 25% mais lento que a linha de base conta como regressão
+MARGEM_MINIMA_SEGUNDOS = 0.002  # diferenças abaixo disso são ruído de medição
+LIMITE_SESSOES_BORDERO = 50_000
+
+TIPOS_GRAFICO = [
+    "Comparativo Mensal", "Comparativo Semestral", "Comparativo Anual",
+    "Comparativo de Domingos", "Comparativo por Sala", "Comparativo de Salas por Mês",
+]
+
+# Filtros do histórico que precisam de índice: (descrição, parâmetros de buscar_pagina_lista,
+# índices aceitos). O plano tem de buscar (SEARCH) por um deles e nunca varrer (SCAN) a tabela
+# sessoes, nem mesmo percorrendo um índice inteiro. A ordenação por público só busca a partir da
+# segunda página (keyset); a por evento percorre o índice e por isso não entra aqui.
+PLANOS_ESPERADOS = [
+    ("período", {"data_inicio": "{ano}-03-01", "data_fim": "{ano}-05-31"}, {"idx_sessoes_data_iso"}),
+    ("dias da semana", {"dias_semana": (0, 6)}, {"idx_sessoes_dia_semana"}),
+    ("sala + dia da semana", {"filtro_sala": "Arena", "dias_semana": (5,)}, {"idx_sessoes_sala", "idx_sessoes_dia_semana"}),
+    ("público mínimo", {"total_minimo": 200}, {"idx_sessoes_total"}),
+    ("faixa de público", {"total_minimo": 100, "total_maximo": 120}, {"idx_sessoes_total"}),
+    ("importadas via PDF", {"importado_pdf": True}, {"idx_sessoes_importadas_pdf"}),
+    ("ano + importadas via PDF", {"ano_selecionado": "{ano}", "importado_pdf": True}, {"idx_sessoes_importadas_pdf"}),
+    ("ordenado por público", {"ordem": "total", "apos": (500, 0)}, {"idx_sessoes_total"}),
+]
+
+def plano_aceito(plano, indices):
+    """Indica se o plano busca por um dos `indices` sem varrer a tabela sessoes."""
+    varredura = any(passo.startswith("SCAN sessoes") for passo in plano)
+    usa_indice = any(f"INDEX {indice}" in passo for passo in plano for indice in indices)
+    return usa_indice and not varredura
+
+def verificar_planos(db):
+    """Confere o EXPLAIN QUERY PLAN de cada caso de PLANOS_ESPERADOS. Retorna a lista de falhas."""
+    ano = db.buscar_anos_disponiveis()[0]
+    falhas = []
+    for descricao, filtros, indices in PLANOS_ESPERADOS:
+        filtros = {chave: valor.format(ano=ano) if isinstance(valor, str) else valor for chave, valor in filtros.items()}
+        plano = db.plano_pagina(**filtros)
+        situacao = "ok" if plano_aceito(plano, indices) else "FALHOU"
+        print(f"  [{situacao:>6}] {descricao:<28} {' ; '.join(plano)}")
+        if situacao != "ok":
+            falhas.append((descricao, plano))
+    return falhas
+
+def _importar_app():
+    """Importa a classe App sem abrir janela; retorna None se as dependências da interface faltarem."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import sistema_espetaculos
+    except ImportError as e:
+        print(f"Aviso: casos que dependem de sistema_espetaculos foram ignorados ({e}).")
+        return None
+    return sistema_espetaculos
+
+def medir(funcao, repeticoes):
+    """Executa `funcao` várias vezes e retorna a mediana do tempo, em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+def montar_casos(db, modulo_app, tamanho, pasta):
+    """Retorna a lista de (nome, função) medidos para um banco de `tamanho` sessões."""
+    ano = int(db.buscar_anos_disponiveis()[0])
+    casos = [
+        ("db.buscar_anos_disponiveis", db.buscar_anos_disponiveis),
+        ("db.contar_sessoes_filtradas[sala]", lambda: db.contar_sessoes_filtradas(filtro_sala="Arena")),
+        ("db.buscar_pagina_sessoes[sala]", lambda: db.buscar_pagina_sessoes(filtro_sala="Arena")),
+        ("db.buscar_sessoes_filtradas[nome]", lambda: db.buscar_sessoes_filtradas("sermao")),
+        ("db.buscar_sessoes_filtradas[ano]", lambda: db.buscar_sessoes_filtradas(ano_selecionado=ano)),
+        ("db.agregar_publico[graficos]", lambda: [
+            db.agregar_publico(por=por, ano=ano, dia_semana=dia)
+            for por, dia in ((("mes",), None), (("semestre",), None), ((), None),
+                             ((), 0), (("sala",), None), (("mes", "sala"), None))
+        ]),
+        ("db.iterar_sessoes[tudo]", lambda: sum(1 for _ in db.iterar_sessoes())),
+    ]
+    if bordero is not None:
+        paginas, _ = gerador_dados.gerar_paginas_bordero("BENCHMARK", min(tamanho, LIMITE_SESSOES_BORDERO))
+        texto = "".join(paginas)
+        casos += [
+            ("bordero.extrair_dados_do_texto", lambda: bordero.extrair_dados_do_texto(texto)),
+            ("bordero.extrair_dados[paginas]", lambda: bordero.extrair_dados(paginas)),
+        ]
+    casos.append(("exportacao.exportar_planilha_anual", lambda: exportacao.exportar_planilha_anual(
+        db, os.path.join(pasta, "benchmark.xlsx"))))
+    casos.append(("exportacao.exportar_csv", lambda: exportacao.exportar_csv(db, os.path.join(pasta, "benchmark.csv"))))
+    casos.append(("exportacao.exportar_parquet", lambda: exportacao.exportar_parquet(
+        db, os.path.join(pasta, "benchmark.parquet"))))
+    # Consultas que atualizar_historico dispara numa busca por sala.
+    filtros = ("", "Arena", None)
+    casos.append(("db.buscar_pagina_lista[dias+publico]", lambda: db.buscar_pagina_lista(
+        dias_semana=(0, 6), total_minimo=150)))
+    casos.append(("historico[consultas]", lambda: (
+        db.totais_sessoes_filtradas(*filtros), db.buscar_pagina_lista(*filtros),
+        db.buscar_anos_disponiveis(), db.contar_sessoes_por_evento(*filtros),
+    )))
+
+    if modulo_app is not None:
+        from types import SimpleNamespace
+        from matplotlib.figure import Figure
+        App = modulo_app.App
+        contexto = SimpleNamespace(db=db, COLORS=modulo_app.COLORS)
+
+        def plotar_todos():
+            for tipo in TIPOS_GRAFICO:
+                ax1, ax2 = Figure(figsize=(14, 6)).subplots(1, 2)
+                App.plotar(contexto, ax1, ano, tipo)
+                App.plotar(contexto, ax2, ano - 1, tipo)
+
+        casos += [
+            ("App._formatar_linha_historico[pagina]", lambda: [
+                App._formatar_linha_historico(sessao) for sessao in db.buscar_pagina_lista("", "Arena")]),
+            ("App.plotar[6 tipos x 2 anos]", plotar_todos),
+        ]
+    return casos
+
+def preparar_banco(pasta, tamanho):
+    """Abre (ou gera, na primeira vez) o banco sintético de `tamanho` sessões e mede a carga."""
+    caminho = os.path.join(pasta, f"benchmark_{tamanho}.db")
+    tempo_carga = None
+    if not os.path.exists(caminho):
+        print(f"Gerando banco sintético com {tamanho} sessões...")
+        inicio = time.perf_counter()
+        gerador_dados.popular_banco(caminho, tamanho).fechar()
+        tempo_carga = time.perf_counter() - inicio
+    # Sem cache de consultas: cada repetição tem de medir a consulta de verdade.
+    db = Database(caminho, limite_cache=0)
+    db.criar_tabela()
+    return db, tempo_carga
+
+def executar(tamanhos, repeticoes, pasta, casos_filtro=None):
+    """Roda todos os casos para cada tamanho. Retorna {tamanho: {caso: segundos}}."""
+    modulo_app = _importar_app()
+    resultados = {}
+    for tamanho in tamanhos:
+        db, tempo_carga = preparar_banco(pasta, tamanho)
+        medidas = {}
+        if tempo_carga is not None:
+            medidas["db.adicionar_sessoes_em_lote[carga]"] = tempo_carga
+        for nome, funcao in montar_casos(db, modulo_app, tamanho, pasta):
+            if casos_filtro and not any(trecho in nome for trecho in casos_filtro):
+                continue
+            # Casos que percorrem o banco inteiro rodam uma vez só nos tamanhos grandes.
+            vezes = 1 if tamanho >= 100_000 and ("tudo" in nome or "planilha" in nome) else repeticoes
+            medidas[nome] = medir(funcao, vezes)
+            print(f"  [{tamanho:>9}] {nome:<40} {medidas[nome] * 1000:10.2f} ms")
+        db.fechar()
+        resultados[str(tamanho)] = medidas
+    return resultados
+
+def comparar(resultados, baseline, tolerancia):
+    """Lista as regressões (caso mais lento que a linha de base além da tolerância)."""
+    regressoes = []
+    for tamanho, medidas in resultados.items():
+        for nome, atual in medidas.items():
+            anterior = baseline.get(tamanho, {}).get(nome)
+            if anterior is None:
+                continue
+            if atual > anterior * (1 + tolerancia) and atual - anterior > MARGEM_MINIMA_SEGUNDOS:
+                regressoes.append((tamanho, nome, anterior, atual))
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos críticos do ShowManager.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO),
+                        help="Quantidades de sessões dos bancos sintéticos.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--pasta-dados", default=None,
+                        help="Pasta onde os bancos sintéticos ficam guardados entre execuções (padrão: temporária).")
+    parser.add_argument("--casos", nargs="*", help="Roda só os casos cujo nome contém um destes trechos.")
+    parser.add_argument("--baseline", default=ARQUIVO_BASELINE_PADRAO, help="Arquivo JSON da linha de base.")
+    parser.add_argument("--gravar-baseline", action="store_true", help="Grava os resultados como nova linha de base.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument("--verificar-planos", action="store_true",
+                        help="Só confere se os filtros indexados do histórico usam índice (sem medir tempos).")
+    args = parser.parse_args()
+
+    if args.verificar_planos:
+        with tempfile.TemporaryDirectory() as pasta_temp:
+            pasta = args.pasta_dados or pasta_temp
+            os.makedirs(pasta, exist_ok=True)
+            falhas = []
+            for tamanho in args.tamanhos:
+                db, _ = preparar_banco(pasta, tamanho)
+                print(f"Planos de consulta [{tamanho} sessões]:")
+                falhas += verificar_planos(db)
+                db.fechar()
+        print("Todos os filtros indexados usam índice." if not falhas else f"{len(falhas)} plano(s) sem o índice esperado.")
+        return 1 if falhas else 0
+
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        pasta = args.pasta_dados or pasta_temp
+        os.makedirs(pasta, exist_ok=True)
+        resultados = executar(args.tamanhos, args.repeticoes, pasta, args.casos)
+
+    if args.gravar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"Linha de base gravada em '{args.baseline}'.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Nenhuma linha de base em '{args.baseline}'. Use --gravar-baseline para criar uma.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressoes = comparar(resultados, baseline, args.tolerancia)
+    for tamanho, nome, anterior, atual in regressoes:
+        print(f"REGRESSÃO [{tamanho}] {nome}: {anterior * 1000:.2f} ms -> {atual * 1000:.2f} ms")
+    if not regressoes:
+        print("Nenhuma regressão em relação à linha de base.")
+    return 1 if regressoes else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
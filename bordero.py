@@ -0,0 +1,340 @@
+# bordero.py
+# Leitura de borderôs (PDF de controle de bilheteria) sem depender da interface gráfica.
+import argparse
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import fitz  # PyMuPDF
+
+from database import Database, DIAS_SEMANA_PT, OBSERVACAO_IMPORTACAO_PDF, hash_arquivo
+
+# Resultado da leitura de um PDF num lote; `importado_em` vem de pdfs_importados (None se nunca importado).
+ResultadoPdf = namedtuple("ResultadoPdf", "caminho dados erro hash importado_em")
+
+# Todos os marcadores do borderô numa única expressão, percorrida uma vez do início ao fim.
+# "Evento:" e "Total vendido no evento" usam lookahead para não consumir o texto seguinte.
+PADRAO_TOKENS = re.compile(r"""
+      (?P<data>Data:\s*(?P<valor_data>\d{2}/\d{2}/\d{4}))
+    | ^(?:(?P<pcg>Comprometimento\ \(PCG\))
+        | (?P<com>Trabalhador)
+        | (?P<adv>Cortesia\ PRODUÇÃO|Cortesia\ SESC|Inteira|Meia\ Entrada)
+      )\s*\n\s*(?P<valor>\d+)
+    | Evento:(?=\s*(?P<nome_evento>[^\n\r]+))
+    | Total\ vendido\ no\ evento(?=\s*\n\s*(?P<valor_total>\d+))
+""", re.IGNORECASE | re.MULTILINE | re.VERBOSE)
+
+class ImportacaoCancelada(Exception):
+    """Lançada quando o usuário cancela a leitura de um PDF entre uma página e outra."""
+
+def paginas_pdf(caminho_pdf, progresso=None, cancelar=None):
+    """
+    Gera o texto do PDF uma página por vez (só uma página fica em memória).
+    `progresso(pagina, total_paginas)` é chamado após cada página lida; se o evento `cancelar`
+    (threading.Event) for acionado, a leitura para antes da página seguinte com ImportacaoCancelada.
+    """
+    with fitz.open(caminho_pdf) as doc:
+        total_paginas = doc.page_count
+        for numero, pagina in enumerate(doc, start=1):
+            if cancelar is not None and cancelar.is_set():
+                raise ImportacaoCancelada(f"Leitura cancelada na página {numero} de {total_paginas}.")
+            yield pagina.get_text("text")
+            if progresso is not None:
+                progresso(numero, total_paginas)
+
+def processar_pdf(caminho_pdf, progresso=None, cancelar=None):
+    """Lê o PDF página a página e devolve os dados extraídos (ver paginas_pdf e extrair_dados)."""
+    return extrair_dados(paginas_pdf(caminho_pdf, progresso, cancelar))
+
+def hash_pdf(caminho_pdf):
+    """SHA-256 do conteúdo do arquivo: identifica o mesmo borderô mesmo renomeado."""
+    return hash_arquivo(caminho_pdf)
+
+def processar_pdf_com_cache(caminho_pdf, db, progresso=None, cancelar=None):
+    """
+    Como processar_pdf, mas consulta antes o cache do banco pelo hash do arquivo.
+    Retorna (hash, dados_extraidos, importado_em); importado_em é None se o PDF nunca foi importado.
+    """
+    hash_arquivo = hash_pdf(caminho_pdf)
+    importado_em = db.buscar_importacao_pdf(hash_arquivo)
+    cache = db.buscar_cache_pdf(hash_arquivo)
+    if cache is not None:
+        return hash_arquivo, cache["dados"], importado_em
+    dados = processar_pdf(caminho_pdf, progresso, cancelar)
+    db.guardar_cache_pdf(hash_arquivo, os.path.basename(caminho_pdf), dados)
+    return hash_arquivo, dados, importado_em
+
+def marcar_importado(db, hash_arquivo, caminho=None, importado_em=None):
+    """
+    Registra que o PDF foi importado (Database.marcar_pdf_importado). Com o `caminho`, guarda
+    também tamanho e data de modificação do arquivo. Retorna a data registrada.
+    """
+    if caminho is None:
+        return db.marcar_pdf_importado(hash_arquivo, importado_em=importado_em)
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return db.marcar_pdf_importado(hash_arquivo, importado_em=importado_em)
+    return db.marcar_pdf_importado(hash_arquivo, os.path.abspath(caminho), info.st_size, info.st_mtime_ns,
+                                   importado_em)
+
+def formatar_data_importacao(importado_em):
+    """'AAAA-MM-DD HH:MM:SS' do banco -> 'DD/MM/AAAA às HH:MM' para as mensagens."""
+    return datetime.strptime(importado_em, "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y às %H:%M")
+
+# Trechos (em minúsculas) presentes em todo token; página sem nenhum deles não precisa ser varrida.
+MARCADORES = ("data:", "comprometimento (pcg)", "trabalhador", "cortesia", "inteira",
+              "meia entrada", "evento:", "total vendido no evento")
+
+def _tem_marcador(texto):
+    texto = texto.lower()
+    return any(marcador in texto for marcador in MARCADORES)
+
+def _inicio_ultimas_linhas(texto, quantidade=2):
+    """Posição onde começam as `quantidade` últimas linhas não vazias do texto (0 se houver menos)."""
+    fim = len(texto)
+    encontradas = 0
+    while fim > 0:
+        inicio = texto.rfind("\n", 0, fim) + 1
+        if texto[inicio:fim].strip():
+            encontradas += 1
+            if encontradas == quantidade:
+                return inicio
+        fim = inicio - 1
+    return 0
+
+class LeitorBordero:
+    """
+    Lê um borderô página a página. Cada "Data:" abre uma sessão; as linhas de público seguintes
+    somam nela até a próxima data. O público de Cortesia, Inteira e Meia Entrada é agrupado em "adv".
+
+    Um token ocupa no máximo duas linhas não vazias (ex.: "Inteira" e, na linha seguinte, o valor),
+    então o fim de cada página (suas duas últimas linhas não vazias) fica guardado e é lido junto
+    com a página seguinte: um bloco que atravessa a quebra de página sai igual ao do texto inteiro.
+    """
+    def __init__(self):
+        self.nome_evento = None
+        self.total_vendido_pdf = None
+        self._sessao = None
+
+    def _consumir(self, match):
+        """Aplica um token; devolve a sessão anterior quando uma nova data a fecha."""
+        valor = match.group("valor")
+        if valor is not None:
+            # Linhas de público antes da primeira data (cabeçalho) são ignoradas
+            if self._sessao is not None:
+                categoria = "pcg" if match.group("pcg") else "com" if match.group("com") else "adv"
+                self._sessao["publico"][categoria] += int(valor)
+        elif match.group("data"):
+            fechada = self._fechar_sessao()
+            self._sessao = {"data": match.group("valor_data"), "publico": {"pcg": 0, "com": 0, "adv": 0}}
+            return fechada
+        elif match.group("nome_evento") is not None:
+            if self.nome_evento is None:
+                self.nome_evento = match.group("nome_evento").strip()
+        elif self.total_vendido_pdf is None:
+            self.total_vendido_pdf = int(match.group("valor_total"))
+        return None
+
+    def _fechar_sessao(self):
+        # Só entra a sessão com algum público encontrado
+        sessao, self._sessao = self._sessao, None
+        if sessao and any(sessao["publico"].values()):
+            return sessao
+        return None
+
+    def sessoes(self, paginas):
+        """Gera as sessões à medida que cada bloco de data se fecha, consumindo `paginas` (textos) uma a uma."""
+        resto = ""  # fim ainda não lido da página anterior; sempre começa no início de uma linha
+        pos = 0     # ponto de `resto` até onde a varredura já foi
+        for pagina in paginas:
+            texto = resto + pagina
+            if not _tem_marcador(texto):
+                resto, pos = texto[texto.rfind("\n") + 1:], 0
+                continue
+            corte = _inicio_ultimas_linhas(texto)
+            for match in PADRAO_TOKENS.finditer(texto, pos):
+                if match.start() >= corte:
+                    break
+                pos = match.end()
+                sessao = self._consumir(match)
+                if sessao:
+                    yield sessao
+            resto, pos = texto[corte:], max(pos - corte, 0)
+
+        for match in PADRAO_TOKENS.finditer(resto, pos):
+            sessao = self._consumir(match)
+            if sessao:
+                yield sessao
+        sessao = self._fechar_sessao()
+        if sessao:
+            yield sessao
+
+    def dados(self, sessoes):
+        """Monta o dicionário de resultado (o mesmo formato de extrair_dados_do_texto)."""
+        dados = {"sessoes": list(sessoes), "total_vendido_pdf": self.total_vendido_pdf}
+        if self.nome_evento is not None:
+            dados["nome_evento"] = self.nome_evento
+        return dados
+
+def extrair_dados(paginas):
+    """Extrai {"sessoes", "nome_evento", "total_vendido_pdf"} de uma sequência de textos de página."""
+    leitor = LeitorBordero()
+    return leitor.dados(leitor.sessoes(paginas))
+
+def extrair_dados_do_texto(texto):
+    """Extrai informações do PDF onde cada data é seguida por sua tabela de público."""
+    return extrair_dados([texto])
+
+def montar_sessoes(dados_extraidos, sala, nome_evento=None, observacoes=OBSERVACAO_IMPORTACAO_PDF):
+    """
+    Converte o resultado de extrair_dados_do_texto nos dicionários aceitos por
+    Database.adicionar_sessoes_em_lote. Lança ValueError se alguma data for inválida.
+    """
+    nome_evento = nome_evento or dados_extraidos.get("nome_evento", "Nome não encontrado")
+    sessoes = []
+    for sessao_data in dados_extraidos.get("sessoes", []):
+        try:
+            data_sessao_dt = datetime.strptime(sessao_data['data'], "%d/%m/%Y")
+        except ValueError as e:
+            raise ValueError(f"Data inválida na sessão do dia {sessao_data['data']}: {e}") from e
+        publico = sessao_data['publico']
+        sessoes.append({
+            "Dia": DIAS_SEMANA_PT[data_sessao_dt.weekday()],
+            "Data": data_sessao_dt.strftime("%d/%m/%Y"),
+            "Nome_do_Evento": nome_evento,
+            "Sala": sala,
+            "Publico_PCG": publico['pcg'],
+            "Publico_Comerciario": publico['com'],
+            "Publico_Adversos": publico['adv'],
+            "PCG_COM": publico['pcg'] + publico['com'],
+            "Total": publico['pcg'] + publico['com'] + publico['adv'],
+            "Observacoes": observacoes
+        })
+    return sessoes
+
+def total_calculado(dados_extraidos):
+    """Soma o público de todas as sessões extraídas (para conferir com o total do PDF)."""
+    return sum(s['publico']['pcg'] + s['publico']['com'] + s['publico']['adv']
+               for s in dados_extraidos.get("sessoes", []))
+
+def listar_pdfs(pasta):
+    """Lista, em ordem alfabética, os caminhos dos PDFs de uma pasta (sem subpastas)."""
+    return sorted(
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if nome.lower().endswith(".pdf") and os.path.isfile(os.path.join(pasta, nome))
+    )
+
+def _processar_arquivo(caminho_pdf):
+    """Tarefa de um processo do pool: nunca lança exceção, devolve o erro como texto."""
+    try:
+        dados = processar_pdf(caminho_pdf)
+        if not dados.get("sessoes"):
+            return caminho_pdf, None, "Nenhuma sessão válida encontrada no PDF."
+        return caminho_pdf, dados, None
+    except Exception as e:
+        return caminho_pdf, None, str(e)
+
+def processar_pdfs(caminhos, max_workers=None, db=None):
+    """
+    Lê vários PDFs em paralelo (um processo por núcleo).
+    Retorna uma lista de ResultadoPdf na ordem dos caminhos: um arquivo com erro não interrompe os demais.
+    Com `db`, os PDFs já presentes no cache não são lidos de novo, os novos entram no cache e
+    `importado_em` informa se o PDF já foi importado.
+    """
+    caminhos = list(caminhos)
+    resultados = {}
+    hashes = {}
+    for caminho in caminhos:
+        if db is None:
+            hashes[caminho] = None
+            continue
+        try:
+            hashes[caminho] = hash_pdf(caminho)
+        except OSError as e:
+            resultados[caminho] = ResultadoPdf(caminho, None, str(e), None, None)
+            continue
+        cache = db.buscar_cache_pdf(hashes[caminho])
+        if cache is not None:
+            resultados[caminho] = ResultadoPdf(caminho, cache["dados"], None, hashes[caminho],
+                                               db.buscar_importacao_pdf(hashes[caminho]))
+
+    pendentes = [c for c in caminhos if c not in resultados]
+    if len(pendentes) <= 1:
+        lidos = [_processar_arquivo(c) for c in pendentes]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            lidos = list(pool.map(_processar_arquivo, pendentes))
+
+    for caminho, dados, erro in lidos:
+        importado_em = None
+        if db is not None:
+            if dados is not None:
+                db.guardar_cache_pdf(hashes[caminho], os.path.basename(caminho), dados)
+            importado_em = db.buscar_importacao_pdf(hashes[caminho])
+        resultados[caminho] = ResultadoPdf(caminho, dados, erro, hashes[caminho], importado_em)
+    return [resultados[c] for c in caminhos]
+
+def importar_pdfs(caminhos, escolher_sala, db, max_workers=None, reimportar=False):
+    """
+    Lê os PDFs (em paralelo) e grava as sessões de todos numa única transação.
+    `escolher_sala(resultado)` recebe o ResultadoPdf e devolve a sala, ou None para deixar o arquivo de fora.
+    PDFs já importados antes são pulados (e listados nos erros), a menos que `reimportar` seja True;
+    o caminho de cada um fica registrado com a data da importação original, para que o arquivo
+    seja reconhecido sem nova leitura (ver MonitorPasta).
+    Retorna (quantidade de sessões gravadas, lista de (arquivo, erro)).
+    """
+    sessoes = []
+    erros = []
+    importados = []
+    repetidos = []
+    for resultado in processar_pdfs(caminhos, max_workers, db):
+        if resultado.erro:
+            erros.append((resultado.caminho, resultado.erro))
+            continue
+        if resultado.importado_em and not reimportar:
+            erros.append((resultado.caminho, f"já importado em {formatar_data_importacao(resultado.importado_em)}"))
+            repetidos.append(resultado)
+            continue
+        sala = escolher_sala(resultado)
+        if not sala:
+            erros.append((resultado.caminho, "nenhuma sala definida para este arquivo"))
+            continue
+        try:
+            sessoes.extend(montar_sessoes(resultado.dados, sala))
+        except ValueError as e:
+            erros.append((resultado.caminho, str(e)))
+            continue
+        importados.append(resultado)
+
+    with db.transacao():
+        gravadas = db.adicionar_sessoes_em_lote(sessoes)
+        for resultado in importados:
+            marcar_importado(db, resultado.hash, resultado.caminho)
+        for resultado in repetidos:
+            marcar_importado(db, resultado.hash, resultado.caminho, resultado.importado_em)
+    return gravadas, erros
+
+def importar_pasta(pasta, sala, db, max_workers=None, reimportar=False):
+    """Importa todos os PDFs da pasta para a mesma sala (ver importar_pdfs)."""
+    return importar_pdfs(listar_pdfs(pasta), lambda resultado: sala, db, max_workers, reimportar)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa todos os borderôs (PDF) de uma pasta.")
+    parser.add_argument("pasta", help="Pasta com os PDFs de borderô.")
+    parser.add_argument("--sala", required=True, choices=["Arena", "Multiuso", "Mezanino"],
+                        help="Sala em que os eventos foram realizados.")
+    parser.add_argument("--banco", default="gestao_espetaculos.db", help="Arquivo do banco SQLite.")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos (padrão: um por núcleo).")
+    parser.add_argument("--reimportar", action="store_true", help="Importa também os PDFs que já foram importados antes.")
+    args = parser.parse_args()
+
+    db = Database(args.banco)
+    db.criar_tabela()
+    gravadas, erros = importar_pasta(args.pasta, args.sala, db, args.processos, args.reimportar)
+    db.fechar()
+    for caminho, erro in erros:
+        print(f"ERRO em '{os.path.basename(caminho)}': {erro}")
+    print(f"{gravadas} sessões importadas de '{args.pasta}'.")
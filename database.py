@@ -1,137 +1,1169 @@
 # database.py
+import functools
+import hashlib
+import json
+import re
 import sqlite3
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from datetime import datetime
 import pandas as pd
 
+from indice_eventos import IndiceEventos
+
+# Aplicados uma única vez em cada conexão, logo após abri-la.
+PRAGMAS_CONEXAO = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+
+DIAS_SEMANA_PT = {
+    0: "segunda-feira", 1: "terça-feira", 2: "quarta-feira", 3: "quinta-feira",
+    4: "sexta-feira", 5: "sábado", 6: "domingo"
+}
+
+COLUNAS_SESSAO = (
+    "id", "dia_semana", "data", "nome_evento", "sala", "publico_pcg", "publico_comerciario",
+    "publico_adversos", "pcg_com", "total", "observacoes", "data_iso",
+)
+
+# Registro leve de uma linha de sessoes (tupla com nomes, sem __dict__), usado pelos iteradores.
+Sessao = namedtuple("Sessao", COLUNAS_SESSAO)
+
+SQL_SELECT_SESSOES = f"SELECT {', '.join(COLUNAS_SESSAO)} FROM sessoes"
+
+# Chave natural de uma sessão: o mesmo evento não tem duas sessões na mesma data e sala.
+CHAVE_NATURAL_SESSAO = ("nome_evento", "data", "sala")
+_COLUNAS_ATUALIZAVEIS = ("dia_semana", "publico_pcg", "publico_comerciario", "publico_adversos",
+                         "pcg_com", "total", "observacoes", "data_iso")
+
+# Observação gravada nas sessões importadas de borderôs (filtro "importadas via PDF" do histórico).
+OBSERVACAO_IMPORTACAO_PDF = "Importado via PDF"
+
+# Dia da semana de data_iso como o SQLite calcula ('0' = domingo ... '6' = sábado), indexado.
+SQL_DIA_SEMANA = "strftime('%w', data_iso)"
+
+# Inserção idempotente: se a sessão já existe, só atualiza quando algum valor mudou
+# (gravar de novo os mesmos dados não escreve nada nem dispara os triggers).
+SQL_INSERIR_SESSAO = f'''
+    INSERT INTO sessoes (dia_semana, data, nome_evento, sala, publico_pcg, publico_comerciario, publico_adversos, pcg_com, total, observacoes, data_iso)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT({", ".join(CHAVE_NATURAL_SESSAO)}) DO UPDATE SET
+        {", ".join(f"{c} = excluded.{c}" for c in _COLUNAS_ATUALIZAVEIS)}
+    WHERE {" OR ".join(f"sessoes.{c} IS NOT excluded.{c}" for c in _COLUNAS_ATUALIZAVEIS)}
+'''
+
+def data_iso(data):
+    """Converte uma data 'DD/MM/AAAA' para 'AAAA-MM-DD' (ordenável). Retorna None se for inválida."""
+    try:
+        return datetime.strptime(str(data).strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+def _valores_sessao(sessao_data):
+    """Converte o dicionário de uma sessão na tupla de parâmetros do INSERT."""
+    return (
+        sessao_data.get("Dia"), sessao_data.get("Data"), sessao_data.get("Nome_do_Evento"),
+        sessao_data.get("Sala"), sessao_data.get("Publico_PCG"), sessao_data.get("Publico_Comerciario"),
+        sessao_data.get("Publico_Adversos"), sessao_data.get("PCG_COM"), sessao_data.get("Total"),
+        sessao_data.get("Observacoes"), data_iso(sessao_data.get("Data"))
+    )
+
+def hash_arquivo(caminho):
+    """SHA-256 (hexadecimal) do conteúdo de um arquivo, lido em blocos de 1 MB."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def _agora(precisao="seconds"):
+    """Data e hora atuais no formato gravado no banco (AAAA-MM-DD HH:MM:SS[.ffffff])."""
+    return datetime.now().isoformat(sep=" ", timespec=precisao)
+
+#======================================================================
+#======================= MIGRAÇÕES DE ESQUEMA =========================
+#======================================================================
+# Cada migração roda uma única vez; a versão aplicada fica em PRAGMA user_version.
+
+def _migracao_data_iso(cursor):
+    """Adiciona a coluna data_iso (AAAA-MM-DD), preenche a partir de 'data' e a indexa."""
+    colunas = {row[1] for row in cursor.execute("PRAGMA table_info(sessoes)")}
+    if "data_iso" not in colunas:
+        cursor.execute("ALTER TABLE sessoes ADD COLUMN data_iso TEXT")
+    linhas = cursor.execute("SELECT id, data FROM sessoes").fetchall()
+    cursor.executemany("UPDATE sessoes SET data_iso = ? WHERE id = ?",
+                       [(data_iso(data), sessao_id) for sessao_id, data in linhas])
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_data_iso ON sessoes(data_iso)")
+
+def _migracao_busca_textual(cursor):
+    """Cria índices para os filtros exatos e o índice FTS5 (sem acentos) de nome_evento/observacoes."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_sala ON sessoes(sala, data_iso)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_nome_evento ON sessoes(nome_evento)")
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS sessoes_fts USING fts5(
+                nome_evento, observacoes,
+                content='sessoes', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite compilado sem FTS5: a busca por nome continua funcionando via LIKE.
+        return
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS sessoes_fts_ai AFTER INSERT ON sessoes BEGIN
+            INSERT INTO sessoes_fts(rowid, nome_evento, observacoes)
+            VALUES (new.id, new.nome_evento, new.observacoes);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS sessoes_fts_ad AFTER DELETE ON sessoes BEGIN
+            INSERT INTO sessoes_fts(sessoes_fts, rowid, nome_evento, observacoes)
+            VALUES ('delete', old.id, old.nome_evento, old.observacoes);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS sessoes_fts_au AFTER UPDATE OF nome_evento, observacoes ON sessoes BEGIN
+            INSERT INTO sessoes_fts(sessoes_fts, rowid, nome_evento, observacoes)
+            VALUES ('delete', old.id, old.nome_evento, old.observacoes);
+            INSERT INTO sessoes_fts(rowid, nome_evento, observacoes)
+            VALUES (new.id, new.nome_evento, new.observacoes);
+        END
+    ''')
+    cursor.execute("INSERT INTO sessoes_fts(sessoes_fts) VALUES ('rebuild')")
+
+def _chave_resumo(linha):
+    """Expressões (ano, mes, sala, dia_semana) da chave do resumo para uma linha de sessoes ('new', 'old' ou 'sessoes')."""
+    return (
+        f"CAST(substr({linha}.data_iso, 1, 4) AS INTEGER)",
+        f"CAST(substr({linha}.data_iso, 6, 2) AS INTEGER)",
+        f"COALESCE(CASE {linha}.sala WHEN 'Sala Multiuso' THEN 'Multiuso' ELSE {linha}.sala END, '')",
+        f"CAST(strftime('%w', {linha}.data_iso) AS INTEGER)",
+    )
+
+def _sql_somar_no_resumo(linha, sinal):
+    """INSERT ... ON CONFLICT que soma (sinal '+') ou subtrai (sinal '-') uma linha de sessoes no resumo."""
+    ano, mes, sala, dia = _chave_resumo(linha)
+    return f'''
+        INSERT INTO resumo_publico (ano, mes, sala, dia_semana, sessoes, pcg, com, adv, total)
+        VALUES ({ano}, {mes}, {sala}, {dia}, {sinal}1,
+                {sinal}COALESCE({linha}.publico_pcg, 0), {sinal}COALESCE({linha}.publico_comerciario, 0),
+                {sinal}COALESCE({linha}.publico_adversos, 0), {sinal}COALESCE({linha}.total, 0))
+        ON CONFLICT (ano, mes, sala, dia_semana) DO UPDATE SET
+            sessoes = sessoes + excluded.sessoes, pcg = pcg + excluded.pcg, com = com + excluded.com,
+            adv = adv + excluded.adv, total = total + excluded.total;
+    '''
+
+SQL_LIMPAR_RESUMO_VAZIO = "DELETE FROM resumo_publico WHERE sessoes <= 0;"
+
+def _reconstruir_resumo(cursor):
+    """Recalcula todo o resumo_publico a partir da tabela sessoes."""
+    ano, mes, sala, dia = _chave_resumo("sessoes")
+    cursor.execute("DELETE FROM resumo_publico")
+    cursor.execute(f'''
+        INSERT INTO resumo_publico (ano, mes, sala, dia_semana, sessoes, pcg, com, adv, total)
+        SELECT {ano}, {mes}, {sala}, {dia}, COUNT(*),
+               COALESCE(SUM(publico_pcg), 0), COALESCE(SUM(publico_comerciario), 0),
+               COALESCE(SUM(publico_adversos), 0), COALESCE(SUM(total), 0)
+        FROM sessoes WHERE data_iso IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    ''')
+
+def _migracao_resumo_publico(cursor):
+    """Cria o resumo de público (ano × mês × sala × dia da semana) mantido por triggers sobre sessoes."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_publico (
+            ano INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            sala TEXT NOT NULL,
+            dia_semana INTEGER NOT NULL,
+            sessoes INTEGER NOT NULL,
+            pcg INTEGER NOT NULL,
+            com INTEGER NOT NULL,
+            adv INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (ano, mes, sala, dia_semana)
+        ) WITHOUT ROWID
+    ''')
+    colunas_resumidas = "data_iso, sala, publico_pcg, publico_comerciario, publico_adversos, total"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS resumo_publico_ai AFTER INSERT ON sessoes
+        WHEN new.data_iso IS NOT NULL BEGIN
+            {_sql_somar_no_resumo("new", "+")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS resumo_publico_ad AFTER DELETE ON sessoes
+        WHEN old.data_iso IS NOT NULL BEGIN
+            {_sql_somar_no_resumo("old", "-")}
+            {SQL_LIMPAR_RESUMO_VAZIO}
+        END
+    ''')
+    # Uma atualização é "tira a linha antiga, põe a nova"; cada metade só vale se tiver data.
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS resumo_publico_au_antiga AFTER UPDATE OF {colunas_resumidas} ON sessoes
+        WHEN old.data_iso IS NOT NULL BEGIN
+            {_sql_somar_no_resumo("old", "-")}
+            {SQL_LIMPAR_RESUMO_VAZIO}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS resumo_publico_au_nova AFTER UPDATE OF {colunas_resumidas} ON sessoes
+        WHEN new.data_iso IS NOT NULL BEGIN
+            {_sql_somar_no_resumo("new", "+")}
+        END
+    ''')
+    _reconstruir_resumo(cursor)
+
+def _migracao_cache_pdf(cursor):
+    """Cria o cache de PDFs de borderô já lidos, endereçado pelo hash do conteúdo do arquivo."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_pdf (
+            hash TEXT PRIMARY KEY,
+            nome_arquivo TEXT,
+            resultado_json TEXT NOT NULL,
+            importado_em TEXT,
+            acessado_em TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_pdf_acesso ON cache_pdf(acessado_em)")
+
+def _migracao_chave_natural(cursor):
+    """
+    Mescla as sessões duplicadas (mesmo evento, data e sala), mantendo a gravada por último,
+    e cria o índice único da chave natural. As linhas descartadas ficam em sessoes_duplicadas.
+    Retorna a quantidade de sessões mescladas.
+    """
+    chave = ", ".join(CHAVE_NATURAL_SESSAO)
+    colunas = ", ".join(COLUNAS_SESSAO)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS sessoes_duplicadas AS
+        SELECT {colunas}, 0 AS mantida_id, '' AS mesclada_em FROM sessoes WHERE 0
+    ''')
+    cursor.execute(f'''
+        CREATE TEMP TABLE sessoes_a_mesclar AS
+        SELECT id, MAX(id) OVER (PARTITION BY {chave}) AS mantida_id FROM sessoes
+        WHERE ({chave}) IN (SELECT {chave} FROM sessoes GROUP BY {chave} HAVING COUNT(*) > 1)
+    ''')
+    cursor.execute("DELETE FROM sessoes_a_mesclar WHERE id = mantida_id")
+    cursor.execute(f'''
+        INSERT INTO sessoes_duplicadas
+        SELECT {", ".join(f"s.{c}" for c in COLUNAS_SESSAO)}, m.mantida_id, ?
+        FROM sessoes s JOIN sessoes_a_mesclar m ON m.id = s.id
+    ''', (_agora(),))
+    removidas = cursor.execute("DELETE FROM sessoes WHERE id IN (SELECT id FROM sessoes_a_mesclar)").rowcount
+    cursor.execute("DROP TABLE sessoes_a_mesclar")
+
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_sessoes_chave_natural ON sessoes({chave})")
+    # O índice único começa por nome_evento e já atende às buscas por evento.
+    cursor.execute("DROP INDEX IF EXISTS idx_sessoes_nome_evento")
+    return removidas
+
+def _migracao_filtros_historico(cursor):
+    """Índices dos filtros de dia da semana, faixa de público e sessões importadas de PDF."""
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sessoes_dia_semana ON sessoes({SQL_DIA_SEMANA}, data_iso)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_total ON sessoes(total)")
+    # Índice parcial: só as sessões importadas entram nele. A condição precisa aparecer literal
+    # na consulta (não como parâmetro) para o SQLite usá-lo.
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_sessoes_importadas_pdf ON sessoes(data_iso)
+        WHERE observacoes = '{OBSERVACAO_IMPORTACAO_PDF}'
+    ''')
+
+def _sql_marcar_ano_alterado(linha):
+    """UPSERT que soma 1 à versão do ano de uma linha de sessoes ('new' ou 'old') em versao_anos."""
+    return f'''
+        INSERT INTO versao_anos (ano, versao) VALUES (substr({linha}.data_iso, 1, 4), 1)
+        ON CONFLICT (ano) DO UPDATE SET versao = versao + 1;
+    '''
+
+def _migracao_versao_anos(cursor):
+    """
+    Cria versao_anos: um contador de alterações por ano, mantido por triggers sobre sessoes.
+    A exportação incremental compara esses contadores com os da última exportação.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versao_anos (
+            ano TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO versao_anos (ano, versao)
+        SELECT DISTINCT substr(data_iso, 1, 4), 1 FROM sessoes WHERE data_iso IS NOT NULL
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS versao_anos_ai AFTER INSERT ON sessoes
+        WHEN new.data_iso IS NOT NULL BEGIN
+            {_sql_marcar_ano_alterado("new")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS versao_anos_ad AFTER DELETE ON sessoes
+        WHEN old.data_iso IS NOT NULL BEGIN
+            {_sql_marcar_ano_alterado("old")}
+        END
+    ''')
+    # Qualquer coluna muda o conteúdo exportado; uma sessão que muda de ano altera os dois anos.
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS versao_anos_au_antiga AFTER UPDATE ON sessoes
+        WHEN old.data_iso IS NOT NULL BEGIN
+            {_sql_marcar_ano_alterado("old")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS versao_anos_au_nova AFTER UPDATE ON sessoes
+        WHEN new.data_iso IS NOT NULL AND substr(new.data_iso, 1, 4) IS NOT substr(old.data_iso, 1, 4) BEGIN
+            {_sql_marcar_ano_alterado("new")}
+        END
+    ''')
+
+# Soma 1 ao contador de alterações de sessoes (ver _migracao_versao_sessoes).
+SQL_MARCAR_ALTERACAO = "UPDATE versao_sessoes SET versao = versao + 1 WHERE id = 1;"
+
+def _migracao_versao_sessoes(cursor):
+    """
+    Cria versao_sessoes: um contador (linha única) somado pelos triggers a cada alteração em sessoes.
+    O cache de consultas compara esse valor, e não PRAGMA data_version, que não tem referência numa
+    conexão recém-aberta e também muda com escritas que não afetam as consultas (ex.: cache_pdf).
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versao_sessoes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO versao_sessoes (id, versao) VALUES (1, 0)")
+    for sufixo, evento in (("ai", "INSERT"), ("ad", "DELETE"), ("au", "UPDATE")):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS versao_sessoes_{sufixo} AFTER {evento} ON sessoes BEGIN
+                {SQL_MARCAR_ALTERACAO}
+            END
+        ''')
+
+def _migracao_pdfs_importados(cursor):
+    """
+    Cria pdfs_importados, o registro permanente dos borderôs já importados (nunca descartado,
+    ao contrário de cache_pdf, cujo importado_em deixa de ser usado). O caminho, o tamanho e a
+    data de modificação permitem reconhecer um arquivo já importado sem ler de novo o conteúdo.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pdfs_importados (
+            id INTEGER PRIMARY KEY,
+            hash TEXT NOT NULL,
+            caminho TEXT UNIQUE,
+            tamanho INTEGER,
+            mtime_ns INTEGER,
+            importado_em TEXT NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdfs_importados_hash ON pdfs_importados(hash, importado_em)")
+    cursor.execute('''
+        INSERT INTO pdfs_importados (hash, importado_em)
+        SELECT hash, importado_em FROM cache_pdf WHERE importado_em IS NOT NULL
+    ''')
+
+# Migrações de esquema, em ordem. A que mescla sessões duplicadas retorna quantas foram mescladas.
+MIGRACOES = [
+    _migracao_data_iso,
+    _migracao_busca_textual,
+    _migracao_resumo_publico,
+    _migracao_cache_pdf,
+    _migracao_chave_natural,
+    _migracao_filtros_historico,
+    _migracao_versao_anos,
+    _migracao_versao_sessoes,
+    _migracao_pdfs_importados,
+]
+
+# Máximo de PDFs guardados em cache_pdf; acima disso os menos usados recentemente são descartados.
+LIMITE_CACHE_PDF = 500
+
+# Colunas pelas quais o histórico pode ser ordenado (nome -> expressão SQL); o id desempata.
+ORDENACOES_HISTORICO = {
+    "data": "data_iso",
+    "dia": SQL_DIA_SEMANA,
+    "evento": "nome_evento",
+    "sala": "sala",
+    "pcg": "publico_pcg",
+    "com": "publico_comerciario",
+    "adv": "publico_adversos",
+    "total": "total",
+}
+
+# Ordenações cuja coluna tem índice próprio: seguem de uma página à outra por keyset (`apos`).
+ORDENACOES_KEYSET = ("data", "total")
+
+# Dimensões aceitas por Database.agregar_publico (nome -> expressão SQL sobre resumo_publico).
+DIMENSOES_AGREGACAO = {
+    "ano": "ano",
+    "mes": "mes",
+    "semestre": "CASE WHEN mes <= 6 THEN 1 ELSE 2 END",
+    "dia_semana": "dia_semana",  # 0 = domingo ... 6 = sábado
+    "sala": "sala",
+}
+
+def _expressao_fts(texto):
+    """Transforma o texto digitado numa expressão MATCH do FTS5 (cada palavra vira um prefixo)."""
+    return " ".join(f'"{termo}"*' for termo in re.findall(r"\w+", texto))
+
+#======================================================================
+#======================= CACHE DE CONSULTAS ===========================
+#======================================================================
+# Resultados de consultas de leitura ficam em memória até a próxima escrita no banco.
+
+# Memória máxima (aproximada, em bytes) ocupada pelos resultados em cache; 0 desliga o cache.
+LIMITE_CACHE_CONSULTAS = 32 * 1024 * 1024
+
+def _tamanho_aproximado(valor):
+    """Estimativa da memória ocupada por um resultado (DataFrame, listas, tuplas, dicionários)."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    tamanho = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        return tamanho + sum(_tamanho_aproximado(k) + _tamanho_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return tamanho + sum(_tamanho_aproximado(item) for item in valor)
+    return tamanho
+
+def _copiar_resultado(valor):
+    """Cópia entregue a quem chamou, para que alterá-la não estrague o que está em cache."""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy()
+    if isinstance(valor, dict):
+        return dict(valor)
+    if isinstance(valor, list):
+        return [dict(item) if isinstance(item, dict) else item for item in valor]
+    return valor  # tuplas, números e textos são imutáveis
+
+def _consulta_em_cache(metodo):
+    """
+    Guarda o resultado do método no cache do Database, pela combinação de nome e parâmetros.
+    A entrada só vale enquanto a versão dos dados não mudar (qualquer alteração em sessoes a incrementa).
+    """
+    @functools.wraps(metodo)
+    def consultar(self, *args, **kwargs):
+        if not self.limite_cache:
+            return metodo(self, *args, **kwargs)
+        conn = self._conectar()
+        if conn.in_transaction:
+            # Dentro de uma transação a leitura pode ver dados ainda não confirmados.
+            return metodo(self, *args, **kwargs)
+        try:
+            chave = (metodo.__name__, args, tuple(sorted(kwargs.items())))
+            hash(chave)
+        except TypeError:  # parâmetro não hashable (ex.: lista): consulta direto
+            return metodo(self, *args, **kwargs)
+
+        versao = self._versao_atual(conn)
+        with self._lock_cache:
+            entrada = self._cache.get(chave)
+            if entrada is not None and entrada[0] == versao:
+                self._cache.move_to_end(chave)
+                self._acertos_cache += 1
+                return _copiar_resultado(entrada[1])
+            self._falhas_cache += 1
+
+        valor = metodo(self, *args, **kwargs)
+        self._guardar_no_cache(chave, versao, valor)
+        return _copiar_resultado(valor)
+    return consultar
+
 class Database:
-    def __init__(self, db_name="gestao_espetaculos.db"):
+    def __init__(self, db_name="gestao_espetaculos.db", limite_cache=LIMITE_CACHE_CONSULTAS):
         self.db_name = db_name
+        # Uma conexão por thread: a thread principal (Tk) e as threads de trabalho
+        # (ex.: geração de gráficos) nunca compartilham a mesma conexão.
+        self._conexoes = {}
+        self._lock_conexoes = threading.Lock()
+        self._tem_fts = None
+        # Cache de consultas: chave -> (versão dos dados, resultado, tamanho), em ordem de uso (LRU).
+        self.limite_cache = limite_cache
+        self._cache = OrderedDict()
+        self._lock_cache = threading.Lock()
+        self._bytes_cache = 0
+        self._acertos_cache = 0
+        self._falhas_cache = 0
+        # Incrementada sempre que o contador versao_sessoes do banco muda, seja por escrita
+        # deste objeto ou de outra conexão (outro Database, outro processo).
+        self._versao_dados = 0
+        self._versao_sessoes = None  # último valor de versao_sessoes visto
+        # Nomes de evento para as sugestões; montado na primeira consulta e mantido a cada escrita.
+        self._indice_eventos = None
+        self._indice_desatualizado = False
+        self._lock_indice = threading.Lock()
 
     def _conectar(self):
-        """Cria e retorna uma nova conexão com o banco de dados."""
-        conn = sqlite3.connect(self.db_name)
+        """Retorna a conexão da thread atual, abrindo e configurando-a na primeira chamada."""
+        thread = threading.current_thread()
+        conn = self._conexoes.get(thread)
+        if conn is not None:
+            return conn
+
+        conn = sqlite3.connect(self.db_name, isolation_level=None, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS_CONEXAO:
+            conn.execute(pragma)
+
+        with self._lock_conexoes:
+            # Libera conexões de threads que já terminaram antes de registrar a nova.
+            for t in [t for t in self._conexoes if not t.is_alive()]:
+                self._conexoes.pop(t).close()
+            self._conexoes[thread] = conn
         return conn
 
-    def criar_tabela(self):
-        """Cria a tabela de sessoes se ela não existir."""
+    def fechar(self):
+        """Fecha todas as conexões abertas por este objeto."""
+        with self._lock_conexoes:
+            for conn in self._conexoes.values():
+                conn.close()
+            self._conexoes.clear()
+        self.limpar_cache()
+
+    def interromper(self, thread):
+        """
+        Aborta a consulta que a conexão de `thread` estiver executando (ela recebe
+        sqlite3.OperationalError "interrupted"). Sem consulta em andamento, não faz nada.
+        """
+        with self._lock_conexoes:
+            conn = self._conexoes.get(thread)
+        if conn is not None:
+            conn.interrupt()
+
+    @contextmanager
+    def transacao(self):
+        """
+        Abre uma transação explícita e entrega um cursor.
+        Confirma tudo ao sair do bloco ou desfaz tudo se ocorrer um erro.
+        Chamadas aninhadas participam da transação mais externa.
+        """
         conn = self._conectar()
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sessoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                dia_semana TEXT,
-                data TEXT,
-                nome_evento TEXT,
-                sala TEXT,
-                publico_pcg INTEGER,
-                publico_comerciario INTEGER,
-                publico_adversos INTEGER,
-                pcg_com INTEGER,
-                total INTEGER,
-                observacoes TEXT
-            )
-        ''')
+        if conn.in_transaction:
+            yield conn.cursor()
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        inicio = self._ler_versao_sessoes(conn)
+        try:
+            yield conn.cursor()
+            fim = self._ler_versao_sessoes(conn)
+        except BaseException:
+            conn.rollback()
+            self._indice_desatualizado = True  # pode ter recebido nomes que não foram gravados
+            raise
         conn.commit()
-        conn.close()
+        self._dados_alterados(inicio, fim)
+
+    @staticmethod
+    def _ler_versao_sessoes(conn):
+        """Valor atual do contador versao_sessoes (None antes da migração que o cria)."""
+        try:
+            return conn.execute("SELECT versao FROM versao_sessoes WHERE id = 1").fetchone()[0]
+        except (sqlite3.OperationalError, TypeError):
+            return None
+
+    def _dados_alterados(self, inicio, fim):
+        """
+        Registra o contador de sessoes após uma transação deste objeto (`inicio` e `fim`: valores lidos
+        dentro dela). Se mudou, o cache de consultas deixa de valer; se já tinha mudado antes de ela
+        começar, outra conexão alterou o banco e o índice de nomes de evento precisa ser refeito.
+        """
+        with self._lock_cache:
+            if inicio != self._versao_sessoes:
+                self._indice_desatualizado = True
+            if fim != self._versao_sessoes:
+                self._versao_sessoes = fim
+                self._versao_dados += 1
+
+    def _versao_atual(self, conn):
+        """
+        Versão dos dados para o cache. Lê o contador versao_sessoes, que os triggers somam a cada
+        alteração em sessoes feita por qualquer conexão (outra thread, outro Database ou outro
+        processo, como o monitor de pasta), inclusive numa conexão que acabou de ser aberta.
+        """
+        versao_sessoes = self._ler_versao_sessoes(conn)
+        with self._lock_cache:
+            if versao_sessoes != self._versao_sessoes:
+                if self._versao_sessoes is not None:
+                    self._indice_desatualizado = True  # outra conexão pode ter mudado os nomes de evento
+                self._versao_sessoes = versao_sessoes
+                self._versao_dados += 1
+            return self._versao_dados
+
+    def _guardar_no_cache(self, chave, versao, valor):
+        tamanho = _tamanho_aproximado(valor)
+        if tamanho > self.limite_cache // 4:
+            return  # resultados enormes expulsariam todo o resto
+        with self._lock_cache:
+            if versao != self._versao_dados:
+                return  # houve escrita enquanto a consulta rodava
+            anterior = self._cache.pop(chave, None)
+            if anterior is not None:
+                self._bytes_cache -= anterior[2]
+            self._cache[chave] = (versao, valor, tamanho)
+            self._bytes_cache += tamanho
+            while self._bytes_cache > self.limite_cache:
+                _, (_, _, descartado) = self._cache.popitem(last=False)
+                self._bytes_cache -= descartado
+
+    def indice_eventos(self):
+        """
+        Índice em memória dos nomes de evento distintos, montado com uma consulta na primeira chamada.
+        Se outra conexão alterou o banco, o índice é refeito numa thread à parte e o atual continua
+        respondendo até o novo ficar pronto.
+        """
+        indice = self._indice_eventos
+        if indice is None:
+            return self._montar_indice_eventos()
+        if self._indice_desatualizado and not self._lock_indice.locked():
+            threading.Thread(target=self._montar_indice_eventos, daemon=True).start()
+        return indice
+
+    def _montar_indice_eventos(self):
+        with self._lock_indice:
+            if self._indice_eventos is None or self._indice_desatualizado:
+                self._indice_desatualizado = False
+                cursor = self._cursor_tuplas()
+                nomes = [row[0] for row in cursor.execute("SELECT DISTINCT nome_evento FROM sessoes")]
+                cursor.close()
+                self._indice_eventos = IndiceEventos(nomes)
+            return self._indice_eventos
+
+    def sugerir_eventos(self, prefixo, limite=10):
+        """Nomes de evento com alguma palavra começando por `prefixo` (sem acentos nem maiúsculas)."""
+        return self.indice_eventos().sugerir(prefixo, limite)
+
+    def _evento_tem_sessoes(self, cursor, nome_evento):
+        return cursor.execute("SELECT 1 FROM sessoes WHERE nome_evento = ? LIMIT 1", (nome_evento,)).fetchone() is not None
+
+    def limpar_cache(self):
+        """Esvazia o cache de consultas (as estatísticas continuam)."""
+        with self._lock_cache:
+            self._cache.clear()
+            self._bytes_cache = 0
+
+    def estatisticas_cache(self):
+        """Acertos, falhas, taxa de acerto, entradas e memória (bytes) do cache de consultas."""
+        with self._lock_cache:
+            consultas = self._acertos_cache + self._falhas_cache
+            return {
+                "acertos": self._acertos_cache,
+                "falhas": self._falhas_cache,
+                "taxa_acerto": self._acertos_cache / consultas if consultas else 0.0,
+                "entradas": len(self._cache),
+                "bytes": self._bytes_cache,
+                "limite_bytes": self.limite_cache,
+            }
+
+    def criar_tabela(self):
+        """
+        Cria a tabela de sessoes se ela não existir e aplica as migrações pendentes.
+        Retorna a quantidade de sessões duplicadas mescladas nesta execução (cópias em sessoes_duplicadas).
+        """
+        with self.transacao() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sessoes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dia_semana TEXT,
+                    data TEXT,
+                    nome_evento TEXT,
+                    sala TEXT,
+                    publico_pcg INTEGER,
+                    publico_comerciario INTEGER,
+                    publico_adversos INTEGER,
+                    pcg_com INTEGER,
+                    total INTEGER,
+                    observacoes TEXT
+                )
+            ''')
+            mescladas = self._aplicar_migracoes(cursor)
+        self._tem_fts = None
+        return mescladas
+
+    def _busca_textual_disponivel(self):
+        """Indica se o índice FTS5 de sessões existe neste banco."""
+        if self._tem_fts is None:
+            self._tem_fts = self._conectar().execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sessoes_fts'"
+            ).fetchone() is not None
+        return self._tem_fts
+
+    def _aplicar_migracoes(self, cursor):
+        """Aplica, em ordem, as migrações de esquema ainda não aplicadas. Retorna as sessões mescladas."""
+        versao = cursor.execute("PRAGMA user_version").fetchone()[0]
+        mescladas = 0
+        for numero, migracao in enumerate(MIGRACOES[versao:], start=versao + 1):
+            mescladas += migracao(cursor) or 0
+            cursor.execute(f"PRAGMA user_version = {numero}")
+        return mescladas
 
     def adicionar_sessao(self, sessao_data):
         """Adiciona uma nova sessão ao banco de dados."""
-        conn = self._conectar()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO sessoes (dia_semana, data, nome_evento, sala, publico_pcg, publico_comerciario, publico_adversos, pcg_com, total, observacoes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            sessao_data.get("Dia"), sessao_data.get("Data"), sessao_data.get("Nome_do_Evento"),
-            sessao_data.get("Sala"), sessao_data.get("Publico_PCG"), sessao_data.get("Publico_Comerciario"),
-            sessao_data.get("Publico_Adversos"), sessao_data.get("PCG_COM"), sessao_data.get("Total"),
-            sessao_data.get("Observacoes")
-        ))
-        conn.commit()
-        conn.close()
+        self.adicionar_sessoes_em_lote([sessao_data])
+
+    def adicionar_sessoes_em_lote(self, sessoes):
+        """
+        Adiciona várias sessões numa única transação (executemany).
+        Uma sessão que já existe (mesmo evento, data e sala) é atualizada em vez de duplicada.
+        Se qualquer sessão falhar, nenhuma é gravada. Retorna a quantidade de sessões
+        inseridas ou alteradas (as que já estavam idênticas no banco não contam).
+        """
+        valores = [_valores_sessao(sessao_data) for sessao_data in sessoes]
+        if not valores:
+            return 0
+        with self.transacao() as cursor:
+            cursor.executemany(SQL_INSERIR_SESSAO, valores)
+            indice = self._indice_eventos
+            if indice is not None:
+                for nome in {valor[2] for valor in valores}:
+                    indice.adicionar(nome)
+        return cursor.rowcount
+
+    def _cursor_tuplas(self):
+        """Cursor da conexão da thread que devolve tuplas puras (sem sqlite3.Row)."""
+        cursor = self._conectar().cursor()
+        cursor.row_factory = None
+        return cursor
+
+    def _iterar_lotes(self, query, params=(), tamanho_lote=1000):
+        """Executa a consulta e gera listas de até `tamanho_lote` registros Sessao via fetchmany."""
+        cursor = self._cursor_tuplas()
+        try:
+            cursor.execute(query, params)
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    return
+                yield list(map(Sessao._make, linhas))
+        finally:
+            cursor.close()
+
+    def _consultar_dataframe(self, query, params=()):
+        """Executa uma consulta qualquer e devolve o resultado como DataFrame."""
+        cursor = self._cursor_tuplas()
+        cursor.execute(query, params)
+        colunas = [descricao[0] for descricao in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=colunas)
+
+    @staticmethod
+    def _dataframe_sessoes(lotes):
+        """Monta um DataFrame a partir de lotes de Sessao (invólucro fino sobre os iteradores)."""
+        return pd.DataFrame([sessao for lote in lotes for sessao in lote], columns=COLUNAS_SESSAO)
+
+    def iterar_lotes_sessoes(self, filtro_nome="", filtro_sala="", ano_selecionado=None, crescente=False, tamanho_lote=1000, **filtros):
+        """
+        Gera as sessões filtradas em lotes (listas de Sessao), ordenadas por data e id.
+        Memória constante: só um lote fica em memória por vez, qualquer que seja o tamanho do resultado.
+        """
+        conditions, params = self._montar_filtros(filtro_nome, filtro_sala, ano_selecionado, **filtros)
+        query = SQL_SELECT_SESSOES
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        direcao = "ASC" if crescente else "DESC"
+        query += f" ORDER BY data_iso {direcao}, id {direcao}"
+        return self._iterar_lotes(query, params, tamanho_lote)
+
+    def iterar_sessoes(self, filtro_nome="", filtro_sala="", ano_selecionado=None, crescente=False, tamanho_lote=1000, **filtros):
+        """Gera as sessões filtradas uma a uma (Sessao), buscando-as do banco em lotes."""
+        for lote in self.iterar_lotes_sessoes(filtro_nome, filtro_sala, ano_selecionado, crescente, tamanho_lote, **filtros):
+            yield from lote
 
     def buscar_todas_sessoes(self):
         """Busca todas as sessões e retorna como um DataFrame do Pandas."""
-        conn = self._conectar()
-        df = pd.read_sql_query("SELECT * FROM sessoes", conn)
-        conn.close()
-        return df
+        return self._dataframe_sessoes(self._iterar_lotes(SQL_SELECT_SESSOES + " ORDER BY id"))
 
-    def buscar_sessoes_filtradas(self, filtro_nome="", filtro_sala="", ano_selecionado=None):
-        """Busca sessões com base nos filtros fornecidos."""
-        conn = self._conectar()
-        
-        query = "SELECT * FROM sessoes"
+    def _montar_filtros(self, filtro_nome="", filtro_sala="", ano_selecionado=None, data_inicio=None,
+                        data_fim=None, dias_semana=None, total_minimo=None, total_maximo=None, importado_pdf=False):
+        """
+        Monta as condições WHERE (e seus parâmetros) comuns às buscas filtradas do histórico.
+        Além de nome, sala e ano: `data_inicio`/`data_fim` ('AAAA-MM-DD', inclusivas), `dias_semana`
+        (números de 0 = domingo a 6 = sábado), `total_minimo`/`total_maximo` de público e
+        `importado_pdf` (só sessões gravadas a partir de borderôs). Todos usam índices.
+        """
         conditions = []
         params = []
 
         if filtro_nome:
-            conditions.append("nome_evento LIKE ?")
-            params.append(f'%{filtro_nome}%')
-        
+            expressao = _expressao_fts(filtro_nome)
+            if expressao and self._busca_textual_disponivel():
+                conditions.append("id IN (SELECT rowid FROM sessoes_fts WHERE sessoes_fts MATCH ?)")
+                params.append(f"nome_evento : ({expressao})")
+            else:
+                conditions.append("nome_evento LIKE ?")
+                params.append(f'%{filtro_nome}%')
+
         if filtro_sala:
             conditions.append("sala = ?")
             params.append(filtro_sala)
 
         if ano_selecionado:
-            conditions.append("data LIKE ?")
-            params.append(f'%/{ano_selecionado}')
+            # Intervalo sobre data_iso: usa o índice em vez de varrer a tabela com LIKE.
+            conditions.append("data_iso >= ? AND data_iso < ?")
+            params.extend([f'{ano_selecionado}-01-01', f'{int(ano_selecionado) + 1}-01-01'])
 
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+        if data_inicio:
+            conditions.append("data_iso >= ?")
+            params.append(data_inicio)
+        if data_fim:
+            conditions.append("data_iso <= ?")
+            params.append(data_fim)
+
+        if dias_semana:
+            dias = sorted({str(int(dia)) for dia in dias_semana})
+            conditions.append(f"{SQL_DIA_SEMANA} IN ({', '.join('?' * len(dias))})")
+            params.extend(dias)
+
+        # likelihood() avisa o planejador que a faixa é seletiva; sem isso ele prefere percorrer
+        # idx_sessoes_data_iso inteiro só para evitar ordenar, em vez de usar idx_sessoes_total.
+        if total_minimo is not None:
+            conditions.append("likelihood(total >= ?, 0.05)")
+            params.append(int(total_minimo))
+        if total_maximo is not None:
+            conditions.append("likelihood(total <= ?, 0.05)")
+            params.append(int(total_maximo))
+
+        if importado_pdf:
+            # Literal, igual à condição do índice parcial idx_sessoes_importadas_pdf.
+            conditions.append(f"observacoes = '{OBSERVACAO_IMPORTACAO_PDF}'")
+
+        return conditions, params
+
+    @_consulta_em_cache
+    def buscar_sessoes_filtradas(self, filtro_nome="", filtro_sala="", ano_selecionado=None, **filtros):
+        """Busca sessões com base nos filtros fornecidos (os extras são os de _montar_filtros)."""
+        return self._dataframe_sessoes(self.iterar_lotes_sessoes(filtro_nome, filtro_sala, ano_selecionado, **filtros))
+
+    def _sql_pagina(self, filtro_nome="", filtro_sala="", ano_selecionado=None, apos=None, limite=100,
+                    deslocamento=0, ordem="data", crescente=False, **filtros):
+        """Consulta (e parâmetros) de uma página do histórico; ver buscar_pagina_lista."""
+        if ordem not in ORDENACOES_HISTORICO:
+            raise ValueError(f"Ordenação desconhecida: {ordem!r}.")
+        if apos is not None and ordem not in ORDENACOES_KEYSET:
+            raise ValueError(f"A paginação por `apos` não vale para a ordenação {ordem!r}.")
+        conditions, params = self._montar_filtros(filtro_nome, filtro_sala, ano_selecionado, **filtros)
+        conditions.append("data_iso IS NOT NULL")
+        if apos is not None:
+            # Continua exatamente de onde a página anterior parou.
+            conditions.append(f"({ORDENACOES_HISTORICO[ordem]}, id) {'>' if crescente else '<'} (?, ?)")
+            params.extend(apos)
+        direcao = "ASC" if crescente else "DESC"
+        query = (f"{SQL_SELECT_SESSOES} WHERE {' AND '.join(conditions)} "
+                 f"ORDER BY {ORDENACOES_HISTORICO[ordem]} {direcao}, id {direcao} LIMIT ? OFFSET ?")
+        params.extend([limite, 0 if apos is not None else deslocamento])
+        return query, params
+
+    @_consulta_em_cache
+    def buscar_pagina_lista(self, filtro_nome="", filtro_sala="", ano_selecionado=None, apos=None, limite=100,
+                            deslocamento=0, ordem="data", crescente=False, **filtros):
+        """
+        Busca uma página do histórico como lista de Sessao, ordenada pela coluna `ordem`
+        (chave de ORDENACOES_HISTORICO; padrão: mais recentes primeiro) e desempatada pelo id.
+        Nas ordenações de ORDENACOES_KEYSET, `apos` é o par (coluna, id) da última linha da página
+        anterior, ex.: (data_iso, id) (paginação keyset, sem OFFSET); sem `apos`, `deslocamento` pula linhas para ir direto a uma
+        página distante. Só entram sessões com data válida, como no histórico.
+        """
+        query, params = self._sql_pagina(filtro_nome, filtro_sala, ano_selecionado, apos, limite,
+                                         deslocamento, ordem, crescente, **filtros)
+        return [sessao for lote in self._iterar_lotes(query, params, limite) for sessao in lote]
+
+    def buscar_pagina_sessoes(self, filtro_nome="", filtro_sala="", ano_selecionado=None, apos=None, limite=100, **filtros):
+        """Como buscar_pagina_lista, mas devolve um DataFrame."""
+        return self._dataframe_sessoes([self.buscar_pagina_lista(filtro_nome, filtro_sala, ano_selecionado, apos, limite, **filtros)])
 
-        df = pd.read_sql_query(query, conn, params=tuple(params))
-        conn.close()
-        return df
+    def plano_pagina(self, *args, **kwargs):
+        """
+        Plano do SQLite (EXPLAIN QUERY PLAN) para a página de buscar_pagina_lista com os mesmos
+        parâmetros: uma lista com o texto de cada passo, ex.: "SEARCH sessoes USING INDEX ...".
+        """
+        query, params = self._sql_pagina(*args, **kwargs)
+        return [row[3] for row in self._cursor_tuplas().execute(f"EXPLAIN QUERY PLAN {query}", params)]
 
+    @_consulta_em_cache
+    def contar_sessoes_filtradas(self, filtro_nome="", filtro_sala="", ano_selecionado=None, **filtros):
+        """Conta as sessões (com data válida) que atendem aos filtros, sem trazê-las."""
+        conditions, params = self._montar_filtros(filtro_nome, filtro_sala, ano_selecionado, **filtros)
+        conditions.append("data_iso IS NOT NULL")
+        query = f"SELECT COUNT(*) FROM sessoes WHERE {' AND '.join(conditions)}"
+        return self._conectar().execute(query, params).fetchone()[0]
+
+    @_consulta_em_cache
+    def totais_sessoes_filtradas(self, filtro_nome="", filtro_sala="", ano_selecionado=None, **filtros):
+        """Quantidade de sessões (com data válida) e público total que atendem aos filtros."""
+        conditions, params = self._montar_filtros(filtro_nome, filtro_sala, ano_selecionado, **filtros)
+        conditions.append("data_iso IS NOT NULL")
+        query = f"SELECT COUNT(*), COALESCE(SUM(total), 0) FROM sessoes WHERE {' AND '.join(conditions)}"
+        quantidade, publico = self._conectar().execute(query, params).fetchone()
+        return quantidade, int(publico)
+
+    @_consulta_em_cache
+    def contar_sessoes_por_evento(self, filtro_nome="", filtro_sala="", ano_selecionado=None, **filtros):
+        """{nome_evento: quantidade de sessões}, em ordem alfabética, das sessões que atendem aos filtros."""
+        conditions, params = self._montar_filtros(filtro_nome, filtro_sala, ano_selecionado, **filtros)
+        conditions.append("data_iso IS NOT NULL")
+        query = f"SELECT nome_evento, COUNT(*) FROM sessoes WHERE {' AND '.join(conditions)} GROUP BY nome_evento ORDER BY nome_evento"
+        return {nome: quantidade for nome, quantidade in self._conectar().execute(query, params) if nome}
+
+    def buscar_posicao_no_historico(self, sessao_id, filtro_nome="", filtro_sala="", ano_selecionado=None,
+                                    crescente=False, **filtros):
+        """
+        Localiza uma sessão na ordem por data do histórico filtrado (mais recentes primeiro, ou
+        mais antigas com `crescente`). Retorna (Sessao, posição a partir de 0), ou None se ela não
+        atende aos filtros (ou não existe).
+        """
+        conditions, params = self._montar_filtros(filtro_nome, filtro_sala, ano_selecionado, **filtros)
+        conditions.append("data_iso IS NOT NULL")
+        where = " AND ".join(conditions)
+        cursor = self._cursor_tuplas()
+        row = cursor.execute(f"{SQL_SELECT_SESSOES} WHERE {where} AND id = ?", params + [sessao_id]).fetchone()
+        if row is None:
+            return None
+        sessao = Sessao._make(row)
+        posicao = cursor.execute(
+            f"SELECT COUNT(*) FROM sessoes WHERE {where} AND (data_iso, id) {'<' if crescente else '>'} (?, ?)",
+            params + [sessao.data_iso, sessao.id]
+        ).fetchone()[0]
+        return sessao, posicao
+
+    @_consulta_em_cache
+    def buscar_eventos_filtrados(self, filtro_nome="", filtro_sala="", ano_selecionado=None, **filtros):
+        """Lista, em ordem alfabética, os nomes de evento distintos que atendem aos filtros."""
+        conditions, params = self._montar_filtros(filtro_nome, filtro_sala, ano_selecionado, **filtros)
+        conditions.append("data_iso IS NOT NULL")
+        query = f"SELECT DISTINCT nome_evento FROM sessoes WHERE {' AND '.join(conditions)} ORDER BY nome_evento"
+        return [row[0] for row in self._conectar().execute(query, params) if row[0]]
+
+    @_consulta_em_cache
+    def buscar_valores_distintos(self, coluna):
+        """Valores distintos (não nulos) de uma coluna de sessoes, em ordem alfabética."""
+        if coluna not in COLUNAS_SESSAO:
+            raise ValueError(f"Coluna desconhecida: {coluna}")
+        query = f"SELECT DISTINCT {coluna} FROM sessoes WHERE {coluna} IS NOT NULL ORDER BY {coluna}"
+        return [row[0] for row in self._conectar().execute(query)]
+
+    @_consulta_em_cache
+    def pesquisar_sessoes(self, texto, limite=100):
+        """
+        Busca textual (sem acentos, por prefixo de palavra) em nome_evento e observacoes.
+        Retorna as sessões ordenadas por relevância; o nome do evento pesa mais que as observações.
+        """
+        expressao = _expressao_fts(texto)
+        if not expressao:
+            return pd.DataFrame()
+        if not self._busca_textual_disponivel():
+            query = "SELECT * FROM sessoes WHERE nome_evento LIKE ? OR observacoes LIKE ? ORDER BY data_iso DESC LIMIT ?"
+            return self._consultar_dataframe(query, (f'%{texto}%', f'%{texto}%', limite))
+        query = '''
+            SELECT s.*, bm25(sessoes_fts, 10.0, 1.0) AS relevancia
+            FROM sessoes_fts JOIN sessoes s ON s.id = sessoes_fts.rowid
+            WHERE sessoes_fts MATCH ?
+            ORDER BY relevancia, s.data_iso DESC
+            LIMIT ?
+        '''
+        return self._consultar_dataframe(query, (expressao, limite))
+
+    @_consulta_em_cache
     def buscar_anos_disponiveis(self):
-        """Busca todos os anos únicos presentes no banco de dados."""
+        """Busca todos os anos únicos presentes no banco de dados, do mais recente ao mais antigo (lista de str)."""
+        # Salta de ano em ano pelo índice de data_iso (uma busca por ano),
+        # em vez de ler a coluna inteira com DISTINCT.
         conn = self._conectar()
-        query = "SELECT DISTINCT SUBSTR(data, 7, 4) as ano FROM sessoes ORDER BY ano DESC"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+        anos = []
+        limite = "9999"
+        while True:
+            maior = conn.execute("SELECT MAX(data_iso) FROM sessoes WHERE data_iso < ?", (limite,)).fetchone()[0]
+            if not maior:
+                break
+            limite = maior[:4]
+            anos.append(limite)
+        return anos
+
+    @_consulta_em_cache
+    def buscar_versoes_anos(self):
+        """Contador de alterações de cada ano ({'AAAA': versão}); muda sempre que uma sessão do ano muda."""
+        return dict(self._conectar().execute("SELECT ano, versao FROM versao_anos"))
+
+    @_consulta_em_cache
+    def agregar_publico(self, por=(), ano=None, dia_semana=None):
+        """
+        Soma o público agrupado pelas dimensões pedidas (ex.: ("mes", "sala")).
+        Lê do resumo_publico mantido por triggers, então o custo depende do número de grupos,
+        não do número de sessões. Retorna uma lista de dicionários com as dimensões e as medidas
+        'sessoes', 'pcg', 'com', 'adv' e 'total' — uma entrada por grupo.
+        """
+        dimensoes = [(nome, DIMENSOES_AGREGACAO[nome]) for nome in por]
+        colunas = [f"{expr} AS {nome}" for nome, expr in dimensoes] + [
+            "SUM(sessoes) AS sessoes", "SUM(pcg) AS pcg", "SUM(com) AS com",
+            "SUM(adv) AS adv", "SUM(total) AS total",
+        ]
+        conditions = []
+        params = []
+        if ano:
+            conditions.append("ano = ?")
+            params.append(int(ano))
+        if dia_semana is not None:
+            conditions.append("dia_semana = ?")
+            params.append(dia_semana)
+
+        query = f"SELECT {', '.join(colunas)} FROM resumo_publico"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if dimensoes:
+            nomes = ", ".join(nome for nome, _ in dimensoes)
+            query += f" GROUP BY {nomes} ORDER BY {nomes}"
+        else:
+            query += " HAVING SUM(sessoes) > 0"
+        rows = self._conectar().execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def reconstruir_resumo(self):
+        """Recalcula o resumo de público do zero (ex.: após editar o banco por fora do sistema)."""
+        with self.transacao() as cursor:
+            _reconstruir_resumo(cursor)
+            cursor.execute(SQL_MARCAR_ALTERACAO)  # agregar_publico lê o resumo: o cache deixa de valer
+
+    def buscar_cache_pdf(self, hash_pdf):
+        """
+        Procura no cache o resultado da leitura de um PDF pelo hash do conteúdo.
+        Retorna {"nome_arquivo", "dados"} ou None, e marca o acesso (para o LRU).
+        Se o PDF já foi importado é informado à parte, por buscar_importacao_pdf.
+
+        A busca é só leitura; a trava de escrita só é pedida para marcar o acesso de uma entrada
+        encontrada. Se o banco estiver ocupado, a marcação é deixada de lado: ela só ordena o descarte.
+        """
+        row = self._conectar().execute(
+            "SELECT nome_arquivo, resultado_json FROM cache_pdf WHERE hash = ?", (hash_pdf,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            with self.transacao() as cursor:
+                cursor.execute("UPDATE cache_pdf SET acessado_em = ? WHERE hash = ?", (_agora("microseconds"), hash_pdf))
+        except sqlite3.OperationalError:
+            pass
+        return {"nome_arquivo": row[0], "dados": json.loads(row[1])}
+
+    def guardar_cache_pdf(self, hash_pdf, nome_arquivo, dados, limite=LIMITE_CACHE_PDF):
+        """
+        Guarda o resultado da leitura de um PDF e descarta as entradas excedentes, as acessadas
+        há mais tempo primeiro (o registro de importação fica em pdfs_importados e não é afetado).
+        """
+        with self.transacao() as cursor:
+            cursor.execute('''
+                INSERT INTO cache_pdf (hash, nome_arquivo, resultado_json, acessado_em) VALUES (?, ?, ?, ?)
+                ON CONFLICT(hash) DO UPDATE SET
+                    nome_arquivo = excluded.nome_arquivo,
+                    resultado_json = excluded.resultado_json,
+                    acessado_em = excluded.acessado_em
+            ''', (hash_pdf, nome_arquivo, json.dumps(dados, ensure_ascii=False), _agora("microseconds")))
+            cursor.execute('''
+                DELETE FROM cache_pdf WHERE hash IN (
+                    SELECT hash FROM cache_pdf
+                    ORDER BY acessado_em DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (limite,))
+
+    def marcar_pdf_importado(self, hash_pdf, caminho=None, tamanho=None, mtime_ns=None, importado_em=None):
+        """
+        Registra em pdfs_importados que as sessões do PDF foram gravadas. Com o `caminho`, guarda
+        também tamanho e data de modificação do arquivo (ver buscar_pdfs_importados).
+        Retorna a data registrada.
+        """
+        importado_em = importado_em or _agora()
+        with self.transacao() as cursor:
+            cursor.execute('''
+                INSERT INTO pdfs_importados (hash, caminho, tamanho, mtime_ns, importado_em) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(caminho) DO UPDATE SET
+                    hash = excluded.hash, tamanho = excluded.tamanho,
+                    mtime_ns = excluded.mtime_ns, importado_em = excluded.importado_em
+            ''', (hash_pdf, caminho, tamanho, mtime_ns, importado_em))
+        return importado_em
+
+    def buscar_pdfs_importados(self):
+        """Arquivos já registrados em pdfs_importados: {caminho absoluto: (tamanho, mtime_ns)}."""
+        return {
+            row[0]: (row[1], row[2]) for row in self._conectar().execute(
+                "SELECT caminho, tamanho, mtime_ns FROM pdfs_importados WHERE caminho IS NOT NULL")
+        }
+
+    def buscar_importacao_pdf(self, hash_pdf):
+        """Data da última importação do PDF com este hash ('AAAA-MM-DD HH:MM:SS'), ou None se nunca importado."""
+        return self._conectar().execute(
+            "SELECT MAX(importado_em) FROM pdfs_importados WHERE hash = ?", (hash_pdf,)
+        ).fetchone()[0]
 
     def buscar_sessao_por_id(self, sessao_id):
         """Busca uma sessão específica pelo seu ID."""
-        conn = self._conectar()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM sessoes WHERE id = ?", (sessao_id,))
-        row = cursor.fetchone()
-        conn.close()
+        row = self._conectar().execute("SELECT * FROM sessoes WHERE id = ?", (sessao_id,)).fetchone()
         return dict(row) if row else None
 
     def atualizar_sessao(self, sessao_id, dados):
-        """Atualiza os dados de uma sessão existente."""
-        conn = self._conectar()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE sessoes SET
-                nome_evento = ?, data = ?, dia_semana = ?, sala = ?,
-                publico_pcg = ?, publico_comerciario = ?, publico_adversos = ?,
-                pcg_com = ?, total = ?, observacoes = ?
-            WHERE id = ?
-        ''', (
-            dados['Nome do Evento'], dados['Data'], dados['Dia'], dados['Sala'],
-            dados['Publico PCG'], dados['Publico Comerciário'], dados['Publico Adversos'],
-            dados['PCG+COM.'], dados['Total'], dados['Observações'],
-            sessao_id
-        ))
-        conn.commit()
-        conn.close()
+        """
+        Atualiza os dados de uma sessão existente.
+        Lança ValueError se já houver outra sessão do mesmo evento na mesma data e sala.
+        """
+        try:
+            with self.transacao() as cursor:
+                row = cursor.execute("SELECT nome_evento FROM sessoes WHERE id = ?", (sessao_id,)).fetchone()
+                cursor.execute('''
+                    UPDATE sessoes SET
+                        nome_evento = ?, data = ?, dia_semana = ?, sala = ?,
+                        publico_pcg = ?, publico_comerciario = ?, publico_adversos = ?,
+                        pcg_com = ?, total = ?, observacoes = ?, data_iso = ?
+                    WHERE id = ?
+                ''', (
+                    dados['Nome do Evento'], dados['Data'], dados['Dia'], dados['Sala'],
+                    dados['Publico PCG'], dados['Publico Comerciário'], dados['Publico Adversos'],
+                    dados['PCG+COM.'], dados['Total'], dados['Observações'], data_iso(dados['Data']),
+                    sessao_id
+                ))
+                indice = self._indice_eventos
+                if indice is not None and row is not None:
+                    indice.adicionar(dados['Nome do Evento'])
+                    if row[0] != dados['Nome do Evento'] and not self._evento_tem_sessoes(cursor, row[0]):
+                        indice.remover(row[0])
+        except sqlite3.IntegrityError as e:
+            raise ValueError(
+                f"Já existe uma sessão de '{dados['Nome do Evento']}' em {dados['Data']} na sala {dados['Sala']}."
+            ) from e
 
     def excluir_sessao_por_id(self, sessao_id):
         """Exclui uma sessão pelo seu ID."""
-        conn = self._conectar()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM sessoes WHERE id = ?", (sessao_id,))
-        conn.commit()
-        conn.close()
+        with self.transacao() as cursor:
+            row = cursor.execute("SELECT nome_evento FROM sessoes WHERE id = ?", (sessao_id,)).fetchone()
+            cursor.execute("DELETE FROM sessoes WHERE id = ?", (sessao_id,))
+            indice = self._indice_eventos
+            if indice is not None and row is not None and not self._evento_tem_sessoes(cursor, row[0]):
+                indice.remover(row[0])
 
     def excluir_evento_em_lote(self, nome_evento):
         """Exclui todas as sessões de um evento específico."""
-        conn = self._conectar()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM sessoes WHERE nome_evento = ?", (nome_evento,))
-        conn.commit()
-        conn.close()
+        with self.transacao() as cursor:
+            cursor.execute("DELETE FROM sessoes WHERE nome_evento = ?", (nome_evento,))
+            indice = self._indice_eventos
+            if indice is not None:
+                indice.remover(nome_evento)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manutenção do banco de dados de espetáculos.")
+    parser.add_argument("--banco", default="gestao_espetaculos.db", help="Arquivo do banco SQLite.")
+    parser.add_argument("--reconstruir-resumo", action="store_true",
+                        help="Recalcula a tabela resumo_publico a partir das sessões.")
+    args = parser.parse_args()
+
+    db = Database(args.banco)
+    mescladas = db.criar_tabela()
+    if mescladas:
+        print(f"Migração: {mescladas} sessões duplicadas foram mescladas (cópias guardadas em sessoes_duplicadas).")
+    if args.reconstruir_resumo:
+        db.reconstruir_resumo()
+        print("Resumo de público reconstruído com sucesso.")
+    db.fechar()
@@ -0,0 +1,452 @@
+# exportacao.py
+# Exportação das sessões para arquivos, lendo o banco ano a ano em lotes (memória constante).
+# Formatos: planilha Excel (uma aba por ano), CSV, Parquet (uma pasta por ano) e Arrow IPC.
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+import zipfile
+from datetime import date
+from functools import partial
+from operator import attrgetter
+
+from openpyxl import Workbook
+
+from database import Database, hash_arquivo
+
+# Colunas da planilha: (campo de Sessao, cabeçalho na planilha), na ordem das colunas.
+COLUNAS_EXPORTACAO = [
+    ("dia_semana", "Dia"), ("data", "Data"), ("nome_evento", "Nome do Evento"), ("sala", "Sala"),
+    ("publico_pcg", "Publico PCG"), ("publico_comerciario", "Publico Comerciário"),
+    ("publico_adversos", "Publico Adversos"), ("pcg_com", "PCG+COM."), ("total", "Total"),
+    ("observacoes", "Observações"),
+]
+
+# Colunas dos formatos para análise (CSV, Parquet, Arrow): nomes simples e valores tipados.
+# "data" vem de data_iso; os públicos são inteiros (vazio quando não numéricos).
+COLUNAS_TIPADAS = [
+    "id", "data", "dia_semana", "nome_evento", "sala", "publico_pcg", "publico_comerciario",
+    "publico_adversos", "pcg_com", "total", "observacoes",
+]
+COLUNAS_PUBLICO = ("publico_pcg", "publico_comerciario", "publico_adversos", "pcg_com", "total")
+
+# Lote padrão dos formatos colunares: cada lote vira um row group (Parquet) ou record batch (Arrow).
+LOTE_COLUNAR = 50_000
+
+class ExportacaoCancelada(Exception):
+    """Lançada quando o usuário cancela uma exportação entre um lote e outro."""
+
+def iterar_anos(db, progresso=None, cancelar=None, tamanho_lote=1000, reaproveitar=()):
+    """
+    Gera (ano, lotes) do mais antigo ao mais recente; `lotes` gera listas de Sessao em ordem
+    de data. Só um lote fica em memória por vez.
+    Os anos em `reaproveitar` não são lidos do banco: saem como (ano, None), para quem chamou
+    manter o conteúdo da exportação anterior.
+    `progresso(exportadas, total, ano)` é chamado após cada lote; se o evento `cancelar`
+    (threading.Event) for acionado, para antes do lote seguinte com ExportacaoCancelada.
+    """
+    total = db.contar_sessoes_filtradas() - sum(db.contar_sessoes_filtradas(ano_selecionado=ano) for ano in reaproveitar)
+    exportadas = 0
+
+    def lotes_do_ano(ano):
+        nonlocal exportadas
+        for lote in db.iterar_lotes_sessoes(ano_selecionado=ano, crescente=True, tamanho_lote=tamanho_lote):
+            if cancelar is not None and cancelar.is_set():
+                raise ExportacaoCancelada(f"Exportação cancelada em {ano}, após {exportadas} sessões.")
+            yield lote
+            exportadas += len(lote)
+            if progresso is not None:
+                progresso(exportadas, total, ano)
+
+    for ano in reversed(db.buscar_anos_disponiveis()):
+        yield ano, None if ano in reaproveitar else lotes_do_ano(ano)
+
+def _remover(caminho):
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho)
+    elif os.path.exists(caminho):
+        os.remove(caminho)
+
+def _gravar_com_substituicao(caminho, gravar):
+    """
+    Chama `gravar(caminho_temporario)` e só então troca o arquivo (ou a pasta) final, para que
+    uma exportação cancelada ou com erro nunca deixe um resultado pela metade no lugar do anterior.
+    """
+    temporario = f"{caminho}.parcial"
+    _remover(temporario)  # sobra de uma exportação interrompida
+    try:
+        resultado = gravar(temporario)
+        if os.path.isdir(temporario) and os.path.isdir(caminho):
+            # os.replace não substitui uma pasta com conteúdo: a antiga sai do caminho primeiro.
+            antigo = f"{caminho}.antigo"
+            _remover(antigo)
+            os.replace(caminho, antigo)
+            os.replace(temporario, caminho)
+            shutil.rmtree(antigo)
+        else:
+            os.replace(temporario, caminho)
+        return resultado
+    except BaseException:
+        _remover(temporario)
+        raise
+
+def _caminho_estado(caminho):
+    """Arquivo JSON, ao lado do destino, com as versões dos anos gravados na última exportação."""
+    return f"{caminho}.estado.json"
+
+def _ler_estado(db, caminho, formato):
+    """
+    Estado da última exportação para `caminho`, ou None se não houver um utilizável: sem arquivo
+    de estado, outro formato, outro banco ou destino apagado (aí a exportação é completa).
+    """
+    try:
+        with open(_caminho_estado(caminho), encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(estado, dict) or estado.get("formato") != formato
+            or estado.get("banco") != os.path.abspath(db.db_name) or not os.path.exists(caminho)):
+        return None
+    return estado
+
+def _gravar_estado(db, caminho, formato, versoes, **extras):
+    temporario = f"{_caminho_estado(caminho)}.parcial"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"formato": formato, "banco": os.path.abspath(db.db_name), "versoes": versoes, **extras}, f, indent=1)
+    os.replace(temporario, _caminho_estado(caminho))
+
+def _anos_inalterados(estado, versoes):
+    """Anos cuja versão no banco é a mesma registrada na última exportação."""
+    anteriores = estado.get("versoes", {}) if estado else {}
+    return {ano for ano, versao in versoes.items() if anteriores.get(ano) == versao}
+
+def _versoes_para_exportar(db):
+    """Versões ({ano: versão}) dos anos com sessões, lidas antes dos dados: uma alteração feita
+    durante a exportação deixa o ano marcado como alterado para a próxima."""
+    versoes = db.buscar_versoes_anos()
+    return {ano: versoes.get(ano) for ano in db.buscar_anos_disponiveis()}
+
+def _impressao_arquivo(caminho):
+    """Tamanho, data de modificação e SHA-256 do arquivo, para saber se ele mudou depois de gravado."""
+    info = os.stat(caminho)
+    return {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": hash_arquivo(caminho)}
+
+def _arquivo_inalterado(caminho, impressao):
+    """Indica se o arquivo ainda é exatamente o registrado em `impressao` (ver _impressao_arquivo)."""
+    if not isinstance(impressao, dict):
+        return False
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return False
+    if (info.st_size, info.st_mtime_ns) != (impressao.get("tamanho"), impressao.get("mtime_ns")):
+        return False  # evita calcular o hash quando já se sabe que mudou
+    return _impressao_arquivo(caminho) == impressao
+
+# Células com texto compartilhado (t="s") ou com estilo (s="N"): aparecem quando alguém salva a
+# planilha no Excel, e dependem de sharedStrings.xml/styles.xml, que não são copiados.
+PADRAO_ABA_DEPENDENTE = re.compile(rb'\st="s"|\ss="')
+
+def _aba_autocontida(planilha, parte):
+    """Indica se o XML da aba `parte` do pacote aberto `planilha` não usa textos compartilhados nem estilos."""
+    anterior = b""
+    with planilha.open(parte) as entrada:
+        for bloco in iter(lambda: entrada.read(1 << 20), b""):
+            if PADRAO_ABA_DEPENDENTE.search(anterior[-16:] + bloco):
+                return False
+            anterior = bloco
+    return True
+
+def _montar_com_abas_anteriores(base, anterior, destino, copias):
+    """
+    Copia o pacote .xlsx `base` para `destino`, trocando o XML das abas em `copias`
+    (parte nova -> parte antiga) pelo da planilha `anterior`. Funciona porque as abas
+    gravadas em modo write-only são autocontidas (textos inline, sem estilos nem relações).
+    """
+    with zipfile.ZipFile(base) as novo, zipfile.ZipFile(anterior) as antigo, \
+            zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as saida:
+        for item in novo.infolist():
+            origem, nome = (antigo, copias[item.filename]) if item.filename in copias else (novo, item.filename)
+            with origem.open(nome) as entrada, saida.open(item.filename, "w") as parte:
+                shutil.copyfileobj(entrada, parte, 1024 * 1024)
+
+def exportar_planilha_anual(db, caminho, progresso=None, cancelar=None, tamanho_lote=1000, incremental=False):
+    """
+    Grava as sessões numa planilha Excel com uma aba por ano ("Ano_AAAA"), em modo write-only do
+    openpyxl: as linhas vão direto para o arquivo, sem montar a planilha inteira em memória.
+    Com `incremental`, só os anos alterados desde a última exportação para o mesmo arquivo são
+    lidos e gravados; as abas dos demais são copiadas da planilha anterior.
+    Retorna a quantidade de sessões gravadas. Ver iterar_anos para `progresso` e `cancelar`.
+    """
+    valores = attrgetter(*(campo for campo, _ in COLUNAS_EXPORTACAO))
+    versoes = _versoes_para_exportar(db)
+    estado = _ler_estado(db, caminho, "xlsx") if incremental else None
+    if estado and not _arquivo_inalterado(caminho, estado.get("arquivo")):
+        estado = None  # a planilha foi alterada (ex.: salva de novo no Excel) depois da exportação
+    reaproveitar = set()
+    if estado:
+        partes = estado.get("partes", {})
+        try:
+            with zipfile.ZipFile(caminho) as anterior:
+                existentes = set(anterior.namelist())
+                reaproveitar = {ano for ano in _anos_inalterados(estado, versoes)
+                                if partes.get(ano) in existentes and _aba_autocontida(anterior, partes[ano])}
+        except (OSError, zipfile.BadZipFile):
+            reaproveitar = set()
+        if reaproveitar == set(versoes) == set(estado.get("versoes", {})):
+            return 0  # nada mudou desde a última exportação
+
+    def gravar(destino):
+        livro = Workbook(write_only=True)
+        abas = {}
+        quantidade = 0
+        try:
+            for ano, lotes in iterar_anos(db, progresso, cancelar, tamanho_lote, reaproveitar):
+                aba = abas[ano] = livro.create_sheet(f"Ano_{ano}")
+                if lotes is None:
+                    continue  # fica vazia aqui; o conteúdo vem da planilha anterior
+                aba.append([cabecalho for _, cabecalho in COLUNAS_EXPORTACAO])
+                for lote in lotes:
+                    for sessao in lote:
+                        aba.append(valores(sessao))
+                    quantidade += len(lote)
+        except BaseException:
+            for aba in livro.worksheets:
+                aba.close()  # fecha os arquivos temporários das abas já começadas
+            raise
+        if not abas:
+            livro.create_sheet("Sessoes")  # o Excel não abre um arquivo sem nenhuma aba
+        if reaproveitar:
+            base = f"{destino}.base"
+            try:
+                livro.save(base)
+                partes = {ano: aba.path.lstrip("/") for ano, aba in abas.items()}  # definidas ao salvar
+                copias = {partes[ano]: estado["partes"][ano] for ano in reaproveitar}
+                _montar_com_abas_anteriores(base, caminho, destino, copias)
+            finally:
+                _remover(base)
+        else:
+            livro.save(destino)
+            partes = {ano: aba.path.lstrip("/") for ano, aba in abas.items()}
+        # O estado anterior não descreve o arquivo novo: sai antes da troca, e o novo só é gravado
+        # depois dela (se algo falhar entre as duas, a próxima exportação simplesmente é completa).
+        _remover(_caminho_estado(caminho))
+        return quantidade, partes
+
+    quantidade, partes = _gravar_com_substituicao(caminho, gravar)
+    _gravar_estado(db, caminho, "xlsx", {ano: versoes[ano] for ano in partes if ano in versoes},
+                   partes=partes, arquivo=_impressao_arquivo(caminho))
+    return quantidade
+
+def _inteiro_ou_nulo(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+def _linha_tipada(sessao):
+    """Valores de COLUNAS_TIPADAS para uma Sessao (data em AAAA-MM-DD, públicos como int ou None)."""
+    linha = sessao._replace(data=sessao.data_iso)
+    linha = linha._replace(**{coluna: _inteiro_ou_nulo(getattr(linha, coluna)) for coluna in COLUNAS_PUBLICO})
+    return tuple(getattr(linha, coluna) for coluna in COLUNAS_TIPADAS)
+
+def exportar_csv(db, caminho, progresso=None, cancelar=None, tamanho_lote=LOTE_COLUNAR, separador=","):
+    """
+    Grava as sessões num CSV (UTF-8, cabeçalho com COLUNAS_TIPADAS), um lote do banco por vez.
+    Retorna a quantidade de sessões exportadas. Ver iterar_anos para `progresso` e `cancelar`.
+    """
+    def gravar(destino):
+        quantidade = 0
+        with open(destino, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f, delimiter=separador)
+            escritor.writerow(COLUNAS_TIPADAS)
+            for _, lotes in iterar_anos(db, progresso, cancelar, tamanho_lote):
+                for lote in lotes:
+                    escritor.writerows(map(_linha_tipada, lote))
+                    quantidade += len(lote)
+        return quantidade
+
+    return _gravar_com_substituicao(caminho, gravar)
+
+def _importar_pyarrow():
+    """Importa o pyarrow só quando um formato colunar é pedido (a dependência é opcional)."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Exportar em Parquet ou Arrow requer o pacote pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+def _esquema_arrow(pa, db):
+    """
+    Esquema tipado das sessões e os dicionários fixos de sala e dia da semana (categorias).
+    Os dicionários são lidos do banco antes de começar, porque o formato de arquivo Arrow
+    não aceita um dicionário diferente a cada lote.
+    """
+    categorias = {coluna: db.buscar_valores_distintos(coluna) for coluna in ("sala", "dia_semana")}
+    tipos = {
+        "id": pa.int64(), "data": pa.date32(), "nome_evento": pa.string(), "observacoes": pa.string(),
+        **{coluna: pa.int32() for coluna in COLUNAS_PUBLICO},
+        **{coluna: pa.dictionary(pa.int16(), pa.string()) for coluna in categorias},
+    }
+    esquema = pa.schema([(coluna, tipos[coluna]) for coluna in COLUNAS_TIPADAS])
+    dicionarios = {
+        coluna: (pa.array(valores, type=pa.string()), {valor: indice for indice, valor in enumerate(valores)})
+        for coluna, valores in categorias.items()
+    }
+    return esquema, dicionarios
+
+def _lote_arrow(pa, esquema, dicionarios, lote):
+    """Converte uma lista de Sessao num RecordBatch do esquema."""
+    colunas = dict(zip(COLUNAS_TIPADAS, zip(*map(_linha_tipada, lote))))
+    arrays = []
+    for campo in esquema:
+        valores = colunas[campo.name]
+        if campo.name in dicionarios:
+            dicionario, indices = dicionarios[campo.name]
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array([indices.get(valor) for valor in valores], type=pa.int16()), dicionario))
+        elif campo.name == "data":
+            arrays.append(pa.array([date.fromisoformat(valor) for valor in valores], type=pa.date32()))
+        else:
+            arrays.append(pa.array(valores, type=campo.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=esquema)
+
+def _arquivo_parquet_do_ano(pasta, ano):
+    return os.path.join(pasta, f"ano={ano}", "sessoes.parquet")
+
+def exportar_parquet(db, caminho, progresso=None, cancelar=None, tamanho_lote=LOTE_COLUNAR, incremental=False):
+    """
+    Grava as sessões como Parquet particionado por ano: `caminho/ano=AAAA/sessoes.parquet`
+    (o layout "hive" que pyarrow.dataset, pandas, DuckDB e Spark leem direto como uma tabela).
+    Cada lote do banco vira um row group. Com `incremental`, só os arquivos dos anos alterados
+    desde a última exportação são regravados (um a um, cada arquivo trocado inteiro) e as pastas
+    de anos que ficaram sem sessões são apagadas. Retorna a quantidade de sessões gravadas.
+    Lança ValueError se `caminho` já existir como arquivo.
+    """
+    if os.path.exists(caminho) and not os.path.isdir(caminho):
+        raise ValueError(f"O Parquet é gravado numa pasta, mas '{caminho}' já existe como arquivo.")
+    pa = _importar_pyarrow()
+    esquema, dicionarios = _esquema_arrow(pa, db)
+    versoes = _versoes_para_exportar(db)
+    estado = _ler_estado(db, caminho, "parquet") if incremental and os.path.isdir(caminho) else None
+
+    def gravar_ano(arquivo, lotes):
+        quantidade = 0
+        with pa.parquet.ParquetWriter(arquivo, esquema) as escritor:
+            for lote in lotes:
+                escritor.write_batch(_lote_arrow(pa, esquema, dicionarios, lote))
+                quantidade += len(lote)
+        return quantidade
+
+    if estado is None:
+        def gravar(destino):
+            os.makedirs(destino)
+            quantidade = 0
+            for ano, lotes in iterar_anos(db, progresso, cancelar, tamanho_lote):
+                os.makedirs(os.path.join(destino, f"ano={ano}"))
+                quantidade += gravar_ano(_arquivo_parquet_do_ano(destino, ano), lotes)
+            _remover(_caminho_estado(caminho))  # ver exportar_planilha_anual
+            return quantidade
+
+        quantidade = _gravar_com_substituicao(caminho, gravar)
+    else:
+        reaproveitar = {ano for ano in _anos_inalterados(estado, versoes)
+                        if os.path.exists(_arquivo_parquet_do_ano(caminho, ano))}
+        # A pasta passa a ser alterada no lugar: até o fim, o estado só vale para os anos que não mudam.
+        _gravar_estado(db, caminho, "parquet", {ano: versoes[ano] for ano in reaproveitar})
+        quantidade = 0
+        anos_exportados = set()
+        for ano, lotes in iterar_anos(db, progresso, cancelar, tamanho_lote, reaproveitar):
+            anos_exportados.add(ano)
+            if lotes is None:
+                continue
+            os.makedirs(os.path.join(caminho, f"ano={ano}"), exist_ok=True)
+            quantidade += _gravar_com_substituicao(_arquivo_parquet_do_ano(caminho, ano), partial(gravar_ano, lotes=lotes))
+        for pasta in os.listdir(caminho):
+            if pasta.startswith("ano=") and pasta[len("ano="):] not in anos_exportados:
+                shutil.rmtree(os.path.join(caminho, pasta))
+
+    _gravar_estado(db, caminho, "parquet", versoes)
+    return quantidade
+
+def exportar_arrow(db, caminho, progresso=None, cancelar=None, tamanho_lote=LOTE_COLUNAR):
+    """
+    Grava as sessões num único arquivo Arrow IPC (formato de arquivo, também lido como Feather v2),
+    um record batch por lote do banco. Retorna a quantidade de sessões exportadas.
+    """
+    pa = _importar_pyarrow()
+    esquema, dicionarios = _esquema_arrow(pa, db)
+
+    def gravar(destino):
+        quantidade = 0
+        with pa.OSFile(destino, "wb") as arquivo, pa.ipc.new_file(arquivo, esquema) as escritor:
+            for _, lotes in iterar_anos(db, progresso, cancelar, tamanho_lote):
+                for lote in lotes:
+                    escritor.write_batch(_lote_arrow(pa, esquema, dicionarios, lote))
+                    quantidade += len(lote)
+        return quantidade
+
+    return _gravar_com_substituicao(caminho, gravar)
+
+# Formato -> função de exportação; o formato padrão sai da extensão do destino.
+FORMATOS = {
+    "xlsx": exportar_planilha_anual,
+    "csv": exportar_csv,
+    "parquet": exportar_parquet,
+    "arrow": exportar_arrow,
+}
+# Formatos gravados por ano (aba ou arquivo), que aceitam a exportação incremental.
+FORMATOS_INCREMENTAIS = ("xlsx", "parquet")
+EXTENSOES = {".xlsx": "xlsx", ".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+def formato_pelo_caminho(caminho):
+    """Formato de exportação correspondente à extensão do caminho, ou None se não reconhecida."""
+    return EXTENSOES.get(os.path.splitext(caminho)[1].lower())
+
+def exportar(db, caminho, formato=None, progresso=None, cancelar=None, incremental=False):
+    """Exporta no `formato` pedido (ou no indicado pela extensão de `caminho`)."""
+    formato = formato or formato_pelo_caminho(caminho)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido para '{caminho}': use {', '.join(FORMATOS)}.")
+    if not incremental:
+        return FORMATOS[formato](db, caminho, progresso, cancelar)
+    if formato not in FORMATOS_INCREMENTAIS:
+        raise ValueError(f"A exportação incremental só existe para {', '.join(FORMATOS_INCREMENTAIS)}.")
+    return FORMATOS[formato](db, caminho, progresso, cancelar, incremental=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta as sessões do banco sem abrir a interface.")
+    parser.add_argument("destino", help="Arquivo (ou pasta, no Parquet) de saída.")
+    parser.add_argument("--formato", choices=list(FORMATOS), default=None,
+                        help="Formato de saída (padrão: pela extensão do destino).")
+    parser.add_argument("--banco", default="gestao_espetaculos.db", help="Arquivo do banco SQLite.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Regrava só os anos alterados desde a última exportação (xlsx e parquet).")
+    args = parser.parse_args()
+
+    formato = args.formato or formato_pelo_caminho(args.destino)
+    if formato is None:
+        parser.error("não foi possível deduzir o formato pela extensão; use --formato.")
+    if args.incremental and formato not in FORMATOS_INCREMENTAIS:
+        parser.error(f"--incremental só vale para {', '.join(FORMATOS_INCREMENTAIS)}.")
+
+    anos_concluidos = []
+    def mostrar_progresso(exportadas, total, ano):
+        if not anos_concluidos or anos_concluidos[-1] != ano:
+            anos_concluidos.append(ano)
+            print(f"Exportando {ano}...", flush=True)
+
+    db = Database(args.banco)
+    db.criar_tabela()
+    try:
+        quantidade = exportar(db, args.destino, formato, mostrar_progresso, incremental=args.incremental)
+    except (ImportError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.fechar()
+    print(f"{quantidade} sessões exportadas em '{args.destino}' ({formato}).")
@@ -0,0 +1,130 @@
+# gerador_dados.py
+# Gera dados sintéticos (sessões e borderôs) para testes de carga e benchmarks.
+import argparse
+import random
+from datetime import date, timedelta
+
+from database import Database, DIAS_SEMANA_PT
+
+SALAS = ["Arena", "Multiuso", "Mezanino"]
+
+PALAVRAS_TITULO = [
+    "Sermão", "Palhaço", "Ornitorrinco", "Dança", "Memórias", "Corpo", "Rio", "Sertão",
+    "Cabeça", "Esperança", "Maré", "Sala Branca", "Axé", "Reflexo", "Acordo", "Viagem",
+    "Silêncio", "Cidade", "Festa", "Noite", "Janela", "Casa", "Travessia", "Encontro",
+]
+
+TIPOS_ESPECTADOR = [
+    ("Comprometimento (PCG)", "pcg"), ("Cortesia PRODUÇÃO", "adv"), ("Cortesia SESC", "adv"),
+    ("Inteira", "adv"), ("Meia Entrada", "adv"), ("Trabalhador", "com"),
+]
+
+SESSOES_POR_PAGINA_BORDERO = 6
+
+def _nome_evento(rnd, indice):
+    """Nome de evento plausível e único (o índice evita colisões entre temporadas)."""
+    palavras = rnd.sample(PALAVRAS_TITULO, rnd.randint(1, 3))
+    return f"{' '.join(palavras).upper()} {indice}"
+
+def gerar_sessoes(quantidade, semente=42, ano_inicial=2010, ano_final=2025):
+    """
+    Gera `quantidade` sessões no formato de adicionar_sessao, agrupadas em temporadas:
+    cada evento ocupa uma sala em dias consecutivos de quinta a domingo.
+    """
+    rnd = random.Random(semente)
+    inicio = date(ano_inicial, 1, 1)
+    dias_no_periodo = (date(ano_final, 12, 31) - inicio).days
+    geradas = 0
+    indice_evento = 0
+    while geradas < quantidade:
+        indice_evento += 1
+        nome = _nome_evento(rnd, indice_evento)
+        sala = rnd.choice(SALAS)
+        dia = inicio + timedelta(days=rnd.randrange(dias_no_periodo))
+        capacidade = {"Arena": 400, "Multiuso": 150, "Mezanino": 80}[sala]
+        for _ in range(min(rnd.randint(4, 24), quantidade - geradas)):
+            while dia.weekday() < 3:  # temporadas de quinta a domingo
+                dia += timedelta(days=1)
+            pcg = rnd.randint(0, capacidade // 10)
+            com = rnd.randint(0, capacidade // 20)
+            adv = rnd.randint(0, capacidade // 2)
+            yield {
+                "Dia": DIAS_SEMANA_PT[dia.weekday()], "Data": dia.strftime("%d/%m/%Y"),
+                "Nome_do_Evento": nome, "Sala": sala,
+                "Publico_PCG": pcg, "Publico_Comerciario": com, "Publico_Adversos": adv,
+                "PCG_COM": pcg + com, "Total": pcg + com + adv,
+                "Observacoes": "Importado via PDF" if rnd.random() < 0.3 else "",
+            }
+            geradas += 1
+            dia += timedelta(days=1)
+
+def popular_banco(caminho_banco, quantidade, semente=42, tamanho_lote=20000):
+    """Cria (ou completa) um banco com `quantidade` sessões sintéticas, gravadas em lotes."""
+    db = Database(caminho_banco)
+    db.criar_tabela()
+    lote = []
+    for sessao in gerar_sessoes(quantidade, semente):
+        lote.append(sessao)
+        if len(lote) >= tamanho_lote:
+            db.adicionar_sessoes_em_lote(lote)
+            lote = []
+    db.adicionar_sessoes_em_lote(lote)
+    return db
+
+def gerar_paginas_bordero(nome_evento, quantidade_sessoes, semente=42, data_inicial=date(2025, 9, 1)):
+    """
+    Gera as páginas de um borderô como o PyMuPDF extrai o texto (uma linha por célula),
+    com cabeçalho e rodapé em cada página. Retorna (lista de páginas, total vendido).
+    """
+    rnd = random.Random(semente)
+    cabecalho = (
+        "Página:\nControle de Bilheteria - Estatística\nUnidade\nSESC - COPACABANA\n"
+        "Período : 01/09/2025 a 30/09/2025\n"
+    )
+    rodape = "SCB_Estatística\n23/10/2025\nSCB Vrs.2.8.7\nData:\nVersão:\nHora 10:49\nUsuário: ACAZEVEDO\n"
+    paginas = []
+    partes = [cabecalho, f"Evento:{nome_evento}\nIngressos Vendidos\nTipo de Espectador\n"]
+    total_vendido = 0
+    for indice in range(quantidade_sessoes):
+        if indice and indice % SESSOES_POR_PAGINA_BORDERO == 0:
+            paginas.append("".join(partes) + rodape)
+            partes = [cabecalho]
+        dia = data_inicial + timedelta(days=indice)
+        partes.append(f"Data: {dia.strftime('%d/%m/%Y')}\n")
+        total_dia = 0
+        for tipo, _ in TIPOS_ESPECTADOR:
+            if rnd.random() < 0.8:
+                valor = rnd.randint(1, 50)
+                total_dia += valor
+                partes.append(f"{tipo}    \n{valor}\n")
+        partes.append(f"Total \n{total_dia}\n")
+        total_vendido += total_dia
+    partes.append(f"Total vendido no evento\n{total_vendido}\n")
+    paginas.append("".join(partes) + rodape)
+    return paginas, total_vendido
+
+def gerar_texto_bordero(nome_evento, quantidade_sessoes, semente=42):
+    """Texto completo de um borderô sintético. Retorna (texto, total vendido)."""
+    paginas, total_vendido = gerar_paginas_bordero(nome_evento, quantidade_sessoes, semente)
+    return "".join(paginas), total_vendido
+
+def gerar_pdf_bordero(caminho_pdf, nome_evento, quantidade_sessoes, semente=42):
+    """Grava um PDF de borderô sintético (requer PyMuPDF). Retorna o total vendido."""
+    import fitz  # PyMuPDF, só necessário para gerar PDFs
+
+    paginas, total_vendido = gerar_paginas_bordero(nome_evento, quantidade_sessoes, semente)
+    with fitz.open() as doc:
+        for texto_pagina in paginas:
+            doc.new_page().insert_text((40, 30), texto_pagina, fontsize=6)
+        doc.save(caminho_pdf)
+    return total_vendido
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos de espetáculos.")
+    parser.add_argument("--banco", required=True, help="Arquivo SQLite a criar/completar.")
+    parser.add_argument("--sessoes", type=int, default=1000, help="Quantidade de sessões a gerar.")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    popular_banco(args.banco, args.sessoes, args.semente).fechar()
+    print(f"{args.sessoes} sessões sintéticas gravadas em '{args.banco}'.")
@@ -0,0 +1,78 @@
+# indice_eventos.py
+# Índice em memória dos nomes de evento, para sugerir nomes enquanto o usuário digita.
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+PADRAO_PALAVRA = re.compile(r"\w+")
+PADRAO_ACENTOS = re.compile("[\u0300-\u036f]")  # marcas combinantes que sobram do NFKD
+
+def normalizar(texto):
+    """Texto sem acentos, em minúsculas e com as palavras separadas por um único espaço."""
+    sem_acentos = PADRAO_ACENTOS.sub("", unicodedata.normalize("NFKD", texto or ""))
+    return " ".join(PADRAO_PALAVRA.findall(sem_acentos.casefold()))
+
+SEPARADOR = "\x1f"  # nunca aparece numa chave normalizada (só letras, dígitos e espaços)
+
+def _chaves(nome):
+    """
+    Uma entrada "chave<SEPARADOR>nome" para cada início de palavra: "O Sermão" casa com "o ser..."
+    e com "ser...". Textos simples ordenam bem mais rápido que tuplas na montagem do índice.
+    """
+    normalizado = normalizar(nome)
+    return [f"{normalizado[m.start():]}{SEPARADOR}{nome}" for m in PADRAO_PALAVRA.finditer(normalizado)]
+
+class IndiceEventos:
+    """
+    Lista ordenada de chaves com busca por prefixo via bisect: cada sugestão custa uma
+    busca binária mais a leitura das chaves que casam, sem consultar o banco.
+    """
+    def __init__(self, nomes=()):
+        self._lock = threading.Lock()
+        self._nomes = {nome for nome in nomes if nome}
+        self._chaves = sorted(chave for nome in self._nomes for chave in _chaves(nome))
+
+    def __len__(self):
+        return len(self._nomes)
+
+    def __contains__(self, nome):
+        return nome in self._nomes
+
+    def adicionar(self, nome):
+        if not nome:
+            return
+        with self._lock:
+            if nome in self._nomes:
+                return
+            self._nomes.add(nome)
+            for chave in _chaves(nome):
+                insort(self._chaves, chave)
+
+    def remover(self, nome):
+        with self._lock:
+            if nome not in self._nomes:
+                return
+            self._nomes.discard(nome)
+            for chave in _chaves(nome):
+                posicao = bisect_left(self._chaves, chave)
+                if posicao < len(self._chaves) and self._chaves[posicao] == chave:
+                    del self._chaves[posicao]
+
+    def sugerir(self, prefixo, limite=10):
+        """Até `limite` nomes com alguma palavra começando por `prefixo` (ignora acentos e maiúsculas)."""
+        prefixo = normalizar(prefixo)
+        if not prefixo:
+            return []
+        sugestoes = []
+        with self._lock:
+            posicao = bisect_left(self._chaves, prefixo)
+            while posicao < len(self._chaves) and len(sugestoes) < limite:
+                chave = self._chaves[posicao]
+                if not chave.startswith(prefixo):
+                    break
+                nome = chave.split(SEPARADOR, 1)[1]
+                if nome not in sugestoes:
+                    sugestoes.append(nome)
+                posicao += 1
+        return sugestoes
@@ -56,10 +56,9 @@ def migrar():
 
         print(f"Encontrados {len(df_completo)} registros válidos para migrar.")
 
-        for _, row in df_completo.iterrows():
-            sessao_dict = row.to_dict()
-            db.adicionar_sessao(sessao_dict)
-            
+        # Grava tudo numa única transação: se alguma linha falhar, nada é migrado.
+        db.adicionar_sessoes_em_lote(df_completo.to_dict('records'))
+
         print("\nMigração concluída com sucesso!")
         print("Seus dados agora estão no arquivo 'gestao_espetaculos.db'.")
 
@@ -0,0 +1,175 @@
+# monitorar_pasta.py
+# Serviço sem interface que vigia uma pasta e importa sozinho os borderôs (PDF) que chegam nela.
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+import bordero
+from database import Database
+
+SALAS_VALIDAS = ("Arena", "Multiuso", "Mezanino")
+INTERVALO_PADRAO = 30  # segundos entre duas varreduras da pasta
+
+def carregar_regras(caminho_regras):
+    """
+    Lê as regras de sala de um arquivo JSON: uma lista avaliada em ordem, a primeira que casar vale.
+    Cada regra tem "sala" e "arquivo" (padrão glob sobre o nome do arquivo) e/ou "evento"
+    (expressão regular sobre o nome do evento), por exemplo:
+        [{"arquivo": "*arena*", "sala": "Arena"}, {"evento": "infantil", "sala": "Mezanino"}]
+    """
+    with open(caminho_regras, encoding="utf-8") as f:
+        regras = json.load(f)
+    for regra in regras:
+        if regra.get("sala") not in SALAS_VALIDAS:
+            raise ValueError(f"Sala inválida na regra {regra}: use uma de {', '.join(SALAS_VALIDAS)}.")
+        if "arquivo" not in regra and "evento" not in regra:
+            raise ValueError(f"A regra {regra} precisa de \"arquivo\" ou \"evento\".")
+        if "evento" in regra:
+            regra["_evento"] = re.compile(regra["evento"], re.IGNORECASE)
+    return regras
+
+def escolher_sala(resultado, regras, sala_padrao=None):
+    """Sala da primeira regra que casa com o arquivo/evento do ResultadoPdf; senão a sala padrão."""
+    nome_arquivo = os.path.basename(resultado.caminho).lower()
+    nome_evento = resultado.dados.get("nome_evento", "")
+    for regra in regras:
+        if "arquivo" in regra and not fnmatch.fnmatch(nome_arquivo, regra["arquivo"].lower()):
+            continue
+        if "_evento" in regra and not regra["_evento"].search(nome_evento):
+            continue
+        return regra["sala"]
+    return sala_padrao
+
+def _log(mensagem):
+    print(f"[{datetime.now():%d/%m/%Y %H:%M:%S}] {mensagem}", flush=True)
+
+class MonitorPasta:
+    """
+    Varre a pasta periodicamente e importa os PDFs novos, um lote (uma transação) por varredura.
+    Um arquivo só é lido quando tamanho e data de modificação não mudaram desde a varredura anterior
+    (evita pegar um PDF ainda sendo copiado). Os já importados ficam registrados em pdfs_importados
+    (caminho, tamanho e data de modificação) e são pulados sem leitura nem aviso, inclusive depois
+    de reiniciar o serviço; um arquivo novo com o conteúdo de um já importado é reconhecido pelo hash.
+    """
+    def __init__(self, pasta, db, regras=(), sala_padrao=None, max_workers=None):
+        self.pasta = pasta
+        self.db = db
+        self.regras = list(regras)
+        self.sala_padrao = sala_padrao
+        self.max_workers = max_workers
+        self._vistos = {}       # caminho -> (tamanho, mtime) na varredura anterior
+        self._processados = {}  # caminho -> (tamanho, mtime) quando foi processado
+
+    def _arquivos_prontos(self):
+        prontos = []
+        atuais = {}
+        registrados = self.db.buscar_pdfs_importados()
+        for caminho in bordero.listar_pdfs(self.pasta):
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue  # removido entre a listagem e o stat
+            assinatura = (info.st_size, info.st_mtime_ns)
+            atuais[caminho] = assinatura
+            if registrados.get(os.path.abspath(caminho)) == assinatura:
+                self._processados[caminho] = assinatura
+            if self._processados.get(caminho) == assinatura:
+                continue
+            if self._vistos.get(caminho) == assinatura:
+                prontos.append(caminho)
+        self._vistos = atuais
+        return prontos
+
+    def _importar(self, caminhos):
+        """Importa os PDFs numa transação e os marca como processados. Retorna (sessões gravadas, erros)."""
+        gravadas, erros = bordero.importar_pdfs(
+            caminhos, lambda resultado: escolher_sala(resultado, self.regras, self.sala_padrao),
+            self.db, self.max_workers,
+        )
+        for caminho in caminhos:
+            self._processados[caminho] = self._vistos[caminho]
+        return gravadas, erros
+
+    def _importar_um_por_vez(self, caminhos):
+        """Importa cada PDF separadamente, para que um arquivo problemático não impeça os demais."""
+        gravadas, erros = 0, []
+        for caminho in caminhos:
+            try:
+                gravadas_arquivo, erros_arquivo = self._importar([caminho])
+            except sqlite3.OperationalError as e:
+                _log(f"'{os.path.basename(caminho)}': banco indisponível ({e}); nova tentativa na próxima varredura.")
+                continue
+            except Exception as e:
+                self._processados[caminho] = self._vistos[caminho]  # só é tentado de novo se o arquivo mudar
+                gravadas_arquivo, erros_arquivo = 0, [(caminho, str(e))]
+            gravadas += gravadas_arquivo
+            erros.extend(erros_arquivo)
+        return gravadas, erros
+
+    def executar_ciclo(self):
+        """
+        Processa os PDFs prontos da pasta. Retorna (sessões gravadas, erros).
+        Com o banco ocupado (ex.: a interface no meio de uma gravação), nada é gravado nem marcado
+        e os arquivos voltam na próxima varredura.
+        """
+        caminhos = self._arquivos_prontos()
+        if not caminhos:
+            return 0, []
+        _log(f"{len(caminhos)} PDF(s) novo(s) encontrado(s).")
+        try:
+            gravadas, erros = self._importar(caminhos)
+        except sqlite3.OperationalError as e:
+            _log(f"Banco indisponível ({e}); nova tentativa na próxima varredura.")
+            return 0, []
+        except Exception as e:
+            _log(f"Falha ao importar o lote ({e}); importando um arquivo por vez.")
+            gravadas, erros = self._importar_um_por_vez(caminhos)
+        for caminho, erro in erros:
+            _log(f"'{os.path.basename(caminho)}' não importado: {erro}")
+        _log(f"{gravadas} sessões gravadas.")
+        return gravadas, erros
+
+    def executar(self, intervalo=INTERVALO_PADRAO, uma_vez=False):
+        """Laço principal; termina com Ctrl+C (ou após uma varredura completa, com `uma_vez`)."""
+        _log(f"Monitorando '{self.pasta}' a cada {intervalo}s.")
+        try:
+            while True:
+                try:
+                    self.executar_ciclo()
+                except Exception as e:  # ex.: pasta de rede fora do ar; o serviço continua
+                    _log(f"Erro na varredura ({e}); nova tentativa em {intervalo}s.")
+                if uma_vez and not any(c not in self._processados for c in self._vistos):
+                    break
+                time.sleep(intervalo)
+        except KeyboardInterrupt:
+            _log("Encerrado pelo usuário.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa automaticamente os borderôs (PDF) que chegam numa pasta.")
+    parser.add_argument("pasta", help="Pasta a monitorar.")
+    parser.add_argument("--banco", default="gestao_espetaculos.db", help="Arquivo do banco SQLite.")
+    parser.add_argument("--sala", choices=SALAS_VALIDAS, default=None,
+                        help="Sala usada quando nenhuma regra casar com o arquivo.")
+    parser.add_argument("--regras", default=None, help="Arquivo JSON com as regras de sala (ver carregar_regras).")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_PADRAO, help="Segundos entre varreduras.")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos de leitura (padrão: um por núcleo).")
+    parser.add_argument("--uma-vez", action="store_true", help="Importa o que houver na pasta e termina.")
+    args = parser.parse_args()
+
+    if not args.sala and not args.regras:
+        parser.error("informe --sala, --regras ou ambos.")
+    regras = carregar_regras(args.regras) if args.regras else []
+
+    db = Database(args.banco)
+    mescladas = db.criar_tabela()
+    if mescladas:
+        _log(f"Migração: {mescladas} sessões duplicadas foram mescladas (cópias guardadas em sessoes_duplicadas).")
+    try:
+        MonitorPasta(args.pasta, db, regras, args.sala, args.processos).executar(args.intervalo, args.uma_vez)
+    finally:
+        db.fechar()
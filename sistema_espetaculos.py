@@ -11,12 +11,19 @@ import numpy as np
 import shutil
 from PIL import Image
 import threading
-import re
-import fitz  # PyMuPDF
+import functools
+import multiprocessing
+import queue
+import sqlite3
+from bisect import bisect_left, insort
+from operator import attrgetter
 
 # Se o seu arquivo database.py estiver em outro lugar, ajuste o caminho.
 # Assumindo que está no mesmo diretório:
-from database import Database
+from database import Database, DIAS_SEMANA_PT, ORDENACOES_HISTORICO, ORDENACOES_KEYSET, data_iso
+import bordero
+import exportacao
+from tabela_virtual import Acao, Coluna, FontePaginada, TabelaVirtual
 
 def resource_path(relative_path):
     try:
@@ -27,16 +34,75 @@ def resource_path(relative_path):
 
 NOME_ARQUIVO_EXCEL_PADRAO = "ArquivoAnual_anaceci.xlsx"
 NOME_BANCO_DADOS = "gestao_espetaculos.db"
+TAMANHO_PAGINA_HISTORICO = 100
+MAX_SUGESTOES_EVENTO = 8
+# Caixas de dia da semana do histórico: (rótulo, número do dia no SQLite, 0 = domingo).
+DIAS_FILTRO_HISTORICO = [("Dom", 0), ("Seg", 1), ("Ter", 2), ("Qua", 3), ("Qui", 4), ("Sex", 5), ("Sáb", 6)]
 
 DIAS_SEMANA_MAP = {
     "Segunda": 0, "Terça": 1, "Quarta": 2,
     "Quinta": 3, "Sexta": 4, "Sábado": 5, "Domingo": 6
 }
-DIAS_SEMANA_PT = {
-    0: "segunda-feira", 1: "terça-feira", 2: "quarta-feira", 3: "quinta-feira",
-    4: "sexta-feira", 5: "sábado", 6: "domingo"
+COLORS = {
+    "bg_dark": "#202124", "bg_light": "#2D2F34", "frame": "#2D2F34",
+    "text": "#EAEAEA", "text_secondary": "#B0B0B0", "primary": "#42B883",
+    "primary_hover": "#4FD89D", "danger": "#E57373", "danger_hover": "#EF5350",
+    "header": "#37393F", "status_bar": "#37393F"
 }
 
+def _inteiro(valor):
+    """Número de público como int (vazio ou inválido conta como 0)."""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return 0
+
+class JanelaProgresso(ctk.CTkToplevel):
+    """
+    Janela modal de progresso para tarefas em segundo plano.
+    A tarefa consulta `cancelar` (threading.Event) e a thread principal chama atualizar()/fechar().
+    """
+    def __init__(self, master, titulo, mensagem, pode_cancelar=True):
+        super().__init__(master)
+        self.title(titulo)
+        self.geometry("420x160")
+        self.resizable(False, False)
+        self.transient(master)
+        self.grab_set()
+        self.cancelar = threading.Event()
+
+        self.label = ctk.CTkLabel(self, text=mensagem, font=master.FONTS["body_bold"])
+        self.label.pack(pady=(20, 10), padx=20)
+        self.barra = ctk.CTkProgressBar(self, mode="indeterminate", width=360)
+        self.barra.pack(padx=20)
+        self.barra.start()
+        self.btn_cancelar = ctk.CTkButton(self, text="Cancelar", width=120, command=self._ao_cancelar,
+                                          fg_color=master.COLORS["danger"], hover_color=master.COLORS["danger_hover"])
+        if pode_cancelar:
+            self.btn_cancelar.pack(pady=15)
+        self.protocol("WM_DELETE_WINDOW", self._ao_cancelar if pode_cancelar else lambda: None)
+
+    def atualizar(self, atual, total, mensagem=None):
+        """Mostra o avanço (atual/total); com total desconhecido a barra fica indeterminada."""
+        if not self.winfo_exists():
+            return
+        if total:
+            if self.barra.cget("mode") != "determinate":
+                self.barra.stop()
+                self.barra.configure(mode="determinate")
+            self.barra.set(atual / total)
+        if mensagem:
+            self.label.configure(text=mensagem)
+
+    def _ao_cancelar(self):
+        self.cancelar.set()
+        self.btn_cancelar.configure(state="disabled", text="Cancelando...")
+
+    def fechar(self):
+        if self.winfo_exists():
+            self.grab_release()
+            self.destroy()
+
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -48,12 +114,7 @@ class App(ctk.CTk):
 
         ctk.set_appearance_mode("dark")
 
-        self.COLORS = {
-            "bg_dark": "#202124", "bg_light": "#2D2F34", "frame": "#2D2F34",
-            "text": "#EAEAEA", "text_secondary": "#B0B0B0", "primary": "#42B883",
-            "primary_hover": "#4FD89D", "danger": "#E57373", "danger_hover": "#EF5350",
-            "header": "#37393F", "status_bar": "#37393F"
-        }
+        self.COLORS = COLORS
         self.FONTS = {
             "title": ctk.CTkFont(family="Poppins", size=24, weight="bold"),
             "header": ctk.CTkFont(family="Poppins", size=14, weight="bold"),
@@ -66,8 +127,27 @@ class App(ctk.CTk):
         self.figura_atual = None
         self.status_bar_job = None
         self.debounce_job = None
+        # Estado da busca exibida no histórico (filtros, modelo da tabela, totais e eventos).
+        self.historico = None
+        self.ordem_historico = ("data", False)  # (coluna, crescente), ordenada no banco
+        # Buscas do histórico rodam numa thread própria; cada pedido ganha uma geração nova e
+        # resultados de gerações antigas (o usuário já digitou outra coisa) são descartados.
+        self._geracao_historico = 0
+        self._buscando_historico = False
+        self._fila_historico = queue.Queue()
+        self._thread_historico = threading.Thread(target=self._trabalhador_historico, daemon=True)
+        self._thread_historico.start()
 
         self._criar_interface()
+        self.protocol("WM_DELETE_WINDOW", self._ao_fechar)
+        # Monta o índice de nomes de evento fora da thread da interface, antes da primeira tecla.
+        threading.Thread(target=self.db.indice_eventos, daemon=True).start()
+
+    def _ao_fechar(self):
+        self._cancelar_busca_historico()
+        self._fila_historico.put(None)
+        self.db.fechar()
+        self.destroy()
 
     def _load_icons(self):
         icons = {}
@@ -144,12 +224,62 @@ class App(ctk.CTk):
             entry.icursor(new_pos)
 
     def _on_filtro_key_release(self, event=None):
+        if event is not None and event.keysym in ("Up", "Down", "Return", "KP_Enter", "Escape"):
+            return  # tratadas por _navegar_sugestoes
         if self.debounce_job:
             self.after_cancel(self.debounce_job)
-        if self.filtro_nome.get().strip():
+        texto = self.filtro_nome.get().strip()
+        self._mostrar_sugestoes(self.db.sugerir_eventos(texto, MAX_SUGESTOES_EVENTO) if texto else [])
+        if texto:
                 self.debounce_job = self.after(500, self.atualizar_historico)
         else:
-            self.limpar_resultados_historico()
+            self.atualizar_historico()  # limpa, ou busca só com os demais filtros
+
+    def _mostrar_sugestoes(self, nomes):
+        """Lista de nomes de evento logo abaixo do campo de busca (os botões são reaproveitados)."""
+        if nomes == [self.filtro_nome.get().strip()]:
+            nomes = []  # o nome já foi digitado por inteiro
+        self._sugestao_ativa = None
+        for botao, nome in zip(self.botoes_sugestao, nomes):
+            botao.configure(text=nome, fg_color="transparent")
+            botao.pack(fill="x")
+        for botao in self.botoes_sugestao[len(nomes):]:
+            botao.pack_forget()
+        self._sugestoes = nomes
+        if nomes:
+            self.sugestoes_frame.place(in_=self.filtro_nome, relx=0, rely=1, relwidth=1, y=2)
+            self.sugestoes_frame.lift()
+        else:
+            self.sugestoes_frame.place_forget()
+
+    def _esconder_sugestoes(self, event=None):
+        self._mostrar_sugestoes([])
+
+    def _navegar_sugestoes(self, event):
+        """Setas percorrem as sugestões, Enter escolhe a destacada e Esc fecha a lista."""
+        if not self._sugestoes:
+            return None
+        if event.keysym == "Escape":
+            self._esconder_sugestoes()
+        elif event.keysym in ("Return", "KP_Enter"):
+            if self._sugestao_ativa is not None:
+                self._escolher_sugestao(self._sugestoes[self._sugestao_ativa])
+        else:
+            passo = 1 if event.keysym == "Down" else -1
+            atual = -1 if self._sugestao_ativa is None else self._sugestao_ativa
+            self._sugestao_ativa = (atual + passo) % len(self._sugestoes)
+            for indice, botao in enumerate(self.botoes_sugestao[:len(self._sugestoes)]):
+                botao.configure(fg_color=self.COLORS["primary"] if indice == self._sugestao_ativa else "transparent")
+        return "break"
+
+    def _escolher_sugestao(self, nome):
+        self.filtro_nome.delete(0, "end")
+        self.filtro_nome.insert(0, nome)
+        self._esconder_sugestoes()
+        if self.debounce_job:
+            self.after_cancel(self.debounce_job)
+            self.debounce_job = None
+        self.atualizar_historico()
             
     #======================================================================
     #============== MÉTODOS DE IMPORTAÇÃO DE PDF (ATUALIZADO) ==============
@@ -163,101 +293,46 @@ class App(ctk.CTk):
         if not caminho_pdf:
             return
 
-        try:
-            dados_extraidos = self._processar_pdf(caminho_pdf)
-            if not dados_extraidos or not dados_extraidos.get("sessoes"):
-                messagebox.showerror("Erro de Leitura", "Não foi possível extrair dados de sessões válidas do PDF. Verifique o formato do arquivo.")
-                return
-            
-            self.abrir_janela_confirmacao_pdf(dados_extraidos)
+        progresso = JanelaProgresso(self, "Lendo PDF", f"Lendo '{os.path.basename(caminho_pdf)}'...")
+        self.update_status("Lendo PDF de borderô...", clear_after=60000)
+        thread = threading.Thread(target=self._importar_de_pdf_thread, args=(caminho_pdf, progresso))
+        thread.daemon = True
+        thread.start()
+
+    def _importar_de_pdf_thread(self, caminho_pdf, progresso):
+        def ao_ler_pagina(pagina, total_paginas):
+            self.after(0, progresso.atualizar, pagina, total_paginas, f"Página {pagina} de {total_paginas}")
 
+        try:
+            resultado = bordero.processar_pdf_com_cache(caminho_pdf, self.db, ao_ler_pagina, progresso.cancelar)
+            self.after(0, self._importar_de_pdf_concluido, progresso, resultado)
+        except bordero.ImportacaoCancelada:
+            self.after(0, self._importar_de_pdf_concluido, progresso, None)
         except Exception as e:
-            messagebox.showerror("Erro Inesperado", f"Ocorreu um erro ao processar o PDF: {e}")
             import traceback
             traceback.print_exc()
+            self.after(0, lambda e=e: messagebox.showerror("Erro Inesperado", f"Ocorreu um erro ao processar o PDF: {e}"))
+            self.after(0, self._importar_de_pdf_concluido, progresso, None)
 
-    def _processar_pdf(self, caminho_pdf):
-        """Lê o texto do PDF e chama a função de extração."""
-        texto_completo = ""
-        with fitz.open(caminho_pdf) as doc:
-            for pagina in doc:
-                texto_completo += pagina.get_text("text")
-        
-        return self._extrair_dados_do_texto(texto_completo)
-
-    def _extrair_dados_do_texto(self, texto):
-        """
-        Extrai informações do PDF onde cada data é seguida por sua tabela de público.
-        Ajustado para o novo formato de borderô.
-        """
-        dados = {"sessoes": []}
-
-        # 1. Extrai informações globais que aparecem uma vez
-        match_evento = re.search(r"Evento:\s*([^\n\r]+)", texto, re.IGNORECASE)
-        if match_evento:
-            dados["nome_evento"] = match_evento.group(1).strip()
-
-        match_total = re.search(r"Total vendido no evento\s*\n\s*(\d+)", texto, re.IGNORECASE)
-        if match_total:
-            dados["total_vendido_pdf"] = int(match_total.group(1))
-        else:
-            dados["total_vendido_pdf"] = None
-
-        # 2. Divide o texto em blocos, cada um começando com "Data:"
-        # O re.split com `(?=...)` mantém o delimitador (a linha da data) no início de cada bloco
-        blocos = re.split(r"(?=Data:\s*\d{2}/\d{2}/\d{4})", texto, flags=re.IGNORECASE)
-
-        for bloco in blocos:
-            if not bloco.strip():
-                continue
-
-            # 3. Tenta extrair a data do início do bloco
-            match_data = re.search(r"Data:\s*(\d{2}/\d{2}/\d{4})", bloco, re.IGNORECASE)
-            if not match_data:
-                continue
-            
-            data_sessao = match_data.group(1)
-            
-            # 4. Processa a tabela de público dentro deste bloco
-            sessao_publico = {"pcg": 0, "com": 0, "adv": 0}
-            
-            # Padrão para encontrar os tipos de público e seus valores
-            padrao_publico = re.compile(
-                r"^(Comprometimento \(PCG\)|Cortesia PRODUÇÃO|Cortesia SESC|Inteira|Meia Entrada|Trabalhador)\s*\n\s*(\d+)", 
-                re.MULTILINE | re.IGNORECASE
-            )
-            
-            matches = padrao_publico.findall(bloco)
-
-            # Se não encontrou nenhuma linha de público, pula o bloco
-            if not matches:
-                continue
-
-            for tipo, valor_str in matches:
-                try:
-                    valor = int(valor_str)
-                    tipo_normalizado = tipo.lower()
-
-                    if "comprometimento (pcg)" in tipo_normalizado:
-                        sessao_publico["pcg"] += valor
-                    elif "trabalhador" in tipo_normalizado:
-                        sessao_publico["com"] += valor
-                    else:  # Cortesia, Inteira, Meia Entrada são agrupados em "adv"
-                        sessao_publico["adv"] += valor
-                except (ValueError, TypeError):
-                    # Ignora se o valor não for um número válido
-                    continue
-            
-            # 5. Adiciona a sessão se algum dado de público foi encontrado
-            if any(sessao_publico.values()):
-                dados["sessoes"].append({
-                    "data": data_sessao,
-                    "publico": sessao_publico
-                })
+    def _importar_de_pdf_concluido(self, progresso, resultado):
+        progresso.fechar()
+        self.clear_status()
+        if resultado is None:
+            return
+        hash_pdf, dados_extraidos, importado_em = resultado
+        if not dados_extraidos or not dados_extraidos.get("sessoes"):
+            messagebox.showerror("Erro de Leitura", "Não foi possível extrair dados de sessões válidas do PDF. Verifique o formato do arquivo.")
+            return
+        if importado_em and not messagebox.askyesno(
+            "PDF já importado",
+            f"Este borderô já foi importado em {bordero.formatar_data_importacao(importado_em)}.\n"
+            "Importar novamente vai sobrescrever as sessões do evento com os dados deste PDF. Deseja continuar?"
+        ):
+            return
 
-        return dados
+        self.abrir_janela_confirmacao_pdf(dados_extraidos, hash_pdf)
 
-    def abrir_janela_confirmacao_pdf(self, dados_extraidos):
+    def abrir_janela_confirmacao_pdf(self, dados_extraidos, hash_pdf=None):
         win = ctk.CTkToplevel(self)
         win.title("Confirmar Dados Importados do PDF")
         win.geometry("800x600") 
@@ -271,7 +346,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(win, text=f"{len(sessoes_encontradas)} sessões com datas específicas foram encontradas.", 
                            font=self.FONTS["body_bold"]).pack(pady=(0, 10))
 
-        total_calculado = sum(s['publico']['pcg'] + s['publico']['com'] + s['publico']['adv'] for s in sessoes_encontradas)
+        total_calculado = bordero.total_calculado(dados_extraidos)
         total_pdf = dados_extraidos.get("total_vendido_pdf")
 
         validacao_frame = ctk.CTkFrame(win, corner_radius=8)
@@ -325,30 +400,22 @@ class App(ctk.CTk):
                 messagebox.showerror("Erro", "Por favor, selecione uma sala.", parent=win)
                 return
 
-            sessoes_salvas = 0
-            for sessao_data in sessoes_encontradas:
-                try:
-                    data_sessao_dt = datetime.strptime(sessao_data['data'], "%d/%m/%Y")
-                    publico = sessao_data['publico']
-                    
-                    sessao_para_salvar = {
-                        "Dia": DIAS_SEMANA_PT[data_sessao_dt.weekday()],
-                        "Data": data_sessao_dt.strftime("%d/%m/%Y"),
-                        "Nome_do_Evento": nome_evento,
-                        "Sala": sala,
-                        "Publico_PCG": publico['pcg'],
-                        "Publico_Comerciario": publico['com'],
-                        "Publico_Adversos": publico['adv'],
-                        "PCG_COM": publico['pcg'] + publico['com'],
-                        "Total": publico['pcg'] + publico['com'] + publico['adv'],
-                        "Observacoes": "Importado via PDF"
-                    }
-                    self.db.adicionar_sessao(sessao_para_salvar)
-                    sessoes_salvas += 1
-                except Exception as e:
-                    messagebox.showerror("Erro ao Salvar", f"Ocorreu um erro ao salvar a sessão do dia {sessao_data['data']}:\n{e}", parent=win)
-                    return 
-            
+            try:
+                sessoes_para_salvar = bordero.montar_sessoes(dados_extraidos, sala, nome_evento)
+            except ValueError as e:
+                messagebox.showerror("Erro ao Salvar", str(e), parent=win)
+                return
+
+            # Uma única transação: se algo falhar, nenhuma sessão do PDF fica gravada.
+            try:
+                with self.db.transacao():
+                    sessoes_salvas = self.db.adicionar_sessoes_em_lote(sessoes_para_salvar)
+                    if hash_pdf:
+                        self.db.marcar_pdf_importado(hash_pdf)
+            except Exception as e:
+                messagebox.showerror("Erro ao Salvar", f"Ocorreu um erro ao salvar as sessões. Nenhuma sessão foi importada:\n{e}", parent=win)
+                return
+
             messagebox.showinfo("Sucesso", f"{sessoes_salvas} sessões foram importadas com sucesso!", parent=win)
             win.destroy()
             self.filtro_nome.delete(0, 'end')
@@ -358,6 +425,134 @@ class App(ctk.CTk):
 
         ctk.CTkButton(win, text="Salvar Todas as Sessões no Sistema", command=salvar_sessoes_importadas, height=40, font=self.FONTS["header"]).pack(pady=20, padx=20, fill="x")
 
+    def importar_pasta_pdf(self):
+        """Abre o seletor de pastas e lê todos os PDFs de borderô dela em paralelo."""
+        pasta = filedialog.askdirectory(title="Selecione a pasta com os PDFs de Borderô")
+        if not pasta:
+            return
+        caminhos = bordero.listar_pdfs(pasta)
+        if not caminhos:
+            messagebox.showwarning("Aviso", "Nenhum arquivo PDF encontrado na pasta selecionada.")
+            return
+
+        self.btn_importar_pasta.configure(state="disabled", text="Lendo PDFs...")
+        self.update_status(f"Lendo {len(caminhos)} PDFs de borderô...", clear_after=60000)
+        thread = threading.Thread(target=self._importar_pasta_pdf_thread, args=(caminhos,))
+        thread.daemon = True
+        thread.start()
+
+    def _importar_pasta_pdf_thread(self, caminhos):
+        try:
+            resultados = bordero.processar_pdfs(caminhos, db=self.db)
+            self.after(0, self._importar_pasta_pdf_concluido, resultados)
+        except Exception as e:
+            self.after(0, lambda e=e: messagebox.showerror("Erro Inesperado", f"Ocorreu um erro ao processar os PDFs: {e}"))
+            self.after(0, self._importar_pasta_pdf_concluido, None)
+
+    def _importar_pasta_pdf_concluido(self, resultados):
+        self.btn_importar_pasta.configure(state="normal", text="Importar Pasta de PDFs")
+        self.clear_status()
+        if resultados is None:
+            return
+        # PDFs já importados antes não entram no lote, para não duplicar sessões.
+        lidos = [r for r in resultados if not r.erro and not r.importado_em]
+        falhas = [(r.caminho, r.erro or f"já importado em {bordero.formatar_data_importacao(r.importado_em)}")
+                  for r in resultados if r.erro or r.importado_em]
+        if not lidos:
+            erros = "\n".join(f"• {os.path.basename(c)}: {erro}" for c, erro in falhas)
+            messagebox.showerror("Erro de Leitura", f"Nenhum PDF novo pôde ser lido:\n\n{erros}")
+            return
+        self.abrir_janela_confirmacao_lote(lidos, falhas)
+
+    def abrir_janela_confirmacao_lote(self, lidos, falhas):
+        """
+        Confirmação única de todos os eventos lidos de uma pasta; grava tudo numa só transação.
+        `lidos` são ResultadoPdf sem erro; `falhas` são (caminho, motivo) dos arquivos que ficam de fora.
+        """
+        win = ctk.CTkToplevel(self)
+        win.title("Confirmar Importação em Lote")
+        win.geometry("1000x650")
+        win.transient(self)
+        win.grab_set()
+
+        ctk.CTkLabel(win, text=f"{len(lidos)} borderôs lidos", font=self.FONTS["title"]).pack(pady=(10, 5))
+        if falhas:
+            erros_frame = ctk.CTkFrame(win, corner_radius=8, fg_color="#4F3B3B")
+            erros_frame.pack(pady=5, padx=20, fill="x")
+            texto_erros = "\n".join(f"⚠️ {os.path.basename(c)}: {erro}" for c, erro in falhas)
+            ctk.CTkLabel(erros_frame, text=f"{len(falhas)} arquivo(s) não serão importados:\n{texto_erros}",
+                         font=self.FONTS["body"], text_color=self.COLORS["danger"], justify="left").pack(pady=8, padx=10, anchor="w")
+
+        salas = ["Arena", "Multiuso", "Mezanino"]
+        input_frame = ctk.CTkFrame(win, fg_color="transparent")
+        input_frame.pack(fill="x", padx=20, pady=10)
+        ctk.CTkLabel(input_frame, text="Sala para todos:", font=self.FONTS["header"]).pack(side="left", padx=(0, 10))
+
+        scroll_frame = ctk.CTkScrollableFrame(win, label_text="Eventos encontrados")
+        scroll_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        headers = ["Arquivo", "Evento", "Sessões", "Total Calculado", "Total PDF", "Sala"]
+        for i, h in enumerate(headers):
+            ctk.CTkLabel(scroll_frame, text=h, font=self.FONTS["header"]).grid(row=0, column=i, padx=10, pady=5)
+
+        combos_sala = []
+        for idx, (caminho, dados, _, _, _) in enumerate(lidos):
+            row = idx + 1
+            total_calc = bordero.total_calculado(dados)
+            total_pdf = dados.get("total_vendido_pdf")
+            if total_pdf is None:
+                status_pdf, cor = "não encontrado", "#D08770"
+            elif total_pdf == total_calc:
+                status_pdf, cor = f"✅ {total_pdf}", self.COLORS["primary"]
+            else:
+                status_pdf, cor = f"⚠️ {total_pdf}", self.COLORS["danger"]
+            ctk.CTkLabel(scroll_frame, text=os.path.basename(caminho)).grid(row=row, column=0, padx=10, sticky="w")
+            ctk.CTkLabel(scroll_frame, text=dados.get("nome_evento", "Nome não encontrado")).grid(row=row, column=1, padx=10, sticky="w")
+            ctk.CTkLabel(scroll_frame, text=str(len(dados["sessoes"]))).grid(row=row, column=2, padx=10)
+            ctk.CTkLabel(scroll_frame, text=str(total_calc), font=self.FONTS["body_bold"]).grid(row=row, column=3, padx=10)
+            ctk.CTkLabel(scroll_frame, text=status_pdf, text_color=cor).grid(row=row, column=4, padx=10)
+            combo = ctk.CTkComboBox(scroll_frame, values=salas, state="readonly", width=130)
+            combo.set("Selecione")
+            combo.grid(row=row, column=5, padx=10, pady=2)
+            combos_sala.append(combo)
+
+        def aplicar_sala_a_todos(sala):
+            for combo in combos_sala:
+                combo.set(sala)
+
+        combo_todos = ctk.CTkComboBox(input_frame, values=salas, font=self.FONTS["body"], state="readonly", width=150, command=aplicar_sala_a_todos)
+        combo_todos.set("Selecione")
+        combo_todos.pack(side="left")
+
+        def salvar_lote():
+            sessoes_para_salvar = []
+            for resultado, combo in zip(lidos, combos_sala):
+                nome_arquivo = os.path.basename(resultado.caminho)
+                sala = combo.get()
+                if sala == "Selecione":
+                    messagebox.showerror("Erro", f"Selecione a sala do evento do arquivo '{nome_arquivo}'.", parent=win)
+                    return
+                try:
+                    sessoes_para_salvar.extend(bordero.montar_sessoes(resultado.dados, sala))
+                except ValueError as e:
+                    messagebox.showerror("Erro ao Salvar", f"{nome_arquivo}: {e}", parent=win)
+                    return
+
+            # Uma única transação para todos os arquivos: ou tudo é gravado, ou nada.
+            try:
+                with self.db.transacao():
+                    sessoes_salvas = self.db.adicionar_sessoes_em_lote(sessoes_para_salvar)
+                    for resultado in lidos:
+                        bordero.marcar_importado(self.db, resultado.hash, resultado.caminho)
+            except Exception as e:
+                messagebox.showerror("Erro ao Salvar", f"Ocorreu um erro ao salvar as sessões. Nenhuma sessão foi importada:\n{e}", parent=win)
+                return
+
+            messagebox.showinfo("Sucesso", f"{sessoes_salvas} sessões de {len(lidos)} eventos foram importadas com sucesso!", parent=win)
+            win.destroy()
+            self.update_status(f"Importação em lote concluída: {sessoes_salvas} sessões.")
+
+        ctk.CTkButton(win, text="Salvar Todos os Eventos no Sistema", command=salvar_lote, height=40, font=self.FONTS["header"]).pack(pady=20, padx=20, fill="x")
+
     #======================================================================
     #============== FIM DOS MÉTODOS DE IMPORTAÇÃO DE PDF ==================
     #======================================================================
@@ -398,6 +593,9 @@ class App(ctk.CTk):
                       fg_color=self.COLORS["primary"], hover_color=self.COLORS["primary_hover"]).pack(side="left", padx=10)
         ctk.CTkButton(botoes_frame, text="Importar de PDF", height=45, font=self.FONTS["header"], 
                       corner_radius=8, command=self.importar_de_pdf, image=self.ICONS.get("pdf")).pack(side="left", padx=10)
+        self.btn_importar_pasta = ctk.CTkButton(botoes_frame, text="Importar Pasta de PDFs", height=45, font=self.FONTS["header"],
+                                                corner_radius=8, command=self.importar_pasta_pdf, image=self.ICONS.get("pdf"))
+        self.btn_importar_pasta.pack(side="left", padx=10)
 
     def abrir_janela_edicao_publico(self):
         try:
@@ -481,8 +679,7 @@ class App(ctk.CTk):
                     "Publico_Adversos": adv, "PCG_COM": pcg + com, "Total": pcg + com + adv, "Observacoes": obs
                 })
 
-            for sessao in sessoes_para_salvar:
-                self.db.adicionar_sessao(sessao)
+            self.db.adicionar_sessoes_em_lote(sessoes_para_salvar)
 
             self.update_status(f"{len(sessoes_para_salvar)} sessões registradas com sucesso.")
             win_edicao.destroy()
@@ -522,6 +719,22 @@ class App(ctk.CTk):
         self.filtro_nome = ctk.CTkEntry(filtros_frame, placeholder_text="Digite o nome do evento para buscar...", height=35, corner_radius=8)
         self.filtro_nome.pack(side="left", padx=5, pady=5, expand=True, fill="x")
         self.filtro_nome.bind("<KeyRelease>", self._on_filtro_key_release)
+        for tecla in ("<Up>", "<Down>", "<Return>", "<KP_Enter>", "<Escape>"):
+            self.filtro_nome.bind(tecla, self._navegar_sugestoes)
+        # O atraso deixa o clique numa sugestão chegar antes de a lista sumir.
+        self.filtro_nome.bind("<FocusOut>", lambda e: self.after(150, self._esconder_sugestoes))
+
+        # Sugestões de nomes de evento, sobrepostas à tela logo abaixo do campo de busca.
+        self._sugestoes = []
+        self._sugestao_ativa = None
+        self.sugestoes_frame = ctk.CTkFrame(frame, fg_color=self.COLORS["header"], corner_radius=8)
+        self.botoes_sugestao = [
+            ctk.CTkButton(self.sugestoes_frame, text="", anchor="w", height=28, fg_color="transparent",
+                          hover_color=self.COLORS["bg_light"], font=self.FONTS["body"])
+            for _ in range(MAX_SUGESTOES_EVENTO)
+        ]
+        for botao in self.botoes_sugestao:
+            botao.configure(command=lambda b=botao: self._escolher_sugestao(b.cget("text")))
 
         self.filtro_sala = ctk.CTkComboBox(filtros_frame, values=["Todas as Salas", "Arena", "Multiuso", "Mezanino"], state="readonly", height=35, corner_radius=8, command=lambda x: self.atualizar_historico(), button_color=self.COLORS["primary"])
         self.filtro_sala.set("Todas as Salas")
@@ -531,12 +744,42 @@ class App(ctk.CTk):
         self.filtro_ano = ctk.CTkComboBox(filtros_frame, state="readonly", height=35, width=120, corner_radius=8, command=lambda x: self.atualizar_historico(), button_color=self.COLORS["primary"])
         self.filtro_ano.pack(side="left", padx=(0, 5), pady=5)
 
+        avancados_frame = ctk.CTkFrame(controles_frame, fg_color="transparent")
+        avancados_frame.pack(fill="x", padx=5, pady=(0, 5))
+
+        ctk.CTkLabel(avancados_frame, text="De:", font=self.FONTS["body"]).pack(side="left", padx=(5, 5))
+        self.filtro_data_inicio = ctk.CTkEntry(avancados_frame, placeholder_text="DD/MM/AAAA", width=110, height=35, corner_radius=8)
+        self.filtro_data_inicio.pack(side="left", padx=(0, 5))
+        ctk.CTkLabel(avancados_frame, text="Até:", font=self.FONTS["body"]).pack(side="left", padx=(5, 5))
+        self.filtro_data_fim = ctk.CTkEntry(avancados_frame, placeholder_text="DD/MM/AAAA", width=110, height=35, corner_radius=8)
+        self.filtro_data_fim.pack(side="left", padx=(0, 10))
+        for entry in (self.filtro_data_inicio, self.filtro_data_fim):
+            entry.bind("<KeyRelease>", self._formatar_data)
+
+        self.filtro_dias = {}
+        for rotulo, dia in DIAS_FILTRO_HISTORICO:
+            caixa = ctk.CTkCheckBox(avancados_frame, text=rotulo, width=50, checkbox_width=18, checkbox_height=18,
+                                    fg_color=self.COLORS["primary"], hover_color=self.COLORS["primary_hover"])
+            caixa.pack(side="left", padx=2)
+            self.filtro_dias[dia] = caixa
+
+        ctk.CTkLabel(avancados_frame, text="Público:", font=self.FONTS["body"]).pack(side="left", padx=(10, 5))
+        self.filtro_total_minimo = ctk.CTkEntry(avancados_frame, placeholder_text="mín.", width=60, height=35, corner_radius=8)
+        self.filtro_total_minimo.pack(side="left", padx=(0, 5))
+        self.filtro_total_maximo = ctk.CTkEntry(avancados_frame, placeholder_text="máx.", width=60, height=35, corner_radius=8)
+        self.filtro_total_maximo.pack(side="left", padx=(0, 10))
+
+        self.filtro_importado_pdf = ctk.CTkCheckBox(avancados_frame, text="Só importadas via PDF",
+                                                    fg_color=self.COLORS["primary"], hover_color=self.COLORS["primary_hover"])
+        self.filtro_importado_pdf.pack(side="left", padx=5)
+
         botoes_acao_frame = ctk.CTkFrame(controles_frame, fg_color="transparent")
         botoes_acao_frame.pack(fill="x", padx=5, pady=5)
 
         ctk.CTkButton(botoes_acao_frame, text="Pesquisar", height=35, command=self.atualizar_historico, image=self.ICONS.get("search"), fg_color=self.COLORS["primary"], hover_color=self.COLORS["primary_hover"]).pack(side="left", padx=5, pady=5)
         ctk.CTkButton(botoes_acao_frame, text="Limpar", height=35, command=self.limpar_filtros, image=self.ICONS.get("clear")).pack(side="left", padx=5, pady=5)
         ctk.CTkButton(botoes_acao_frame, text="Gerar Planilha", height=35, command=self.exportar_excel, image=self.ICONS.get("excel")).pack(side="left", padx=5, pady=5)
+        ctk.CTkButton(botoes_acao_frame, text="Exportar Dados", height=35, command=self.exportar_dados, image=self.ICONS.get("excel")).pack(side="left", padx=5, pady=5)
         ctk.CTkButton(botoes_acao_frame, text="Backup", height=35, command=self.fazer_backup, image=self.ICONS.get("backup")).pack(side="left", padx=5, pady=5)
 
         exclusao_frame = ctk.CTkFrame(controles_frame, fg_color="transparent")
@@ -548,25 +791,52 @@ class App(ctk.CTk):
         self.combo_excluir_evento.pack(side="left", padx=5)
         ctk.CTkButton(exclusao_frame, text="Excluir Evento", height=35, command=self.excluir_evento_em_lote, image=self.ICONS.get("delete"), fg_color=self.COLORS["danger"], hover_color=self.COLORS["danger_hover"]).pack(side="left", padx=5)
 
-        self.historico_scroll = ctk.CTkScrollableFrame(frame, label_text="Resultados da Busca", label_font=self.FONTS["header"], fg_color=self.COLORS["frame"], corner_radius=10)
-        self.historico_scroll.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-        
-        label_inicial = ctk.CTkLabel(self.historico_scroll, text="Use os filtros acima e clique em 'Pesquisar' para buscar um evento.", font=self.FONTS["body"])
-        label_inicial.grid(row=0, column=0, pady=20, padx=20)
+        # Tabela virtualizada: só as linhas visíveis viram widgets, buscadas do banco por páginas.
+        # Clicar num título ordena pela coluna (no banco, não na memória).
+        colunas = [
+            Coluna("Data", 90, ordem="data"), Coluna("Dia", 100, ordem="dia"),
+            Coluna("Evento", 300, peso=1, ordem="evento"), Coluna("Sala", 90, ordem="sala"),
+            Coluna("PCG", 40, ancora="center", ordem="pcg"), Coluna("Com.", 40, ancora="center", ordem="com"),
+            Coluna("Geral", 40, ancora="center", ordem="adv"),
+            Coluna("Total", 50, ancora="center", negrito=True, ordem="total"),
+        ]
+        acoes = [
+            Acao("Editar sessão", lambda sessao: self.editar_evento(f"db|{sessao.id}"),
+                 self.ICONS.get("edit"), "✏️"),
+            Acao("Excluir sessão", lambda sessao: self.excluir_evento(f"db|{sessao.id}"),
+                 self.ICONS.get("delete"), "🗑️", perigosa=True),
+        ]
+        self.tabela_historico = TabelaVirtual(
+            frame, colunas, self._formatar_linha_historico, acoes,
+            fontes={"normal": self.FONTS["body"], "negrito": self.FONTS["body_bold"], "cabecalho": self.FONTS["header"]},
+            cor_cabecalho=self.COLORS["header"], cores_linhas=(self.COLORS["bg_light"], self.COLORS["frame"]),
+            cores_perigo={"fg_color": self.COLORS["danger"], "hover_color": self.COLORS["danger_hover"]},
+            titulo="Resultados da Busca", fonte_titulo=self.FONTS["header"],
+            fg_color=self.COLORS["frame"], corner_radius=10, ao_ordenar=self._ordenar_historico,
+        )
+        self.tabela_historico.marcar_ordenacao(*self.ordem_historico)
+        self.tabela_historico.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+        self.tabela_historico.mostrar_mensagem("Use os filtros acima e clique em 'Pesquisar' para buscar um evento.")
 
 
     def limpar_resultados_historico(self):
-        for w in self.historico_scroll.winfo_children():
-            w.destroy()
-        label_limpo = ctk.CTkLabel(self.historico_scroll, text="Use os filtros e clique em 'Pesquisar' para buscar.", font=self.FONTS["body"])
-        label_limpo.grid(row=0, column=0, pady=20)
+        self._cancelar_busca_historico()
+        self.historico = None
+        self.tabela_historico.configurar_titulo("Resultados da Busca")
+        self.tabela_historico.mostrar_mensagem("Use os filtros e clique em 'Pesquisar' para buscar.")
         self.combo_excluir_evento.configure(values=["Nenhum evento na busca"])
         self.combo_excluir_evento.set("Nenhum evento na busca")
 
     def limpar_filtros(self):
         self.filtro_nome.delete(0, 'end')
+        self._esconder_sugestoes()
         self.filtro_sala.set("Todas as Salas")
         self.filtro_ano.set('')
+        for entry in (self.filtro_data_inicio, self.filtro_data_fim, self.filtro_total_minimo, self.filtro_total_maximo):
+            entry.delete(0, 'end')
+        for caixa in self.filtro_dias.values():
+            caixa.deselect()
+        self.filtro_importado_pdf.deselect()
         self.limpar_resultados_historico()
         self.update_status("Filtros limpos.")
 
@@ -587,116 +857,254 @@ class App(ctk.CTk):
         except Exception as e:
             messagebox.showerror("Erro de Backup", f"Não foi possível criar o backup: {e}")
 
-    def carregar_dados(self, filtro_nome="", filtro_sala="", ano_selecionado=None):
-        if self.tab_view.get() == "Painel de Gráficos":
-            df = self.db.buscar_todas_sessoes()
+    @staticmethod
+    def _formatar_linha_historico(sessao):
+        """Textos das colunas do histórico para uma Sessao (data vem de data_iso, já validada)."""
+        ano, mes, dia = sessao.data_iso.split("-")
+        sala = "Multiuso" if sessao.sala == "Sala Multiuso" else sessao.sala
+        return (f"{dia}/{mes}/{ano}", sessao.dia_semana, sessao.nome_evento, sala,
+                str(_inteiro(sessao.publico_pcg)), str(_inteiro(sessao.publico_comerciario)),
+                str(_inteiro(sessao.publico_adversos)), str(_inteiro(sessao.total)))
+
+    def _filtros_historico(self):
+        """
+        Filtros preenchidos na aba de histórico, como parâmetros nomeados das buscas do Database
+        (só os preenchidos). Lança ValueError com a mensagem para o usuário se algum for inválido.
+        """
+        filtros = {}
+        if self.filtro_nome.get().strip():
+            filtros["filtro_nome"] = self.filtro_nome.get().strip()
+        if self.filtro_sala.get() != "Todas as Salas":
+            filtros["filtro_sala"] = self.filtro_sala.get()
+        if self.filtro_ano.get().isdigit():
+            filtros["ano_selecionado"] = int(self.filtro_ano.get())
+
+        for chave, entry, nome in (("data_inicio", self.filtro_data_inicio, "inicial"),
+                                   ("data_fim", self.filtro_data_fim, "final")):
+            texto = entry.get().strip()
+            if texto:
+                filtros[chave] = data_iso(texto)
+                if filtros[chave] is None:
+                    raise ValueError(f"A data {nome} '{texto}' é inválida. Use DD/MM/AAAA.")
+        if "data_inicio" in filtros and "data_fim" in filtros and filtros["data_inicio"] > filtros["data_fim"]:
+            raise ValueError("A data inicial é posterior à data final.")
+
+        dias = tuple(dia for dia, caixa in self.filtro_dias.items() if caixa.get())
+        if dias and len(dias) < len(self.filtro_dias):
+            filtros["dias_semana"] = dias
+
+        for chave, entry in (("total_minimo", self.filtro_total_minimo), ("total_maximo", self.filtro_total_maximo)):
+            texto = entry.get().strip()
+            if texto:
+                if not texto.isdigit():
+                    raise ValueError(f"O público '{texto}' precisa ser um número inteiro.")
+                filtros[chave] = int(texto)
+
+        if self.filtro_importado_pdf.get():
+            filtros["importado_pdf"] = True
+        return filtros
+
+    def _ordenar_historico(self, ordem):
+        """Clique no título de uma coluna: ordena por ela ou inverte o sentido, se já era a atual."""
+        atual, crescente = self.ordem_historico
+        if ordem == atual:
+            crescente = not crescente
         else:
-            df = self.db.buscar_sessoes_filtradas(filtro_nome, filtro_sala, ano_selecionado)
-
-        if not df.empty:
-            df['Data'] = pd.to_datetime(df['data'], dayfirst=True, errors='coerce')
-            df.dropna(subset=['Data'], inplace=True)
-            df['__sheet'] = 'db'
-            df['__sheet_idx'] = df['id']
-            df['sala'] = df['sala'].replace('Sala Multiuso', 'Multiuso')
-            df.rename(columns={
-                "dia_semana": "Dia", "nome_evento": "Nome do Evento", "sala": "Sala",
-                "publico_pcg": "Publico PCG", "publico_comerciario": "Publico Comerciário",
-                "publico_adversos": "Publico Adversos", "pcg_com": "PCG+COM.", "total": "Total",
-                "observacoes": "Observações"}, inplace=True)
-            cols_num = ['Publico PCG', 'Publico Comerciário', 'Publico Adversos', 'PCG+COM.', 'Total']
-            for col in cols_num:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        return df
+            crescente = ordem in ("evento", "sala")  # textos em ordem alfabética; datas e números do maior
+        self.ordem_historico = (ordem, crescente)
+        self.tabela_historico.marcar_ordenacao(ordem, crescente)
+        if self.historico is not None or self._buscando_historico:
+            self.atualizar_historico()
 
     def atualizar_historico(self, event=None):
-        for w in self.historico_scroll.winfo_children():
-            w.destroy()
-
-        filtro_nome = self.filtro_nome.get().strip()
-        filtro_sala = self.filtro_sala.get()
-        ano_selecionado_str = self.filtro_ano.get()
-
-        if not filtro_nome and filtro_sala == "Todas as Salas" and not ano_selecionado_str:
+        try:
+            filtros = self._filtros_historico()
+        except ValueError as e:
+            messagebox.showerror("Filtro inválido", str(e))
+            return
+        if not filtros:
             self.limpar_resultados_historico()
             return
 
-        filtro_sala_db = filtro_sala if filtro_sala != "Todas as Salas" else ""
-        ano_selecionado = int(ano_selecionado_str) if ano_selecionado_str and ano_selecionado_str.isdigit() else None
+        # O interrupt vem antes do pedido entrar na fila, para nunca atingir a busca nova.
+        geracao = self._cancelar_busca_historico()
+        self._fila_historico.put((geracao, filtros, self.ordem_historico))
+        self._buscando_historico = True
+        self.tabela_historico.configurar_titulo("Resultados da Busca — buscando...")
+
+    def _cancelar_busca_historico(self):
+        """Invalida a busca em andamento (abortando a consulta no SQLite) e retorna a nova geração."""
+        self._geracao_historico += 1
+        self._buscando_historico = False
+        self.db.interromper(self._thread_historico)
+        return self._geracao_historico
+
+    def _trabalhador_historico(self):
+        """Laço da thread de busca: atende os pedidos da fila, pulando os que já ficaram velhos."""
+        while True:
+            pedido = self._fila_historico.get()
+            if pedido is None:
+                return
+            geracao, filtros, ordenacao = pedido
+            if geracao != self._geracao_historico:
+                continue
+            try:
+                resultado = self._buscar_historico(geracao, filtros, ordenacao)
+            except sqlite3.OperationalError as e:
+                if "interrupted" in str(e):
+                    continue  # abortada por uma busca mais nova
+                self.after(0, self._erro_busca_historico, geracao, e)
+                continue
+            except Exception as e:
+                self.after(0, self._erro_busca_historico, geracao, e)
+                continue
+            if resultado is not None:
+                self.after(0, self._historico_concluido, geracao, resultado)
+
+    def _buscar_historico(self, geracao, filtros, ordenacao):
+        """Faz as consultas de uma busca (na thread de busca). Retorna None se ela ficou velha no meio."""
+        def vencida():
+            return geracao != self._geracao_historico
+
+        quantidade, publico = self.db.totais_sessoes_filtradas(**filtros)
+        if vencida():
+            return None
+        resultado = {"filtros": filtros, "ordenacao": ordenacao, "anos": self.db.buscar_anos_disponiveis()}
+        if not quantidade or vencida():
+            return resultado
+
+        # As páginas são buscadas sob demanda, conforme a rolagem chega nelas. As ordens por data e por
+        # público seguem de uma página à outra por keyset; as demais vão por deslocamento.
+        ordem, crescente = ordenacao
+        modelo = FontePaginada(
+            quantidade,
+            lambda apos, deslocamento, limite: self.db.buscar_pagina_lista(
+                **filtros, apos=apos, limite=limite, deslocamento=deslocamento, ordem=ordem, crescente=crescente),
+            chave=attrgetter(ORDENACOES_HISTORICO[ordem], "id") if ordem in ORDENACOES_KEYSET else None,
+            tamanho_pagina=TAMANHO_PAGINA_HISTORICO,
+            identificador=lambda sessao: sessao.id,
+        )
+        modelo.linha(0)  # a primeira página já chega pronta na thread da interface
+        if vencida():
+            return None
+        eventos = self.db.contar_sessoes_por_evento(**filtros)
+        resultado.update(modelo=modelo, publico=publico, eventos=eventos)
+        return resultado
+
+    def _historico_concluido(self, geracao, resultado):
+        if geracao != self._geracao_historico:
+            return
+        self._buscando_historico = False
+        self._atualizar_anos_historico(resultado["anos"])
+        if "modelo" not in resultado:
+            self.historico = None
+            self.combo_excluir_evento.configure(values=["Nenhum evento encontrado"])
+            self.combo_excluir_evento.set("Nenhum evento encontrado")
+            self.tabela_historico.configurar_titulo("Resultados da Busca")
+            self.tabela_historico.mostrar_mensagem("Nenhum dado encontrado para os filtros selecionados.")
+            return
+
+        eventos = resultado["eventos"]
+        self.historico = {
+            "filtros": resultado["filtros"], "ordenacao": resultado["ordenacao"],
+            "modelo": resultado["modelo"], "publico": resultado["publico"],
+            "eventos": eventos, "nomes_eventos": list(eventos),
+        }
+        self._atualizar_combo_eventos()
+        self._atualizar_titulo_historico()
+        self.tabela_historico.definir_fonte(resultado["modelo"])
 
-        df = self.carregar_dados(filtro_nome, filtro_sala_db, ano_selecionado)
+    def _erro_busca_historico(self, geracao, erro):
+        if geracao != self._geracao_historico:
+            return
+        self._buscando_historico = False
+        self.tabela_historico.configurar_titulo("Resultados da Busca")
+        messagebox.showerror("Erro", f"Não foi possível buscar no histórico: {erro}")
 
-        anos_df = self.db.buscar_anos_disponiveis()
-        if not anos_df.empty:
-            anos_disponiveis = sorted(anos_df['ano'].unique(), reverse=True)
-            if self.filtro_ano.cget("values") != [str(ano) for ano in anos_disponiveis]:
-                self.filtro_ano.configure(values=[str(ano) for ano in anos_disponiveis])
-            if ano_selecionado_str not in [str(a) for a in anos_disponiveis]:
+    def _atualizar_anos_historico(self, anos_disponiveis=None):
+        if anos_disponiveis is None:
+            anos_disponiveis = self.db.buscar_anos_disponiveis()
+        ano_selecionado_str = self.filtro_ano.get()
+        if anos_disponiveis:
+            if self.filtro_ano.cget("values") != anos_disponiveis:
+                self.filtro_ano.configure(values=anos_disponiveis)
+            if ano_selecionado_str not in anos_disponiveis:
                     self.filtro_ano.set(ano_selecionado_str if ano_selecionado_str else '')
 
-        if not df.empty:
-            eventos_unicos = sorted(df["Nome do Evento"].unique())
-            self.combo_excluir_evento.configure(values=["Selecione um evento"] + eventos_unicos)
+    def _atualizar_titulo_historico(self):
+        historico = self.historico
+        self.tabela_historico.configurar_titulo(
+            f"Resultados da Busca — {len(historico['modelo'])} sessões | Público total: {historico['publico']}")
+
+    def _atualizar_combo_eventos(self):
+        self.combo_excluir_evento.configure(values=["Selecione um evento"] + self.historico["nomes_eventos"])
+        if self.combo_excluir_evento.get() not in self.historico["eventos"]:
             self.combo_excluir_evento.set("Selecione um evento")
-        else:
-            self.combo_excluir_evento.configure(values=["Nenhum evento encontrado"])
-            self.combo_excluir_evento.set("Nenhum evento encontrado")
 
-        if df.empty:
-            label_vazio = ctk.CTkLabel(self.historico_scroll, text="Nenhum dado encontrado para os filtros selecionados.", font=self.FONTS["body"])
-            label_vazio.grid(row=0, column=0, pady=20)
+    def _contar_evento_historico(self, nome_evento, delta):
+        """Soma `delta` sessões ao evento no combo de exclusão, incluindo ou tirando o nome em ordem."""
+        if not nome_evento:
+            return
+        eventos, nomes = self.historico["eventos"], self.historico["nomes_eventos"]
+        quantidade = eventos.get(nome_evento, 0) + delta
+        if quantidade > 0:
+            if nome_evento not in eventos:
+                insort(nomes, nome_evento)
+            eventos[nome_evento] = quantidade
+        elif nome_evento in eventos:
+            del eventos[nome_evento]
+            del nomes[bisect_left(nomes, nome_evento)]
+
+    def _historico_sessao_alterada(self, sessao_id):
+        """
+        Atualiza o histórico depois que uma sessão foi editada ou excluída, sem refazer a busca:
+        a linha é corrigida, removida ou reposicionada na ordem, e totais e eventos são ajustados.
+        """
+        if self._buscando_historico:
+            # A busca em andamento pode ter lido o banco antes da alteração: refaz com os filtros atuais.
+            self.atualizar_historico()
+            return
+        historico = self.historico
+        if historico is None:
+            return
+        ordem, crescente = historico["ordenacao"]
+        if ordem != "data":
+            # A posição de uma linha só é calculada incrementalmente na ordem por data.
+            self.atualizar_historico()
+            return
+        modelo = historico["modelo"]
+        indice = modelo.indice_de(sessao_id)
+        if indice is None:
+            # A linha não está em memória (alterada por outro caminho): refaz a busca.
+            self.atualizar_historico()
             return
 
-        df = df.sort_values(by="Data", ascending=False).reset_index(drop=True)
-
-        headers = ["Data", "Dia", "Evento", "Sala", "PCG", "Com.", "Geral", "Total", "Ações"]
-        column_configs = [
-            {'weight': 0, 'minsize': 90}, {'weight': 0, 'minsize': 100}, {'weight': 1, 'minsize': 300},
-            {'weight': 0, 'minsize': 90}, {'weight': 0, 'minsize': 40}, {'weight': 0, 'minsize': 40},
-            {'weight': 0, 'minsize': 40}, {'weight': 0, 'minsize': 50}, {'weight': 0, 'minsize': 110},
-        ]
-        for i, config in enumerate(column_configs):
-            self.historico_scroll.grid_columnconfigure(i, weight=config['weight'], minsize=config['minsize'])
-
-        header_bg_color = self.COLORS["header"]
-        for i, h in enumerate(headers):
-            cell_frame = ctk.CTkFrame(self.historico_scroll, fg_color=header_bg_color, corner_radius=0)
-            cell_frame.grid(row=0, column=i, sticky="nsew", padx=(0,1), pady=(0,2))
-            label = ctk.CTkLabel(cell_frame, text=h, font=self.FONTS["header"])
-            label.pack(padx=10, pady=5, expand=True, fill="both")
-
-        alt_row_color = ("#f2f2f2", self.COLORS["bg_light"])
-        for idx, row_data in df.iterrows():
-            row_color = alt_row_color[1] if idx % 2 == 0 else "transparent"
-            unique_id = f"db|{int(row_data['__sheet_idx'])}"
-            data_map = {
-                0: row_data['Data'].strftime('%d/%m/%Y'), 1: row_data['Dia'], 2: row_data['Nome do Evento'],
-                3: row_data['Sala'], 4: str(int(row_data['Publico PCG'])), 5: str(int(row_data['Publico Comerciário'])),
-                6: str(int(row_data['Publico Adversos'])), 7: str(int(row_data['Total'])),
-            }
-            for col_idx in range(len(headers)):
-                cell_frame = ctk.CTkFrame(self.historico_scroll, fg_color=row_color, corner_radius=0)
-                cell_frame.grid(row=idx + 1, column=col_idx, sticky="nsew", padx=(0,1), pady=(0,1))
-                if col_idx in data_map:
-                    font = self.FONTS["body_bold"] if col_idx == 7 else self.FONTS["body"]
-                    label = ctk.CTkLabel(cell_frame, text=data_map[col_idx], font=font)
-                    anchor = "w" if col_idx < 4 else "center"
-                    label.pack(padx=10, pady=3, expand=True, fill="both", anchor=anchor)
-                elif col_idx == 8:
-                    action_frame = ctk.CTkFrame(cell_frame, fg_color="transparent")
-                    action_frame.pack(expand=True, fill="both", pady=2, padx=5)
-
-                    edit_icon = self.ICONS.get("edit")
-                    edit_text = "" if edit_icon else "✏️"
-                    delete_icon = self.ICONS.get("delete")
-                    delete_text = "" if delete_icon else "🗑️"
-
-                    ctk.CTkButton(action_frame, text=edit_text, width=30, image=edit_icon, command=lambda uid=unique_id: self.editar_evento(uid)).pack(side='left', padx=3, expand=True)
-                    ctk.CTkButton(action_frame, text=delete_text, width=30, image=delete_icon, fg_color=self.COLORS["danger"], hover_color=self.COLORS["danger_hover"], command=lambda uid=unique_id: self.excluir_evento(uid)).pack(side='left', padx=3, expand=True)
+        anterior = modelo.linha(indice)
+        resultado = self.db.buscar_posicao_no_historico(sessao_id, crescente=crescente, **historico["filtros"])
+        if resultado is not None and resultado[1] == indice:
+            modelo.substituir(indice, resultado[0])
+        else:
+            modelo.remover(indice)
+            if resultado is not None:
+                modelo.inserir(resultado[1], resultado[0])
+
+        atual = resultado[0] if resultado is not None else None
+        historico["publico"] += (_inteiro(atual.total) if atual else 0) - _inteiro(anterior.total)
+        self._contar_evento_historico(anterior.nome_evento, -1)
+        if atual:
+            self._contar_evento_historico(atual.nome_evento, +1)
+        if atual is None or atual.data_iso[:4] != anterior.data_iso[:4]:
+            self._atualizar_anos_historico()
+
+        if not len(modelo):
+            self.atualizar_historico()
+            return
+        self._atualizar_combo_eventos()
+        self._atualizar_titulo_historico()
+        self.tabela_historico.atualizar()
 
     def exportar_excel(self):
-        df = self.db.buscar_todas_sessoes()
-        if df.empty:
+        if not self.db.contar_sessoes_filtradas():
             messagebox.showwarning("Aviso", "Nenhum dado no banco de dados para exportar.")
             return
         file_path = filedialog.asksaveasfilename(
@@ -706,23 +1114,58 @@ class App(ctk.CTk):
         )
         if not file_path:
             return
-        df['ano'] = pd.to_datetime(df['data'], dayfirst=True).dt.year
-        df.rename(columns={
-            "dia_semana": "Dia", "data": "Data", "nome_evento": "Nome do Evento",
-            "sala": "Sala", "publico_pcg": "Publico PCG",
-            "publico_comerciario": "Publico Comerciário", "publico_adversos": "Publico Adversos",
-            "pcg_com": "PCG+COM.", "total": "Total", "observacoes": "Observações"
-        }, inplace=True)
+        # Incremental: só as abas dos anos alterados desde a última planilha gravada neste arquivo são refeitas.
+        exportar = functools.partial(exportacao.exportar_planilha_anual, incremental=True)
+        self._iniciar_exportacao(exportar, file_path, "Gerar Planilha", "planilha Excel")
+
+    def exportar_dados(self):
+        """Exporta as sessões em CSV, Parquet (uma pasta por ano) ou Arrow IPC, para análise."""
+        if not self.db.contar_sessoes_filtradas():
+            messagebox.showwarning("Aviso", "Nenhum dado no banco de dados para exportar.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Parquet (pasta por ano)", "*.parquet"), ("Arrow IPC", "*.arrow")],
+            initialfile="sessoes.csv"
+        )
+        if not file_path:
+            return
+        formato = exportacao.formato_pelo_caminho(file_path)
+        if formato not in ("csv", "parquet", "arrow"):
+            messagebox.showwarning("Aviso", "Escolha um arquivo .csv, .parquet ou .arrow.")
+            return
+        exportar = exportacao.FORMATOS[formato]
+        if formato in exportacao.FORMATOS_INCREMENTAIS:
+            exportar = functools.partial(exportar, incremental=True)
+        self._iniciar_exportacao(exportar, file_path, "Exportar Dados", f"exportação {formato.upper()}")
+
+    def _iniciar_exportacao(self, exportar, file_path, titulo, descricao):
+        progresso = JanelaProgresso(self, titulo, "Exportando sessões...")
+        self.update_status(f"Gerando {descricao}...", clear_after=60000)
+        thread = threading.Thread(target=self._exportar_thread, args=(exportar, file_path, progresso, descricao))
+        thread.daemon = True
+        thread.start()
+
+    def _exportar_thread(self, exportar, file_path, progresso, descricao):
+        def ao_exportar(exportadas, total, ano):
+            self.after(0, progresso.atualizar, exportadas, total, f"Ano {ano}: {exportadas} de {total} sessões")
+
         try:
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                for ano, grupo in df.groupby('ano'):
-                    sheet_name = f"Ano_{ano}"
-                    grupo_final = grupo.drop(columns=['id', 'ano'])
-                    grupo_final.to_excel(writer, sheet_name=sheet_name, index=False)
-            self.update_status("Planilha Excel gerada com sucesso.")
-            messagebox.showinfo("Sucesso", f"Planilha gerada com sucesso em:\n{file_path}")
+            quantidade = exportar(self.db, file_path, ao_exportar, progresso.cancelar)
+            self.after(0, self._exportar_concluido, progresso, file_path, quantidade, descricao)
+        except exportacao.ExportacaoCancelada:
+            self.after(0, self._exportar_concluido, progresso, file_path, None, descricao)
         except Exception as e:
-            messagebox.showerror("Erro ao Exportar", f"Ocorreu um erro ao gerar a planilha: {e}")
+            self.after(0, lambda e=e: messagebox.showerror("Erro ao Exportar", f"Ocorreu um erro ao gerar a {descricao}: {e}"))
+            self.after(0, self._exportar_concluido, progresso, file_path, None, descricao)
+
+    def _exportar_concluido(self, progresso, file_path, quantidade, descricao):
+        progresso.fechar()
+        self.clear_status()
+        if quantidade is None:
+            return
+        self.update_status(f"{descricao[0].upper()}{descricao[1:]} gerada com sucesso.")
+        messagebox.showinfo("Sucesso", f"{descricao[0].upper()}{descricao[1:]} gerada com sucesso em:\n{file_path}\n({quantidade} sessões gravadas)")
 
     def excluir_evento_em_lote(self):
         evento_selecionado = self.combo_excluir_evento.get()
@@ -791,7 +1234,7 @@ class App(ctk.CTk):
                 self.db.atualizar_sessao(sessao_id, dados_atualizados)
                 win.destroy()
                 self.update_status("Sessão alterada com sucesso.")
-                self.atualizar_historico()
+                self._historico_sessao_alterada(sessao_id)
             except Exception as e:
                 messagebox.showerror("Erro", f"Falha ao salvar alterações: {e}", parent=win)
         ctk.CTkButton(win, text="Salvar", command=salvar_alteracoes).grid(row=8, column=0, pady=12, padx=10)
@@ -809,7 +1252,7 @@ class App(ctk.CTk):
         try:
             self.db.excluir_sessao_por_id(sessao_id)
             self.update_status("Sessão excluída com sucesso.")
-            self.atualizar_historico()
+            self._historico_sessao_alterada(sessao_id)
         except Exception as e:
             messagebox.showerror("Erro ao excluir", f"Ocorreu um erro: {e}")
 
@@ -867,8 +1310,9 @@ class App(ctk.CTk):
             ano1 = int(ano1_str)
             ano2 = int(ano2_str)
 
-            df = self.carregar_dados()
-            if df.empty:
+            # Só os totais por sala (poucas linhas) — nada de carregar a tabela inteira.
+            resumo_salas = self.db.agregar_publico(por=("sala",))
+            if not resumo_salas:
                 self.after(0, lambda: messagebox.showerror("Erro", "Nenhum dado disponível."))
                 self.after(0, self.btn_gerar_grafico.configure, {"state": "normal", "text": "Gerar Gráficos"})
                 return
@@ -877,12 +1321,12 @@ class App(ctk.CTk):
             fig.patch.set_facecolor(self.COLORS["frame"])
             tipo = self.combo_tipo.get()
             
-            self.plotar(ax1, df, ano1, tipo)
-            self.plotar(ax2, df, ano2, tipo)
+            self.plotar(ax1, ano1, tipo)
+            self.plotar(ax2, ano2, tipo)
             fig.tight_layout(pad=3.0)
             self.figura_atual = fig
 
-            self.after(0, self._exibir_grafico_concluido, fig, df)
+            self.after(0, self._exibir_grafico_concluido, fig, resumo_salas)
 
         except ValueError:
             self.after(0, lambda: messagebox.showerror("Erro", "Digite anos válidos."))
@@ -892,14 +1336,16 @@ class App(ctk.CTk):
             self.after(0, self.btn_gerar_grafico.configure, {"state": "normal", "text": "Gerar Gráficos"})
             self.after(0, self.clear_status)
 
-    def _exibir_grafico_concluido(self, fig, df):
+    def _exibir_grafico_concluido(self, fig, resumo_salas):
         self.btn_gerar_grafico.configure(state="normal", text="Gerar Gráficos")
         for w in self.graficos_container.winfo_children():
             w.destroy()
         
-        total_publico = int(df['Total'].sum())
-        sala_mais = df['Sala'].mode().iloc[0] if not df['Sala'].empty else 'N/A'
-        resumo = f"Total de Registros: {len(df)} | Público Total (Geral): {total_publico} | Sala Mais Usada: {sala_mais}"
+        total_registros = sum(r['sessoes'] for r in resumo_salas)
+        total_publico = int(sum(r['total'] for r in resumo_salas))
+        salas = [r for r in resumo_salas if r['sala']]
+        sala_mais = max(salas, key=lambda r: r['sessoes'])['sala'] if salas else 'N/A'
+        resumo = f"Total de Registros: {total_registros} | Público Total (Geral): {total_publico} | Sala Mais Usada: {sala_mais}"
         self.resumo_label.configure(text=resumo, font=self.FONTS["header"])
 
         canvas = FigureCanvasTkAgg(fig, master=self.graficos_container)
@@ -925,8 +1371,8 @@ class App(ctk.CTk):
         except Exception as e:
             messagebox.showerror("Erro ao Exportar", f"Ocorreu um erro ao exportar o gráfico: {e}")
 
-    def plotar(self, ax, df, ano, tipo):
-        df_ano = df[df['Data'].dt.year == ano]
+    def plotar(self, ax, ano, tipo):
+        """Desenha um gráfico do ano; cada tipo busca no banco apenas os totais agregados que exibe."""
         ax.clear()
 
         ax.set_facecolor(self.COLORS["frame"])
@@ -939,7 +1385,8 @@ class App(ctk.CTk):
         ax.xaxis.label.set_color(self.COLORS["text"])
         ax.title.set_color(self.COLORS["text"])
 
-        if df_ano.empty:
+        totais_ano = self.db.agregar_publico(ano=ano)
+        if not totais_ano:
             ax.text(0.5, 0.5, f"Sem dados para {ano}", ha='center', va='center', color=self.COLORS["text"])
             ax.set_title(f"Análise {ano}", color=self.COLORS["text"])
             return
@@ -947,9 +1394,8 @@ class App(ctk.CTk):
         colors = ['#42B883', '#5E81AC', '#BF616A', '#D08770', '#EBCB8B']
 
         if tipo == "Comparativo de Salas por Mês":
-            if 'Data' not in df_ano.columns: return
-            df_ano.loc[:, 'Mes'] = df_ano['Data'].dt.month
-            pivot_df = df_ano.pivot_table(index='Mes', columns='Sala', values='Total', aggfunc='sum', fill_value=0)
+            por_sala_mes = pd.DataFrame(self.db.agregar_publico(por=("mes", "sala"), ano=ano))
+            pivot_df = por_sala_mes.pivot_table(index='mes', columns='sala', values='total', aggfunc='sum', fill_value=0)
             
             todas_salas = ['Arena', 'Multiuso', 'Mezanino']
             for sala in todas_salas:
@@ -976,15 +1422,16 @@ class App(ctk.CTk):
             leg.get_title().set_color(self.COLORS["text"])
 
         elif tipo == "Comparativo Anual":
-            totais = df_ano[['Publico PCG', 'Publico Comerciário', 'Publico Adversos']].sum()
-            totais.index = ['PCG', 'Comerciário', 'Adversos']
+            geral = totais_ano[0]
+            totais = pd.Series([geral['pcg'], geral['com'], geral['adv']], index=['PCG', 'Comerciário', 'Adversos'])
             bars = totais.plot(kind='bar', ax=ax, rot=0, color=colors)
             ax.set_title(f"Público Total em {ano}")
             ax.set_ylabel("Total de Público")
             ax.bar_label(bars.containers[0], color=self.COLORS["text"], fontsize=10, padding=3)
 
         elif tipo == "Comparativo Mensal":
-            totais_mes = df_ano.groupby(df_ano['Data'].dt.month)['Total'].sum().reindex(range(1,13), fill_value=0)
+            por_mes = self.db.agregar_publico(por=("mes",), ano=ano)
+            totais_mes = pd.Series({r['mes']: r['total'] for r in por_mes}, dtype='int64').reindex(range(1,13), fill_value=0)
             bars = totais_mes.plot(kind='bar', ax=ax, color=colors[0])
             ax.set_title(f"Público Mensal em {ano}")
             ax.set_xlabel("Mês")
@@ -992,8 +1439,8 @@ class App(ctk.CTk):
             ax.bar_label(bars.containers[0], color=self.COLORS["text"], fontsize=10, padding=3)
 
         elif tipo == "Comparativo Semestral":
-            df_ano.loc[:, 'Sem'] = df_ano['Data'].dt.month.apply(lambda m: 1 if m <= 6 else 2)
-            sem_totais = df_ano.groupby('Sem')['Total'].sum().reindex([1,2], fill_value=0)
+            por_semestre = self.db.agregar_publico(por=("semestre",), ano=ano)
+            sem_totais = pd.Series({r['semestre']: r['total'] for r in por_semestre}, dtype='int64').reindex([1,2], fill_value=0)
             sem_totais.index = ['1º Semestre', '2º Semestre']
             bars = sem_totais.plot(kind='bar', ax=ax, rot=0, color=colors[:2])
             ax.set_title(f"Comparativo Semestral {ano}")
@@ -1001,18 +1448,18 @@ class App(ctk.CTk):
             ax.bar_label(bars.containers[0], color=self.COLORS["text"], fontsize=10, padding=3)
 
         elif tipo == "Comparativo de Domingos":
-            domingos = df_ano[df_ano['Data'].dt.weekday == 6]
-            if domingos.empty:
+            domingos = self.db.agregar_publico(ano=ano, dia_semana=0)
+            if not domingos:
                 ax.text(0.5, 0.5, "Sem dados para domingos", color=self.COLORS["text"], ha='center')
             else:
-                totais = domingos[['Publico PCG', 'Publico Comerciário', 'Publico Adversos']].sum()
-                totais.index = ['PCG', 'Comerciário', 'Adversos']
+                totais = pd.Series([domingos[0]['pcg'], domingos[0]['com'], domingos[0]['adv']], index=['PCG', 'Comerciário', 'Adversos'])
                 bars = totais.plot(kind='bar', ax=ax, rot=0, color=colors)
                 ax.bar_label(bars.containers[0], color=self.COLORS["text"], fontsize=10, padding=3)
             ax.set_title(f"Público nos Domingos em {ano}")
 
         elif tipo == "Comparativo por Sala":
-            sala_tot = df_ano.groupby('Sala')['Total'].sum()
+            por_sala = self.db.agregar_publico(por=("sala",), ano=ano)
+            sala_tot = pd.Series({r['sala']: r['total'] for r in por_sala if r['sala']}, dtype='int64')
             if sala_tot.empty:
                 ax.text(0.5, 0.5, "Sem dados de sala", color=self.COLORS["text"], ha='center')
             else:
@@ -1029,5 +1476,8 @@ class App(ctk.CTk):
             ax.set_title(f"Distribuição por Sala {ano}")
 
 if __name__ == "__main__":
+    # No executável do PyInstaller, cada processo de leitura de PDF (bordero.processar_pdfs) roda
+    # este mesmo arquivo: freeze_support faz o processo filho executar a tarefa e sair, sem abrir o App.
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
@@ -0,0 +1,347 @@
+# tabela_virtual.py
+# Tabela virtualizada: só as linhas visíveis existem como widgets e são reaproveitadas na rolagem,
+# então exibir 100 mil sessões custa o mesmo que exibir 50.
+import math
+import tkinter as tk
+from collections import OrderedDict, namedtuple
+
+import customtkinter as ctk
+
+# largura: mínimo em pixels; peso: quanto a coluna cresce com a janela; ancora: "w" ou "center";
+# ordem: chave de ordenação repassada a `ao_ordenar` quando o cabeçalho é clicado (None = fixa).
+Coluna = namedtuple("Coluna", "titulo largura peso ancora negrito ordem", defaults=(0, "w", False, None))
+
+# Ação de linha: vira um botão em cada linha e um item do menu de contexto (botão direito).
+# `comando` recebe a linha (registro do modelo) sobre a qual a ação foi acionada.
+Acao = namedtuple("Acao", "rotulo comando icone texto_botao perigosa", defaults=(None, "", False))
+
+class FontePaginada:
+    """
+    Modelo de dados da tabela: um total conhecido e acesso por índice a linhas buscadas em páginas.
+    `buscar_pagina(apos, deslocamento, limite)` devolve uma lista de linhas: quando a página anterior
+    está em memória, segue dela por keyset (`apos` = chave(última linha)); senão pula direto com
+    `deslocamento` (ex.: a barra de rolagem arrastada para o meio). Guarda até `max_paginas` páginas (LRU).
+    Sem `chave` (ordenações que não admitem keyset), toda página é buscada por deslocamento.
+
+    Com `identificador(linha)` (ex.: o id da sessão), as linhas em memória ficam indexadas por ele e
+    o modelo aceita alterações pontuais (remover, inserir, substituir) sem voltar ao banco.
+    """
+    def __init__(self, total, buscar_pagina, chave=None, tamanho_pagina=100, max_paginas=20, identificador=None):
+        self.total = total
+        self.buscar_pagina = buscar_pagina
+        self.chave = chave
+        self.tamanho_pagina = tamanho_pagina
+        self.max_paginas = max_paginas
+        self.identificador = identificador
+        self._paginas = OrderedDict()
+        self._indices = {}  # identificador -> índice, só das linhas em memória
+
+    def __len__(self):
+        return self.total
+
+    def linha(self, indice):
+        """Linha na posição `indice` (0 = primeira), ou None se estiver fora do resultado."""
+        if not 0 <= indice < self.total:
+            return None
+        numero, posicao = divmod(indice, self.tamanho_pagina)
+        pagina = self._pagina(numero)
+        return pagina[posicao] if posicao < len(pagina) else None
+
+    def _pagina(self, numero):
+        pagina = self._paginas.get(numero)
+        if pagina is not None:
+            self._paginas.move_to_end(numero)
+            return pagina
+        anterior = self._paginas.get(numero - 1)
+        if self.chave is not None and anterior and len(anterior) == self.tamanho_pagina:
+            pagina = self.buscar_pagina(self.chave(anterior[-1]), 0, self.tamanho_pagina)
+        else:
+            pagina = self.buscar_pagina(None, numero * self.tamanho_pagina, self.tamanho_pagina)
+        self._paginas[numero] = pagina
+        self._indexar(numero, pagina)
+        while len(self._paginas) > self.max_paginas:
+            _, descartada = self._paginas.popitem(last=False)
+            if self.identificador is not None:
+                for linha in descartada:
+                    self._indices.pop(self.identificador(linha), None)
+        return pagina
+
+    def _indexar(self, numero, pagina):
+        if self.identificador is not None:
+            inicio = numero * self.tamanho_pagina
+            for posicao, linha in enumerate(pagina):
+                self._indices[self.identificador(linha)] = inicio + posicao
+
+    def limpar(self):
+        """Descarta as páginas em memória (a próxima leitura busca de novo no banco)."""
+        self._paginas.clear()
+        self._indices.clear()
+
+    def indice_de(self, identificador):
+        """Índice da linha com este identificador, se ela estiver em memória; senão None."""
+        return self._indices.get(identificador)
+
+    def _linhas_em_memoria(self):
+        for numero, pagina in self._paginas.items():
+            inicio = numero * self.tamanho_pagina
+            for posicao, linha in enumerate(pagina):
+                yield inicio + posicao, linha
+
+    def _reorganizar(self, linhas_por_indice):
+        """
+        Refaz as páginas em memória a partir de {índice: linha} já deslocado pela alteração.
+        Páginas que ficaram incompletas (a linha que entraria nelas está numa página não carregada)
+        são descartadas e serão buscadas de novo quando aparecerem na tela.
+        """
+        paginas = OrderedDict()
+        for numero in self._paginas:
+            inicio = numero * self.tamanho_pagina
+            esperado = min(self.tamanho_pagina, self.total - inicio)
+            if esperado <= 0:
+                continue
+            pagina = [linhas_por_indice.get(inicio + posicao) for posicao in range(esperado)]
+            if None not in pagina:
+                paginas[numero] = pagina
+        self._paginas = paginas
+        self._indices.clear()
+        for numero, pagina in paginas.items():
+            self._indexar(numero, pagina)
+
+    def remover(self, indice):
+        """Tira a linha da posição `indice`; as seguintes sobem uma posição."""
+        self.total -= 1
+        self._reorganizar({(i if i < indice else i - 1): linha
+                           for i, linha in self._linhas_em_memoria() if i != indice})
+
+    def inserir(self, indice, linha):
+        """Insere `linha` na posição `indice`; as seguintes descem uma posição."""
+        self.total += 1
+        linhas = {(i if i < indice else i + 1): atual for i, atual in self._linhas_em_memoria()}
+        linhas[indice] = linha
+        self._reorganizar(linhas)
+
+    def substituir(self, indice, linha):
+        """Troca a linha da posição `indice` (mesma posição na ordenação)."""
+        numero, posicao = divmod(indice, self.tamanho_pagina)
+        pagina = self._paginas.get(numero)
+        if pagina is not None and posicao < len(pagina):
+            if self.identificador is not None:
+                self._indices.pop(self.identificador(pagina[posicao]), None)
+            pagina[posicao] = linha
+            self._indexar(numero, pagina)
+
+class _LinhaTabela(ctk.CTkFrame):
+    """Uma linha reaproveitável: os textos são trocados a cada rolagem, os widgets ficam."""
+    def __init__(self, tabela):
+        super().__init__(tabela.corpo, corner_radius=0, height=tabela.altura_linha)
+        self.tabela = tabela
+        self.indice = None
+        self.textos = None
+        tabela._configurar_colunas(self)
+        self.labels = []
+        for i, coluna in enumerate(tabela.colunas):
+            fonte = tabela.fontes["negrito" if coluna.negrito else "normal"]
+            label = ctk.CTkLabel(self, text="", font=fonte, anchor=coluna.ancora)
+            label.grid(row=0, column=i, sticky="nsew", padx=(10, 1))
+            self.labels.append(label)
+        self.widgets = [self] + self.labels
+        if tabela.acoes:
+            acoes_frame = ctk.CTkFrame(self, fg_color="transparent")
+            acoes_frame.grid(row=0, column=len(tabela.colunas), sticky="nsew", padx=5)
+            for acao in tabela.acoes:
+                cores = tabela.cores_perigo if acao.perigosa else {}
+                botao = ctk.CTkButton(acoes_frame, text=acao.texto_botao if acao.icone is None else "",
+                                      image=acao.icone, width=30, height=tabela.altura_linha - 6,
+                                      command=lambda a=acao: tabela._executar(a, self.indice), **cores)
+                botao.pack(side="left", padx=3, expand=True)
+                self.widgets.append(botao)
+        for widget in self.widgets:
+            tabela._ligar_eventos(widget, self)
+
+    def mostrar(self, indice, textos, cor):
+        self.indice = indice
+        if textos != self.textos:
+            for label, texto in zip(self.labels, textos):
+                label.configure(text=texto)
+            self.textos = textos
+        if self.cget("fg_color") != cor:
+            self.configure(fg_color=cor)
+
+class TabelaVirtual(ctk.CTkFrame):
+    """
+    Grade com cabeçalho fixo, barra de rolagem proporcional ao total e um conjunto de linhas
+    reaproveitadas. `formatar(linha)` converte um registro do modelo nos textos das colunas.
+    """
+    def __init__(self, master, colunas, formatar, acoes=(), altura_linha=30, fontes=None,
+                 cor_cabecalho=None, cores_linhas=("transparent", "transparent"), cores_perigo=None,
+                 titulo="", fonte_titulo=None, ao_ordenar=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.colunas = list(colunas)
+        self.formatar = formatar
+        self.acoes = list(acoes)
+        self.altura_linha = altura_linha
+        self.fontes = fontes or {"normal": None, "negrito": None, "cabecalho": None}
+        self.cores_linhas = cores_linhas
+        self.cores_perigo = cores_perigo or {}
+        self.fonte = None
+        self.primeira = 0
+        self._linhas = []
+        self._visiveis = 0
+        self._render_agendado = False
+        self._indice_menu = None
+        self.ao_ordenar = ao_ordenar
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+        self.titulo = ctk.CTkLabel(self, text=titulo, font=fonte_titulo)
+        self.titulo.grid(row=0, column=0, columnspan=2, pady=(6, 4))
+
+        self.cabecalho = ctk.CTkFrame(self, fg_color=cor_cabecalho, corner_radius=0)
+        self.cabecalho.grid(row=1, column=0, sticky="ew", padx=(5, 0))
+        self._configurar_colunas(self.cabecalho)
+        titulos = [c.titulo for c in self.colunas] + (["Ações"] if self.acoes else [])
+        self.titulos_colunas = []
+        for i, texto in enumerate(titulos):
+            label = ctk.CTkLabel(self.cabecalho, text=texto, font=self.fontes["cabecalho"])
+            label.grid(row=0, column=i, sticky="nsew", padx=(10, 1), pady=5)
+            self.titulos_colunas.append(label)
+            if ao_ordenar is not None and i < len(self.colunas) and self.colunas[i].ordem:
+                label.configure(cursor="hand2")
+                label.bind("<Button-1>", lambda e, ordem=self.colunas[i].ordem: self.ao_ordenar(ordem))
+
+        self.corpo = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.corpo.grid(row=2, column=0, sticky="nsew", padx=(5, 0), pady=(0, 5))
+        self.barra = ctk.CTkScrollbar(self, command=self._ao_rolar_barra)
+        self.barra.grid(row=1, column=1, rowspan=2, sticky="ns", padx=(0, 3), pady=(0, 5))
+        self.mensagem = ctk.CTkLabel(self.corpo, text="", font=self.fontes["normal"])
+
+        self.menu = tk.Menu(self, tearoff=0)
+        for acao in self.acoes:
+            self.menu.add_command(label=acao.rotulo, command=lambda a=acao: self._executar(a, self._indice_menu))
+
+        self.corpo.bind("<Configure>", self._ao_redimensionar)
+        self._ligar_eventos(self.corpo, None)
+
+    # ------------------------------------------------------------------ API
+
+    def definir_fonte(self, fonte, manter_posicao=False):
+        """Passa a exibir o modelo `fonte` (FontePaginada ou qualquer objeto com len() e linha(i))."""
+        self.fonte = fonte
+        if not manter_posicao:
+            self.primeira = 0
+        self.mensagem.place_forget()
+        self._agendar_render()
+
+    def mostrar_mensagem(self, texto):
+        """Esvazia a tabela e mostra um aviso no lugar das linhas."""
+        self.fonte = None
+        for linha in self._linhas:
+            linha.place_forget()
+        self.mensagem.configure(text=texto)
+        self.mensagem.place(relx=0.5, y=20, anchor="n")
+        self.barra.set(0, 1)
+
+    def configurar_titulo(self, texto):
+        self.titulo.configure(text=texto)
+
+    def marcar_ordenacao(self, ordem, crescente):
+        """Mostra ▲/▼ no título da coluna cuja chave de ordenação é `ordem`."""
+        for coluna, label in zip(self.colunas, self.titulos_colunas):
+            seta = (" ▲" if crescente else " ▼") if ordem and coluna.ordem == ordem else ""
+            label.configure(text=coluna.titulo + seta)
+
+    def atualizar(self):
+        """Redesenha as linhas visíveis (ex.: depois que o modelo mudou)."""
+        self._agendar_render()
+
+    # ------------------------------------------------------------ internos
+
+    def _configurar_colunas(self, frame):
+        for i, coluna in enumerate(self.colunas):
+            frame.grid_columnconfigure(i, weight=coluna.peso, minsize=coluna.largura)
+        if self.acoes:
+            frame.grid_columnconfigure(len(self.colunas), weight=0, minsize=40 * len(self.acoes) + 30)
+
+    def _ligar_eventos(self, widget, linha):
+        widget.bind("<MouseWheel>", self._ao_rolar_roda)
+        widget.bind("<Button-4>", lambda e: self._rolar(-3))
+        widget.bind("<Button-5>", lambda e: self._rolar(3))
+        if linha is not None and self.acoes:
+            widget.bind("<Button-3>", lambda e, l=linha: self._abrir_menu(e, l))
+
+    def _abrir_menu(self, evento, linha):
+        if linha.indice is None:
+            return
+        self._indice_menu = linha.indice
+        try:
+            self.menu.tk_popup(evento.x_root, evento.y_root)
+        finally:
+            self.menu.grab_release()
+
+    def _executar(self, acao, indice):
+        if self.fonte is None or indice is None:
+            return
+        registro = self.fonte.linha(indice)
+        if registro is not None:
+            acao.comando(registro)
+
+    def _total(self):
+        return len(self.fonte) if self.fonte is not None else 0
+
+    def _max_primeira(self):
+        return max(0, self._total() - max(1, self._visiveis - 1))
+
+    def _rolar(self, linhas):
+        self._ir_para(self.primeira + linhas)
+
+    def _ir_para(self, primeira):
+        primeira = min(max(0, int(primeira)), self._max_primeira())
+        if primeira != self.primeira:
+            self.primeira = primeira
+            self._agendar_render()
+
+    def _ao_rolar_roda(self, evento):
+        # Windows e macOS informam delta (múltiplos de 120 no Windows); Linux usa Button-4/5.
+        passos = -evento.delta // 120 if abs(evento.delta) >= 120 else -evento.delta
+        self._rolar(3 * passos)
+
+    def _ao_rolar_barra(self, comando, valor, unidade=None):
+        if comando == "moveto":
+            self._ir_para(float(valor) * self._total())
+        elif comando == "scroll":
+            passo = max(1, self._visiveis - 1) if unidade == "pages" else 1
+            self._rolar(int(valor) * passo)
+
+    def _ao_redimensionar(self, evento):
+        visiveis = math.ceil(evento.height / self.altura_linha)
+        if visiveis != self._visiveis:
+            self._visiveis = visiveis
+            self._agendar_render()
+
+    def _agendar_render(self):
+        # Vários eventos de rolagem seguidos viram um único redesenho.
+        if not self._render_agendado:
+            self._render_agendado = True
+            self.after_idle(self._renderizar)
+
+    def _renderizar(self):
+        self._render_agendado = False
+        if self.fonte is None:
+            return
+        total = self._total()
+        self.primeira = min(self.primeira, self._max_primeira())
+        while len(self._linhas) < min(self._visiveis, total):
+            self._linhas.append(_LinhaTabela(self))
+        for i, linha in enumerate(self._linhas):
+            indice = self.primeira + i
+            registro = self.fonte.linha(indice) if i < self._visiveis else None
+            if registro is None:
+                linha.indice = None
+                linha.place_forget()
+                continue
+            linha.mostrar(indice, self.formatar(registro), self.cores_linhas[indice % 2])
+            linha.place(x=0, y=i * self.altura_linha, relwidth=1, height=self.altura_linha)
+        if total:
+            self.barra.set(self.primeira / total, min(1.0, (self.primeira + self._visiveis) / total))
+        else:
+            self.barra.set(0, 1)
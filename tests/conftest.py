@@ -0,0 +1,21 @@
+# conftest.py
+# Os módulos do sistema ficam na raiz do repositório (sem pacote): torna-os importáveis nos testes.
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database  # noqa: E402
+import gerador_dados  # noqa: E402
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco sintético pequeno (300 sessões espalhadas por vários anos) num arquivo temporário."""
+    db = Database(str(tmp_path / "teste.db"))
+    db.criar_tabela()
+    db.adicionar_sessoes_em_lote(gerador_dados.gerar_sessoes(300))
+    yield db
+    db.fechar()
@@ -0,0 +1,36 @@
+# test_bordero.py
+import os
+
+import pytest
+
+import bordero
+from conftest import RAIZ
+
+# (arquivo, sessões, total) conferidos à mão contra o leitor antigo
+BORDEROS = [
+    ("Sermão.pdf", 12, 575),
+    ("Like a Clown.pdf", 12, 988),
+    ("ProjetoOrni.pdf", 4, 176),
+]
+
+def _caminho(nome):
+    return os.path.join(RAIZ, "Borderôs-set", nome)
+
+@pytest.mark.parametrize("nome, sessoes, total", BORDEROS)
+def test_amostras_de_bordero(nome, sessoes, total):
+    dados = bordero.processar_pdf(_caminho(nome))
+    assert len(dados["sessoes"]) == sessoes
+    assert bordero.total_calculado(dados) == total
+    assert dados["total_vendido_pdf"] == total
+
+@pytest.mark.parametrize("nome, sessoes, total", BORDEROS)
+def test_quebra_de_pagina_nao_altera_o_resultado(nome, sessoes, total):
+    paginas = list(bordero.paginas_pdf(_caminho(nome)))
+    texto = "".join(paginas)
+    esperado = bordero.extrair_dados_do_texto(texto)
+    assert bordero.extrair_dados(paginas) == esperado
+
+    # Quebra em cada fim de linha: blocos "marcador / valor" e "Data:" passam de uma página para a outra.
+    quebras = [i + 1 for i, caractere in enumerate(texto) if caractere == "\n"]
+    for quebra in quebras:
+        assert bordero.extrair_dados([texto[:quebra], texto[quebra:]]) == esperado, quebra
@@ -0,0 +1,182 @@
+# test_database.py
+import sqlite3
+import threading
+from operator import attrgetter
+
+import pytest
+
+import benchmark
+from database import Database
+
+SESSAO_EXTERNA = {
+    "Dia": "sábado", "Data": "15/03/2025", "Nome_do_Evento": "SESSÃO EXTERNA", "Sala": "Arena",
+    "Publico_PCG": 1000, "Publico_Comerciario": 0, "Publico_Adversos": 0, "PCG_COM": 1000, "Total": 1000,
+    "Observacoes": "",
+}
+
+def _em_thread_nova(funcao):
+    """Executa `funcao` numa thread recém-criada (conexão nova, como em _gerar_grafico_thread)."""
+    resultado = {}
+    thread = threading.Thread(target=lambda: resultado.setdefault("valor", funcao()))
+    thread.start()
+    thread.join()
+    return resultado["valor"]
+
+def _totais_2025(db):
+    agregado = db.agregar_publico(ano=2025)
+    return (agregado[0]["sessoes"], agregado[0]["total"]) if agregado else (0, 0)
+
+def test_escrita_de_outra_conexao_invalida_cache_em_thread_nova(banco):
+    antes = _em_thread_nova(lambda: _totais_2025(banco))
+    assert _em_thread_nova(lambda: _totais_2025(banco)) == antes  # segunda leitura vem do cache
+
+    externo = Database(banco.db_name)
+    externo.adicionar_sessao(SESSAO_EXTERNA)
+    externo.fechar()
+
+    depois = _em_thread_nova(lambda: _totais_2025(banco))
+    assert depois == (antes[0] + 1, antes[1] + 1000)
+    assert _totais_2025(banco) == depois  # e também na thread que já tinha conexão
+
+def test_escrita_de_outra_conexao_invalida_cache_na_mesma_thread(banco):
+    anos = banco.buscar_anos_disponiveis()
+    externo = Database(banco.db_name)
+    with externo.transacao() as cursor:
+        cursor.execute("DELETE FROM sessoes WHERE data_iso LIKE ?", (f"{anos[0]}%",))
+    externo.fechar()
+    assert banco.buscar_anos_disponiveis() == anos[1:]
+
+def test_escrita_propria_invalida_cache(banco):
+    antes = _totais_2025(banco)
+    banco.adicionar_sessao(SESSAO_EXTERNA)
+    assert _totais_2025(banco) == (antes[0] + 1, antes[1] + 1000)
+
+def test_registro_de_importacao_sobrevive_ao_descarte_do_cache_pdf(banco):
+    banco.guardar_cache_pdf("hash-a", "a.pdf", {"sessoes": []}, limite=1)
+    banco.marcar_pdf_importado("hash-a")
+    banco.guardar_cache_pdf("hash-b", "b.pdf", {"sessoes": []}, limite=1)  # descarta "hash-a" do cache
+    assert banco.buscar_cache_pdf("hash-a") is None
+    assert banco.buscar_importacao_pdf("hash-a") is not None
+    assert banco.buscar_importacao_pdf("hash-b") is None
+
+def test_cache_pdf_nao_invalida_cache_de_consultas(banco):
+    banco.buscar_anos_disponiveis()
+    banco.guardar_cache_pdf("hash-a", "a.pdf", {"sessoes": []})
+    banco.buscar_cache_pdf("hash-a")
+    acertos = banco.estatisticas_cache()["acertos"]
+    banco.buscar_anos_disponiveis()
+    assert banco.estatisticas_cache()["acertos"] == acertos + 1
+
+@pytest.mark.parametrize("descricao, filtros, indices", benchmark.PLANOS_ESPERADOS,
+                         ids=[caso[0] for caso in benchmark.PLANOS_ESPERADOS])
+def test_filtros_do_historico_buscam_por_indice(banco, descricao, filtros, indices):
+    ano = banco.buscar_anos_disponiveis()[0]
+    filtros = {chave: valor.format(ano=ano) if isinstance(valor, str) else valor for chave, valor in filtros.items()}
+    plano = banco.plano_pagina(**filtros)
+    assert not any(passo.startswith("SCAN sessoes") for passo in plano), plano
+    assert benchmark.plano_aceito(plano, indices), plano
+
+@pytest.mark.parametrize("crescente", [False, True])
+def test_paginas_por_publico_seguem_por_keyset(banco, crescente):
+    todas = banco.buscar_pagina_lista(limite=1000, ordem="total", crescente=crescente)
+    paginas, apos = [], None
+    while True:
+        pagina = banco.buscar_pagina_lista(apos=apos, limite=7, ordem="total", crescente=crescente)
+        if not pagina:
+            break
+        paginas += pagina
+        apos = attrgetter("total", "id")(pagina[-1])
+    assert paginas == todas
+
+def test_migracao_mescla_duplicadas_e_guarda_as_copias(tmp_path, capsys):
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)  # banco no esquema original, antes de qualquer migração
+    conn.execute("""
+        CREATE TABLE sessoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, dia_semana TEXT, data TEXT, nome_evento TEXT, sala TEXT,
+            publico_pcg INTEGER, publico_comerciario INTEGER, publico_adversos INTEGER, pcg_com INTEGER,
+            total INTEGER, observacoes TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO sessoes (dia_semana, data, nome_evento, sala, total, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
+        [("sábado", "15/03/2025", "PEÇA", "Arena", 100, "primeira"),
+         ("sábado", "15/03/2025", "PEÇA", "Arena", 120, "segunda"),
+         ("sábado", "15/03/2025", "PEÇA", "Arena", 130, "terceira"),
+         ("sábado", "15/03/2025", "PEÇA", "Teatro", 50, "outra sala")])
+    conn.commit()
+    conn.close()
+
+    db = Database(caminho)
+    assert db.criar_tabela() == 2
+    assert capsys.readouterr().out == ""  # a migração não escreve na saída da interface ou do monitor
+    sessoes = db.buscar_sessoes_filtradas().sort_values("id")
+    assert list(zip(sessoes["id"], sessoes["observacoes"])) == [(3, "terceira"), (4, "outra sala")]
+    copias = db._conectar().execute(
+        "SELECT id, total, mantida_id FROM sessoes_duplicadas ORDER BY id").fetchall()
+    assert [tuple(copia) for copia in copias] == [(1, 100, 3), (2, 120, 3)]
+
+    assert db.criar_tabela() == 0  # já migrado: nada a mesclar de novo
+    db.fechar()
+
+def test_inserir_sessao_repetida_nao_duplica(banco):
+    quantidade = banco.contar_sessoes_filtradas()
+    assert banco.adicionar_sessoes_em_lote([SESSAO_EXTERNA]) == 1
+    assert banco.adicionar_sessoes_em_lote([SESSAO_EXTERNA]) == 0  # mesmos dados: nada é gravado
+    assert banco.adicionar_sessoes_em_lote([dict(SESSAO_EXTERNA, Total=900, Publico_PCG=900)]) == 1
+    assert banco.contar_sessoes_filtradas() == quantidade + 1
+    sessao = banco.buscar_sessoes_filtradas("SESSÃO EXTERNA")
+    assert list(sessao["total"]) == [900]
+
+def _resumo(db):
+    return sorted(tuple(linha) for linha in db._conectar().execute("SELECT * FROM resumo_publico"))
+
+def _confere_resumo(db):
+    """O resumo mantido pelos triggers tem de ser igual ao recalculado do zero."""
+    mantido = _resumo(db)
+    db.reconstruir_resumo()
+    assert mantido == _resumo(db)
+
+def _dados_edicao(db, sessao_id, **alteracoes):
+    sessao = db.buscar_sessao_por_id(sessao_id)
+    dados = {
+        "Nome do Evento": sessao["nome_evento"], "Data": sessao["data"], "Dia": sessao["dia_semana"],
+        "Sala": sessao["sala"], "Publico PCG": sessao["publico_pcg"],
+        "Publico Comerciário": sessao["publico_comerciario"], "Publico Adversos": sessao["publico_adversos"],
+        "PCG+COM.": sessao["pcg_com"], "Total": sessao["total"], "Observações": sessao["observacoes"],
+    }
+    dados.update(alteracoes)
+    return dados
+
+def test_resumo_publico_acompanha_insercoes_edicoes_e_exclusoes(banco):
+    _confere_resumo(banco)
+
+    banco.adicionar_sessoes_em_lote([SESSAO_EXTERNA, dict(SESSAO_EXTERNA, Data="16/03/2025", Sala="Sala Multiuso")])
+    banco.adicionar_sessoes_em_lote([dict(SESSAO_EXTERNA, Total=400, Publico_PCG=400)])  # upsert altera o total
+    _confere_resumo(banco)
+
+    ids = [int(i) for i in banco.buscar_sessoes_filtradas().sort_values("id")["id"]]
+    banco.atualizar_sessao(ids[0], _dados_edicao(banco, ids[0], Data="01/02/2019", Dia="sexta-feira"))
+    banco.atualizar_sessao(ids[1], _dados_edicao(banco, ids[1], Sala="Sala Multiuso", Total=77))
+    banco.atualizar_sessao(ids[2], _dados_edicao(banco, ids[2], Data="data inválida"))  # sai do resumo
+    _confere_resumo(banco)
+
+    banco.excluir_sessao_por_id(ids[3])
+    banco.excluir_evento_em_lote("SESSÃO EXTERNA")
+    _confere_resumo(banco)
+
+def test_busca_no_cache_pdf_so_escreve_quando_encontra(banco):
+    banco.guardar_cache_pdf("hash-a", "a.pdf", {"sessoes": []}, limite=2)
+    banco.guardar_cache_pdf("hash-b", "b.pdf", {"sessoes": []}, limite=2)
+    banco._conectar().execute("PRAGMA busy_timeout = 50")
+
+    outro = Database(banco.db_name)
+    with outro.transacao():  # outra conexão segura a trava de escrita (ex.: importação em lote)
+        assert banco.buscar_cache_pdf("hash-x") is None  # sem pedir a trava
+        assert banco.buscar_cache_pdf("hash-b")["nome_arquivo"] == "b.pdf"  # acesso não marcado
+    outro.fechar()
+
+    assert banco.buscar_cache_pdf("hash-a")["nome_arquivo"] == "a.pdf"  # marca o acesso
+    banco.guardar_cache_pdf("hash-c", "c.pdf", {"sessoes": []}, limite=2)
+    assert banco.buscar_cache_pdf("hash-b") is None  # o menos usado recentemente foi descartado
+    assert banco.buscar_cache_pdf("hash-a") is not None
@@ -0,0 +1,101 @@
+# test_exportacao.py
+import re
+import zipfile
+
+import openpyxl
+import pytest
+
+import exportacao
+
+PADRAO_TEXTO_INLINE = re.compile(rb'<c r="([A-Z]+[0-9]+)" t="inlineStr"><is><t[^>]*>(.*?)</t></is></c>', re.S)
+
+def _salvar_como_excel(caminho):
+    """
+    Regrava a planilha como o Excel faz ao salvar: textos em xl/sharedStrings.xml e células
+    com t="s" apontando para eles (o openpyxl sempre grava textos inline).
+    """
+    textos = []
+    def compartilhar(match):
+        textos.append(match.group(2))
+        return b'<c r="%s" t="s"><v>%d</v></c>' % (match.group(1), len(textos) - 1)
+
+    with zipfile.ZipFile(caminho) as original:
+        partes = {nome: original.read(nome) for nome in original.namelist()}
+    for nome in partes:
+        if nome.startswith("xl/worksheets/"):
+            partes[nome] = PADRAO_TEXTO_INLINE.sub(compartilhar, partes[nome])
+    itens = b"".join(b"<si><t>%s</t></si>" % texto for texto in textos)
+    partes["xl/sharedStrings.xml"] = (
+        b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="%d" uniqueCount="%d">%s</sst>'
+        % (len(textos), len(textos), itens))
+    partes["xl/_rels/workbook.xml.rels"] = partes["xl/_rels/workbook.xml.rels"].replace(b"</Relationships>", (
+        b'<Relationship Id="rIdTextos" Target="sharedStrings.xml" '
+        b'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/></Relationships>'))
+    partes["[Content_Types].xml"] = partes["[Content_Types].xml"].replace(b"</Types>", (
+        b'<Override PartName="/xl/sharedStrings.xml" '
+        b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'))
+    with zipfile.ZipFile(caminho, "w", zipfile.ZIP_DEFLATED) as regravado:
+        for nome, conteudo in partes.items():
+            regravado.writestr(nome, conteudo)
+
+def _conteudo(caminho):
+    livro = openpyxl.load_workbook(caminho, read_only=True)
+    try:
+        return {aba.title: [tuple(linha) for linha in aba.iter_rows(values_only=True)] for aba in livro.worksheets}
+    finally:
+        livro.close()
+
+def _alterar_um_ano(db):
+    with db.transacao() as cursor:
+        cursor.execute("UPDATE sessoes SET observacoes = 'alterada' WHERE id = (SELECT MAX(id) FROM sessoes)")
+
+def test_incremental_reaproveita_so_anos_inalterados(banco, tmp_path):
+    caminho = str(tmp_path / "anual.xlsx")
+    assert exportacao.exportar_planilha_anual(banco, caminho, incremental=True) == 300
+    assert exportacao.exportar_planilha_anual(banco, caminho, incremental=True) == 0
+
+    _alterar_um_ano(banco)
+    regravadas = exportacao.exportar_planilha_anual(banco, caminho, incremental=True)
+    assert 0 < regravadas < 300
+
+    completo = str(tmp_path / "completo.xlsx")
+    exportacao.exportar_planilha_anual(banco, completo)
+    assert _conteudo(caminho) == _conteudo(completo)
+
+def test_planilha_salva_no_excel_forca_exportacao_completa(banco, tmp_path):
+    caminho = str(tmp_path / "anual.xlsx")
+    exportacao.exportar_planilha_anual(banco, caminho, incremental=True)
+
+    _salvar_como_excel(caminho)
+    assert _conteudo(caminho)  # a planilha "do Excel" abre normalmente
+
+    # Sem alteração no banco, a planilha editada não pode ser dada como atual.
+    assert exportacao.exportar_planilha_anual(banco, caminho, incremental=True) == 300
+
+    _salvar_como_excel(caminho)
+    _alterar_um_ano(banco)
+    exportacao.exportar_planilha_anual(banco, caminho, incremental=True)
+
+    completo = str(tmp_path / "completo.xlsx")
+    exportacao.exportar_planilha_anual(banco, completo)
+    assert _conteudo(caminho) == _conteudo(completo)
+    openpyxl.load_workbook(caminho).close()  # abre sem IndexError em parse_cell
+
+def test_aba_com_textos_compartilhados_nao_e_reaproveitada(banco, tmp_path, monkeypatch):
+    caminho = str(tmp_path / "anual.xlsx")
+    exportacao.exportar_planilha_anual(banco, caminho, incremental=True)
+    _salvar_como_excel(caminho)
+
+    # Mesmo que a impressão do arquivo confira, abas dependentes de sharedStrings não são copiadas.
+    monkeypatch.setattr(exportacao, "_arquivo_inalterado", lambda caminho, impressao: True)
+    _alterar_um_ano(banco)
+    assert exportacao.exportar_planilha_anual(banco, caminho, incremental=True) == 300
+    openpyxl.load_workbook(caminho).close()
+
+def test_parquet_sobre_arquivo_existente_e_recusado(banco, tmp_path):
+    caminho = tmp_path / "sessoes.parquet"
+    caminho.write_bytes(b"nao e uma pasta")
+    for incremental in (False, True):
+        with pytest.raises(ValueError, match="já existe como arquivo"):
+            exportacao.exportar_parquet(banco, str(caminho), incremental=incremental)
+    assert caminho.read_bytes() == b"nao e uma pasta"
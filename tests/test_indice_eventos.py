@@ -0,0 +1,69 @@
+# test_indice_eventos.py
+from indice_eventos import IndiceEventos
+
+NOMES = ["SERMÃO DE SANTO ANTONIO AOS PEIXES", "O Sermão da Montanha", "Serenata", "PROJETO ORNITORRINCO",
+         "Como um Palhaço - Like a Clown"]
+
+def _sessao(nome, data="15/03/2025", sala="Arena"):
+    return {"Dia": "sábado", "Data": data, "Nome_do_Evento": nome, "Sala": sala, "Publico_PCG": 10,
+            "Publico_Comerciario": 0, "Publico_Adversos": 0, "PCG_COM": 10, "Total": 10, "Observacoes": ""}
+
+def test_prefixo_ignora_acentos_e_maiusculas():
+    indice = IndiceEventos(NOMES)
+    esperado = ["O Sermão da Montanha", "SERMÃO DE SANTO ANTONIO AOS PEIXES"]
+    assert sorted(indice.sugerir("sermao")) == esperado
+    assert sorted(indice.sugerir("SERMÃO")) == esperado
+    assert indice.sugerir("sermão d") == ["O Sermão da Montanha", "SERMÃO DE SANTO ANTONIO AOS PEIXES"]
+    assert indice.sugerir("palhaco") == ["Como um Palhaço - Like a Clown"]  # palavra do meio do nome
+    assert indice.sugerir("o sermao") == ["O Sermão da Montanha"]
+    assert indice.sugerir("sera") == []
+    assert indice.sugerir("  ") == []
+
+def test_limite_de_sugestoes():
+    indice = IndiceEventos([f"Festival {numero:02d}" for numero in range(30)])
+    assert len(indice.sugerir("fest")) == 10
+    assert indice.sugerir("fest", limite=3) == ["Festival 00", "Festival 01", "Festival 02"]
+    assert len(indice.sugerir("fest", limite=100)) == 30
+
+def test_adicionar_e_remover():
+    indice = IndiceEventos(NOMES)
+    indice.adicionar("Sertão Veredas")
+    indice.adicionar("Sertão Veredas")  # repetido não duplica as chaves
+    assert indice.sugerir("sert") == ["Sertão Veredas"]
+    assert len(indice) == len(NOMES) + 1
+
+    indice.remover("O Sermão da Montanha")
+    indice.remover("Nunca Existiu")
+    assert indice.sugerir("serm") == ["SERMÃO DE SANTO ANTONIO AOS PEIXES"]
+    assert indice.sugerir("montanha") == []
+    assert indice._chaves == IndiceEventos(set(NOMES) - {"O Sermão da Montanha"} | {"Sertão Veredas"})._chaves
+
+def test_indice_acompanha_o_banco(banco):
+    def confere():
+        """As sugestões do índice mantido incrementalmente são as de um índice montado do zero."""
+        nomes = [row[0] for row in banco._conectar().execute("SELECT DISTINCT nome_evento FROM sessoes")]
+        assert banco.indice_eventos()._chaves == IndiceEventos(nomes)._chaves
+
+    banco.indice_eventos()
+    banco.adicionar_sessoes_em_lote([_sessao("Ópera do Malandro"), _sessao("Ópera do Malandro", "16/03/2025")])
+    assert banco.sugerir_eventos("opera") == ["Ópera do Malandro"]
+    confere()
+
+    sessoes = banco.buscar_sessoes_filtradas("Ópera do Malandro").sort_values("id")
+    primeira, segunda = (int(i) for i in sessoes["id"])
+    banco.excluir_sessao_por_id(primeira)
+    assert banco.sugerir_eventos("malandro") == ["Ópera do Malandro"]  # ainda há uma sessão do evento
+
+    sessao = banco.buscar_sessao_por_id(segunda)
+    banco.atualizar_sessao(segunda, {
+        "Nome do Evento": "Gota d'Água", "Data": sessao["data"], "Dia": sessao["dia_semana"], "Sala": sessao["sala"],
+        "Publico PCG": 10, "Publico Comerciário": 0, "Publico Adversos": 0, "PCG+COM.": 10, "Total": 10,
+        "Observações": "",
+    })
+    assert banco.sugerir_eventos("malandro") == []
+    assert banco.sugerir_eventos("agua") == ["Gota d'Água"]
+    confere()
+
+    banco.excluir_evento_em_lote("Gota d'Água")
+    assert banco.sugerir_eventos("gota") == []
+    confere()
@@ -0,0 +1,80 @@
+# test_monitorar_pasta.py
+import os
+import shutil
+
+import pytest
+
+import monitorar_pasta
+from conftest import RAIZ
+from database import Database
+
+PASTA_BORDEROS = os.path.join(RAIZ, "Borderôs-set")
+
+@pytest.fixture
+def pasta(tmp_path):
+    destino = tmp_path / "entrada"
+    shutil.copytree(PASTA_BORDEROS, destino)
+    return str(destino)
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "monitor.db"))
+    db.criar_tabela()
+    yield db
+    db.fechar()
+
+def _varrer(monitor):
+    """Duas varreduras: a primeira só anota tamanho e data dos arquivos, a segunda importa."""
+    monitor.executar_ciclo()
+    return monitor.executar_ciclo()
+
+def test_reinicio_nao_reimporta_depois_do_descarte_do_cache(pasta, db, capsys):
+    gravadas, erros = _varrer(monitorar_pasta.MonitorPasta(pasta, db, sala_padrao="Arena"))
+    assert gravadas > 0 and not erros
+
+    sessao_id = int(db.buscar_sessoes_filtradas()["id"].iloc[0])
+    with db.transacao() as cursor:
+        cursor.execute("UPDATE sessoes SET total = 999, observacoes = 'corrigida à mão' WHERE id = ?", (sessao_id,))
+        cursor.execute("DELETE FROM cache_pdf")  # como se o LRU tivesse descartado as entradas
+    capsys.readouterr()
+
+    reiniciado = monitorar_pasta.MonitorPasta(pasta, db, sala_padrao="Arena")
+    assert _varrer(reiniciado) == (0, [])
+    assert "não importado" not in capsys.readouterr().out
+    sessao = db.buscar_sessao_por_id(sessao_id)
+    assert (sessao["total"], sessao["observacoes"]) == (999, "corrigida à mão")
+
+def test_copia_de_pdf_importado_so_e_avisada_uma_vez(pasta, db):
+    _varrer(monitorar_pasta.MonitorPasta(pasta, db, sala_padrao="Arena"))
+    shutil.copy(os.path.join(pasta, "Sermão.pdf"), os.path.join(pasta, "Sermão (cópia).pdf"))
+
+    monitor = monitorar_pasta.MonitorPasta(pasta, db, sala_padrao="Arena")
+    gravadas, erros = _varrer(monitor)
+    assert gravadas == 0 and len(erros) == 1 and "já importado" in erros[0][1]
+
+    assert _varrer(monitorar_pasta.MonitorPasta(pasta, db, sala_padrao="Arena")) == (0, [])
+
+def test_banco_ocupado_adia_a_importacao(pasta, db):
+    monitor = monitorar_pasta.MonitorPasta(pasta, db, sala_padrao="Arena")
+    monitor.executar_ciclo()
+    db._conectar().execute("PRAGMA busy_timeout = 50")
+
+    outro = Database(db.db_name)
+    with outro.transacao():  # segura a trava de escrita, como a interface durante uma gravação
+        assert monitor.executar_ciclo() == (0, [])
+    outro.fechar()
+
+    gravadas, erros = monitor.executar_ciclo()
+    assert gravadas > 0 and not erros
+
+def test_falha_no_lote_importa_os_demais_arquivos(pasta, db, monkeypatch):
+    processar_pdfs = monitorar_pasta.bordero.processar_pdfs
+    def processar_com_falha(caminhos, *args, **kwargs):
+        if any("Sermão" in caminho for caminho in caminhos):
+            raise RuntimeError("processo de leitura encerrado")
+        return processar_pdfs(caminhos, *args, **kwargs)
+    monkeypatch.setattr(monitorar_pasta.bordero, "processar_pdfs", processar_com_falha)
+
+    gravadas, erros = _varrer(monitorar_pasta.MonitorPasta(pasta, db, sala_padrao="Arena"))
+    assert gravadas > 0
+    assert [os.path.basename(caminho) for caminho, _ in erros] == ["Sermão.pdf"]